@@ -0,0 +1,71 @@
+"""Escritura y lectura de la salida transformada: CSV frente al data lake en Parquet.
+
+Mide además una lectura filtrada por año de estreno, que en el data lake solo abre esa partición.
+
+Uso: python -m benchmarks.bench_data_lake [--rows 1000000]
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+os.environ['DEBUG_SINK_ENABLED'] = 'false'
+
+import pandas as pd
+
+from benchmarks.synthetic_data import make_transformed_frame
+from etl.data_lake import DataLake, TRANSFORMED
+from utils.schema import enforce_schema, TRANSFORMED_SCHEMA
+
+
+def timed(func):
+
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+def directory_size_mb(path: str) -> float:
+
+    total = sum(os.path.getsize(os.path.join(root, name)) for root, _, files in os.walk(path) for name in files)
+    return total / 1024 ** 2
+
+
+def run(rows: int, year: int):
+
+    df = enforce_schema(make_transformed_frame(rows), TRANSFORMED_SCHEMA)
+    workdir = tempfile.mkdtemp(prefix='bench_data_lake_')
+    try:
+        csv_path = os.path.join(workdir, 'movies_transformed.csv')
+        csv_write, _ = timed(lambda: df.to_csv(csv_path, index=False))
+        csv_read, _ = timed(lambda: pd.read_csv(csv_path, parse_dates=['release_date']))
+        def read_csv_year():
+            frame = pd.read_csv(csv_path, parse_dates=['release_date'])
+            return frame[frame['release_date'].dt.year == year]
+
+        csv_filtered, filtered = timed(read_csv_year)
+
+        lake = DataLake(path=os.path.join(workdir, 'lake'))
+        lake_write, _ = timed(lambda: lake.write(TRANSFORMED, df))
+        lake_read, _ = timed(lambda: lake.read(TRANSFORMED))
+        lake_filtered, lake_year = timed(lambda: lake.read(TRANSFORMED, release_years=[year]))
+        assert len(lake_year) == len(filtered), (len(lake_year), len(filtered))
+
+        print(f"filas: {rows} (año {year}: {len(filtered)} filas)")
+        print(f"{'':<10} {'escritura':>10} {'lectura':>10} {'lectura año':>12} {'tamaño (MB)':>12}")
+        print(f"{'csv':<10} {csv_write:>9.3f}s {csv_read:>9.3f}s {csv_filtered:>11.3f}s "
+              f"{os.path.getsize(csv_path) / 1024 ** 2:>12.1f}")
+        print(f"{'parquet':<10} {lake_write:>9.3f}s {lake_read:>9.3f}s {lake_filtered:>11.3f}s "
+              f"{directory_size_mb(os.path.join(workdir, 'lake')):>12.1f}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--year', type=int, default=2001)
+    args = parser.parse_args()
+
+    run(args.rows, args.year)
@@ -0,0 +1,72 @@
+"""Memoria y tiempo de limpieza/transformación con tipos por defecto de pandas frente al esquema compacto.
+
+Uso: python -m benchmarks.bench_dtypes [--rows 1000000]
+"""
+import argparse
+import os
+import time
+
+os.environ['DEBUG_SINK_ENABLED'] = 'false'
+
+import pandas as pd
+
+from benchmarks.synthetic_data import make_raw_frames
+import utils.schema as schema
+from etl.transformer import Transformer
+from utils.clean_data import CleanerValidator
+
+
+def run_pipeline(movies: pd.DataFrame, details: pd.DataFrame, compact: bool) -> dict:
+
+    schema.COMPACT_DTYPES = compact
+    movies = schema.enforce_schema(movies, schema.RAW_MOVIE_SCHEMA)
+    details = schema.enforce_schema(details, schema.RAW_DETAIL_SCHEMA)
+
+    start = time.perf_counter()
+    cleaned = CleanerValidator().clean_and_validate(movies, details)
+    clean_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    transformed = Transformer().transform_data(cleaned)
+    transform_seconds = time.perf_counter() - start
+
+    return {
+        'memory': {
+            'movies': schema.memory_usage_mb(movies[list(schema.RAW_MOVIE_SCHEMA)]),
+            'details': schema.memory_usage_mb(details[list(schema.RAW_DETAIL_SCHEMA)]),
+            'cleaned': schema.memory_usage_mb(cleaned),
+            'transformed': schema.memory_usage_mb(transformed),
+        },
+        'rows': len(transformed),
+        'clean_seconds': clean_seconds,
+        'transform_seconds': transform_seconds,
+        'output': transformed,
+    }
+
+
+def run(rows: int):
+
+    movies, details = make_raw_frames(rows)
+    default = run_pipeline(movies, details, compact=False)
+    compact = run_pipeline(movies, details, compact=True)
+
+    # Mismos valores con ambos esquemas; los float32 se comparan con tolerancia
+    expected = default['output']
+    pd.testing.assert_frame_equal(expected, compact['output'].astype(expected.dtypes.to_dict()), rtol=1e-6)
+
+    print(f"filas: {rows} (salida: {compact['rows']})")
+    print(f"{'etapa':<12} {'por defecto (MB)':>17} {'compacto (MB)':>14} {'reducción':>10}")
+    for stage_name, default_mb in default['memory'].items():
+        compact_mb = compact['memory'][stage_name]
+        print(f"{stage_name:<12} {default_mb:>17.1f} {compact_mb:>14.1f} {default_mb / compact_mb:>9.1f}x")
+    print("(movies y details: solo columnas usadas por el ETL; 'genres' de la API conserva listas de diccionarios)")
+    for key in ('clean_seconds', 'transform_seconds'):
+        print(f"{key:<18} por defecto {default[key]:>7.3f}s  compacto {compact[key]:>7.3f}s")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    run(args.rows)
@@ -0,0 +1,50 @@
+"""Throughput de Extractor.extract_movie_details contra un servidor TMDb local.
+
+Uso: python -m benchmarks.bench_extract_concurrency [--movies 512] [--latency 0.05]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+os.environ.setdefault('LOG_FOLDER_DATA', os.path.join(tempfile.gettempdir(), 'finmaq_bench'))
+
+from benchmarks.stub_tmdb_server import StubTMDbServer
+import etl.extractor as extractor_module
+from etl.extractor import Extractor
+
+
+def run(movies: int, latency: float, concurrency_levels, rate_limit: float = None):
+
+    movie_ids = list(range(1, movies + 1))
+    results = []
+
+    for workers in concurrency_levels:
+        with StubTMDbServer(latency=latency, rate_limit=rate_limit) as server:
+            extractor_module.BASE_URL = server.base_url
+            extractor = Extractor(max_workers=workers, use_cache=False)
+
+            start = time.perf_counter()
+            details = extractor.extract_movie_details(movie_ids)
+            elapsed = time.perf_counter() - start
+
+            assert details['id'].tolist() == movie_ids, "El orden de salida no coincide con la entrada"
+            stats = extractor.http.stats()
+            results.append((workers, len(details), elapsed, len(details) / elapsed, server.rate_limited,
+                            stats['connections_opened']))
+
+    print(f"{'in-flight':>10} {'filas':>8} {'segundos':>10} {'req/s':>10} {'429s':>6} {'conexiones':>11}")
+    for workers, rows, elapsed, throughput, limited, opened in results:
+        print(f"{workers:>10} {rows:>8} {elapsed:>10.2f} {throughput:>10.1f} {limited:>6} {opened:>11}")
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--movies', type=int, default=512)
+    parser.add_argument('--latency', type=float, default=0.05)
+    parser.add_argument('--rate-limit', type=float, default=None, help="Solicitudes por segundo antes de responder 429")
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8, 32, 64])
+    args = parser.parse_args()
+
+    run(args.movies, args.latency, args.concurrency, args.rate_limit)
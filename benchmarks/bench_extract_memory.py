@@ -0,0 +1,118 @@
+"""Pico de memoria (RSS) al construir el DataFrame de detalles con respuestas de TMDb grandes.
+
+Compara la construcción anterior, pd.DataFrame sobre las respuestas completas, con la proyección de
+campos del Extractor (project_fields + frame_from_records). Cada variante corre en un proceso propio,
+porque el pico de RSS de un proceso no baja. Antes se comprueba que ambas dan la misma salida de
+CleanerValidator.
+
+Uso: python -m benchmarks.bench_extract_memory [--rows 10000]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+os.environ['DEBUG_SINK_ENABLED'] = 'false'
+
+import pandas as pd
+
+from benchmarks.stub_tmdb_server import build_detail, build_movie
+from utils.clean_data import CleanerValidator
+from utils.instrumentation import _peak_rss_mb
+from utils.schema import (
+    enforce_schema, frame_from_records, project_fields, RAW_DETAIL_FIELDS, RAW_DETAIL_SCHEMA, RAW_MOVIE_SCHEMA
+)
+
+APPEND = ('credits', 'keywords', 'release_dates')
+
+
+def large_detail(movie_id: int) -> dict:
+    # Respuesta de /movie/{id} con los campos que TMDb devuelve y el proceso no usa
+    detail = build_detail(movie_id, APPEND)
+    detail.update({
+        'overview': f"Movie {movie_id}. " + 'Lorem ipsum dolor sit amet, consectetur adipiscing elit. ' * 12,
+        'tagline': f"Tagline of movie {movie_id}",
+        'homepage': f"https://example.com/movies/{movie_id}",
+        'poster_path': f"/poster_{movie_id}.jpg",
+        'backdrop_path': f"/backdrop_{movie_id}.jpg",
+        'production_companies': [{'id': movie_id * 10 + i, 'name': f"Company {movie_id}-{i}",
+                                  'logo_path': f"/logo_{movie_id}_{i}.png", 'origin_country': 'US'} for i in range(8)],
+        'production_countries': [{'iso_3166_1': 'US', 'name': 'United States of America'}],
+        'spoken_languages': [{'iso_639_1': 'en', 'english_name': 'English', 'name': 'English'}],
+    })
+    for i, person in enumerate(detail['credits']['cast'] + detail['credits']['crew']):
+        person.update({'profile_path': f"/profile_{movie_id}_{i}.jpg", 'gender': i % 3,
+                       'known_for_department': 'Acting', 'original_name': person['name'],
+                       'popularity': float(i), 'adult': False})
+    detail['credits']['cast'] += [
+        {'id': movie_id * 100 + i, 'name': f"extra {movie_id}-{i}", 'character': f"character {i}",
+         'credit_id': f"x{movie_id}-{i}", 'order': 5 + i, 'profile_path': f"/profile_x{movie_id}_{i}.jpg",
+         'gender': 0, 'known_for_department': 'Acting', 'original_name': f"extra {movie_id}-{i}", 'popularity': 0.1}
+        for i in range(40)
+    ]
+    return detail
+
+
+def build_details(rows: int, projected: bool) -> pd.DataFrame:
+    # Igual que Extractor.extract_movie_details: las respuestas se acumulan y luego se construye el DataFrame
+    if projected:
+        details = [project_fields(large_detail(movie_id), RAW_DETAIL_FIELDS) for movie_id in range(1, rows + 1)]
+        return frame_from_records(details, RAW_DETAIL_FIELDS, RAW_DETAIL_SCHEMA)
+    details = [large_detail(movie_id) for movie_id in range(1, rows + 1)]
+    return enforce_schema(pd.DataFrame(details), RAW_DETAIL_SCHEMA)
+
+
+def clean(details: pd.DataFrame):
+
+    movies = enforce_schema(pd.DataFrame([build_movie(movie_id) for movie_id in details['id']]), RAW_MOVIE_SCHEMA)
+    cleaner_validator = CleanerValidator()
+    return cleaner_validator.clean_and_validate(movies, details), cleaner_validator.related
+
+
+def measure(rows: int, projected: bool) -> dict:
+
+    baseline = _peak_rss_mb()
+    start = time.perf_counter()
+    details = build_details(rows, projected)
+    seconds = time.perf_counter() - start
+    frame_peak = _peak_rss_mb()
+    clean(details)
+    return {'seconds': seconds, 'frame_peak': frame_peak - baseline, 'clean_peak': _peak_rss_mb() - baseline,
+            'frame_mb': details.memory_usage(deep=True).sum() / 1024 ** 2, 'columns': len(details.columns)}
+
+
+def check_identical(rows: int):
+
+    expected, expected_related = clean(build_details(rows, projected=False))
+    result, related = clean(build_details(rows, projected=True))
+    pd.testing.assert_frame_equal(expected, result, check_exact=True)
+    for table, frame in expected_related.items():
+        pd.testing.assert_frame_equal(frame, related[table], check_exact=True, obj=table)
+
+
+def run(rows: int):
+
+    check_identical(min(rows, 500))
+    print(f"detalles: {rows} respuestas (salida de CleanerValidator idéntica)")
+    print(f"{'variante':<11} {'construcción (s)':>17} {'columnas':>9} {'DataFrame (MB)':>15} "
+          f"{'pico RSS DataFrame (MB)':>24} {'pico RSS + limpieza (MB)':>25}")
+    for variant in ('completa', 'proyectada'):
+        output = subprocess.run([sys.executable, '-m', 'benchmarks.bench_extract_memory', '--rows', str(rows),
+                                 '--child', variant], check=True, capture_output=True, text=True).stdout
+        result = json.loads(output.splitlines()[-1])
+        print(f"{variant:<11} {result['seconds']:>17.3f} {result['columns']:>9} {result['frame_mb']:>15.1f} "
+              f"{result['frame_peak']:>24.1f} {result['clean_peak']:>25.1f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=10_000)
+    parser.add_argument('--child', choices=['completa', 'proyectada'], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure(args.rows, projected=args.child == 'proyectada')))
+    else:
+        run(args.rows)
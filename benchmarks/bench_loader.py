@@ -0,0 +1,44 @@
+"""Filas por segundo de Loader.load_to_postgres en modo 'batch' frente a 'copy'.
+
+Vacía la tabla 'movies' antes de cada medición: ejecútelo contra una base de datos
+de pruebas (DB_NAME, DB_HOST, ...), nunca contra la de producción.
+
+Uso: python -m benchmarks.bench_loader [--rows 10000 100000 1000000] [--modes batch copy]
+"""
+import argparse
+import time
+
+from benchmarks.synthetic_data import make_transformed_frame
+from database.database_manager import DatabaseManager
+from etl.loader import Loader, LOAD_MODES
+
+
+def run(sizes, modes):
+
+    loader = Loader()
+    results = []
+
+    for rows in sizes:
+        df = make_transformed_frame(rows)
+        for mode in modes:
+            loader.ensure_schema()
+            db_manager = DatabaseManager()
+            db_manager.execute_query("TRUNCATE movies;")
+            db_manager.close()
+
+            start = time.perf_counter()
+            loader.load_to_postgres(df, mode=mode)
+            elapsed = time.perf_counter() - start
+            results.append((rows, mode, elapsed, rows / elapsed))
+            print(f"{rows:>10} {mode:>6} {elapsed:>10.2f}s {rows / elapsed:>12.0f} filas/s", flush=True)
+
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--modes', nargs='+', choices=LOAD_MODES, default=list(LOAD_MODES))
+    args = parser.parse_args()
+
+    run(args.rows, args.modes)
@@ -0,0 +1,123 @@
+"""Limpieza y transformación en serie frente a ParallelCleanTransform con 1, 2, 4 y 8 procesos.
+
+Comprueba además que la salida paralela (tabla de películas y tablas relacionadas) es idéntica a la
+secuencial: mismos valores, tipos, categorías y orden de filas.
+
+Además del tiempo medido, desglosa cada ejecución paralela: arranque de los procesos, partición,
+serialización de cada partición y de su resultado (pickle), trabajo por partición y unión final. La
+estimación suma el arranque, la partición, la más lenta de las particiones y la unión, que es el
+tiempo con un núcleo libre por proceso; con menos CPU que procesos, el tiempo medido es mayor.
+
+Uso: python -m benchmarks.bench_parallel [--rows 1000000] [--workers 1 2 4 8]
+"""
+import argparse
+import os
+import pickle
+import subprocess
+import sys
+import time
+
+os.environ['DEBUG_SINK_ENABLED'] = 'false'
+
+import pandas as pd
+
+from benchmarks.synthetic_data import make_raw_frames
+from etl.parallel import clean_transform_partition, ParallelCleanTransform, partition_by_movie_id
+from etl.transformer import Transformer
+from utils.clean_data import CleanerValidator
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def assert_identical(expected: pd.DataFrame, expected_related: dict, result: pd.DataFrame, related: dict):
+
+    pd.testing.assert_frame_equal(expected, result, check_exact=True)
+    assert expected_related.keys() == related.keys(), (list(expected_related), list(related))
+    for table, frame in expected_related.items():
+        pd.testing.assert_frame_equal(frame, related[table], check_exact=True, obj=table)
+
+
+def pool_startup_seconds(count: int) -> float:
+    # Arranque en frío, como en cada ejecución del ETL: un intérprete nuevo levanta el servidor de procesos
+    # con la precarga de etl.parallel y un proceso por partición
+    code = (
+        "import time\n"
+        "from etl.parallel import ParallelCleanTransform\n"
+        "start = time.perf_counter()\n"
+        f"with ParallelCleanTransform(workers={count}, min_rows=0)._pool({count}) as executor:\n"
+        f"    list(executor.map(abs, range({count})))\n"
+        "print(time.perf_counter() - start)\n"
+    )
+    output = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True, check=True)
+    return float(output.stdout.split()[-1])
+
+
+def breakdown(movies: pd.DataFrame, details: pd.DataFrame, count: int, startup: float) -> dict:
+    # Cada fase medida por separado en este proceso, sin competir por la CPU con otras particiones
+    start = time.perf_counter()
+    partitions = partition_by_movie_id(movies, details, count)
+    partition_seconds = time.perf_counter() - start
+
+    transfers, works, results = [], [], []
+    for partition in partitions:
+        start = time.perf_counter()
+        partition = pickle.loads(pickle.dumps(partition, protocol=pickle.HIGHEST_PROTOCOL))
+        transfer = time.perf_counter() - start
+        start = time.perf_counter()
+        result = clean_transform_partition(*partition)
+        works.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        results.append(pickle.loads(pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)))
+        transfers.append(transfer + time.perf_counter() - start)
+
+    start = time.perf_counter()
+    ParallelCleanTransform(workers=count, min_rows=0)._merge(results, movies, details)
+    merge = time.perf_counter() - start
+
+    slowest = max(range(count), key=lambda index: transfers[index] + works[index])
+    return {
+        'startup': startup, 'partition': partition_seconds, 'transfer': transfers[slowest],
+        'work': works[slowest], 'merge': merge,
+        'estimate': startup + partition_seconds + transfers[slowest] + works[slowest] + merge,
+    }
+
+
+def run(rows: int, workers: list):
+
+    movies, details = make_raw_frames(rows, subresources=True)
+    # Los detalles en otro orden que las películas: la salida paralela debe reproducir ambos órdenes
+    details = details.sample(frac=1, random_state=0).reset_index(drop=True)
+
+    start = time.perf_counter()
+    cleaner_validator = CleanerValidator()
+    expected = Transformer().transform_data(cleaner_validator.clean_and_validate(movies, details))
+    serial_seconds = time.perf_counter() - start
+
+    startups = {count: pool_startup_seconds(count) for count in workers}
+
+    print(f"filas: {len(movies)} películas + {len(details)} detalles (salida: {len(expected)}), "
+          f"CPU disponibles: {os.cpu_count()}")
+    print(f"{'procesos':<9} {'tiempo (s)':>10} {'aceleración':>12}  {'arranque':>8} {'partición':>9} "
+          f"{'pickle':>7} {'trabajo':>8} {'unión':>6} {'estimado':>9} {'acel. est.':>10}  salida")
+    print(f"{'serie':<9} {serial_seconds:>10.3f} {1:>11.2f}x  {'':>8} {'':>9} {'':>7} {serial_seconds:>8.3f} "
+          f"{'':>6} {serial_seconds:>9.3f} {1:>9.2f}x  referencia")
+
+    for count in workers:
+        parallel = ParallelCleanTransform(workers=count, min_rows=0)
+        start = time.perf_counter()
+        result = parallel.run(movies, details)
+        seconds = time.perf_counter() - start
+        assert_identical(expected, cleaner_validator.related, result, parallel.related)
+        phases = breakdown(movies, details, count, startups[count])
+        print(f"{count:<9} {seconds:>10.3f} {serial_seconds / seconds:>11.2f}x  {phases['startup']:>8.3f} "
+              f"{phases['partition']:>9.3f} {phases['transfer']:>7.3f} {phases['work']:>8.3f} {phases['merge']:>6.3f} "
+              f"{phases['estimate']:>9.3f} {serial_seconds / phases['estimate']:>9.2f}x  idéntica")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    run(args.rows, args.workers)
@@ -0,0 +1,54 @@
+"""Arranque en frío de cada subcomando de main.py frente a importar todos los módulos del proceso completo.
+
+Cada medición es un intérprete nuevo que importa main.py y los módulos de etapa del subcomando; se
+informa la mediana de varias repeticiones. La columna de importaciones es la suma medida por main.py.
+
+Uso: python -m benchmarks.bench_startup [--repeat 7]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCRIPT = """
+import json, sys
+import main
+main.load_modules(main.ALL_MODULES if sys.argv[1] == 'all' else main.COMMAND_MODULES[sys.argv[1]])
+print(json.dumps(main.run_instrumentation.import_times()))
+"""
+
+
+def cold_start(target: str) -> tuple:
+
+    start = time.perf_counter()
+    output = subprocess.run([sys.executable, '-c', SCRIPT, target], cwd=ROOT, check=True,
+                            capture_output=True, text=True).stdout
+    return time.perf_counter() - start, sum(json.loads(output.splitlines()[-1]).values())
+
+
+def run(repeat: int):
+
+    import main
+
+    print(f"{'subcomando':<12} {'arranque (s)':>13} {'importaciones (s)':>18} {'vs. completo':>13}")
+    results = {}
+    for target in ['all'] + list(main.COMMAND_MODULES):
+        samples = [cold_start(target) for _ in range(repeat)]
+        results[target] = (statistics.median(wall for wall, _ in samples),
+                           statistics.median(imports for _, imports in samples))
+        wall, imports = results[target]
+        print(f"{target:<12} {wall:>13.3f} {imports:>18.3f} {wall / results['all'][0]:>12.0%}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=7)
+    args = parser.parse_args()
+
+    sys.path.insert(0, ROOT)
+    run(args.repeat)
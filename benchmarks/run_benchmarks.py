@@ -0,0 +1,156 @@
+"""Suite reproducible de rendimiento del ETL sin TMDb ni PostgreSQL reales.
+
+Mide Extractor (contra el servidor TMDb local), CleanerValidator, Transformer y, con --with-db,
+Loader, por separado y de extremo a extremo. Guarda los resultados en JSON y, si se indica
+--baseline, los compara y termina con código 1 ante regresiones mayores que --max-regression.
+
+Uso: python -m benchmarks.run_benchmarks [--rows 100000] [--movies 400]
+     [--output benchmarks/results/latest.json] [--baseline benchmarks/results/baseline.json]
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+# Los volcados de depuración y la caché HTTP distorsionan las mediciones; se activan con flags
+os.environ.setdefault('LOG_FOLDER_DATA', os.path.join(tempfile.gettempdir(), 'finmaq_bench'))
+if '--with-debug-dumps' not in sys.argv:
+    os.environ['DEBUG_SINK_ENABLED'] = 'false'
+os.environ['HTTP_CACHE_ENABLED'] = 'false'
+
+import pandas as pd
+
+from benchmarks.stub_tmdb_server import StubTMDbServer, PAGE_SIZE
+from benchmarks.synthetic_data import make_raw_frames
+import etl.extractor as extractor_module
+from etl.extractor import Extractor
+from etl.loader import Loader, LOAD_MODE
+from etl.transformer import Transformer
+from utils.clean_data import CleanerValidator
+
+DEFAULT_OUTPUT = os.path.join('benchmarks', 'results', 'latest.json')
+
+
+def timed(func, repeat: int):
+    # Mejor tiempo de varias repeticiones para reducir el ruido
+    best, result = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def record(results: dict, name: str, seconds: float, rows: int):
+
+    results[name] = {
+        'seconds': round(seconds, 4),
+        'rows': rows,
+        'rows_per_second': round(rows / seconds, 1) if seconds else None,
+    }
+    print(f"{name:<22} {seconds:>10.3f}s {rows:>12} filas {results[name]['rows_per_second'] or 0:>14.1f} filas/s",
+          flush=True)
+
+
+def run(args) -> dict:
+
+    results = {}
+    pages = range(1, max(1, args.movies // PAGE_SIZE) + 1)
+
+    with StubTMDbServer(latency=args.latency, error_rate=args.error_rate, fixtures_dir=args.fixtures) as server:
+        extractor_module.BASE_URL = server.base_url
+        extractor = Extractor(use_cache=False)
+
+        seconds, api_movies = timed(lambda: extractor.extract_movies(pages, lists=args.lists), args.repeat)
+        record(results, 'extract_movies', seconds, len(api_movies))
+        seconds, api_details = timed(lambda: extractor.extract_movie_details(api_movies['id']), args.repeat)
+        record(results, 'extract_details', seconds, len(api_details))
+
+        def end_to_end():
+            movies = extractor.extract_movies(pages, lists=args.lists)
+            details = extractor.extract_movie_details(movies['id'])
+            data = Transformer().transform_data(CleanerValidator().clean_and_validate(movies, details))
+            if args.with_db:
+                Loader().load_to_postgres(data, mode=args.load_mode)
+            return data
+
+        seconds, data = timed(end_to_end, args.repeat)
+        record(results, 'end_to_end', seconds, len(data))
+
+    movies, details = make_raw_frames(args.rows)
+    cleaner_validator = CleanerValidator()
+    transformer = Transformer()
+
+    seconds, cleaned = timed(lambda: cleaner_validator.clean_and_validate(movies, details), args.repeat)
+    record(results, 'clean_and_validate', seconds, len(movies) + len(details))
+    seconds, transformed = timed(lambda: transformer.transform_data(cleaned), args.repeat)
+    record(results, 'transform_data', seconds, len(cleaned))
+
+    if args.with_db:
+        loader = Loader()
+        seconds, _ = timed(lambda: loader.load_to_postgres(transformed, mode=args.load_mode), args.repeat)
+        record(results, f"load_{args.load_mode}", seconds, len(transformed))
+
+    return results
+
+
+def compare(current: dict, baseline: dict, max_regression: float) -> list:
+
+    regressions = []
+    print(f"\n{'benchmark':<22} {'base (s)':>10} {'actual (s)':>11} {'cambio':>9}")
+    for name, entry in current['benchmarks'].items():
+        base = baseline.get('benchmarks', {}).get(name)
+        if not base or not base['seconds']:
+            continue
+        change = entry['seconds'] / base['seconds'] - 1
+        flag = ' REGRESIÓN' if change > max_regression else ''
+        print(f"{name:<22} {base['seconds']:>10.3f} {entry['seconds']:>11.3f} {change:>+8.1%}{flag}")
+        if flag:
+            regressions.append(name)
+    return regressions
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=100_000, help="Filas sintéticas para limpieza, transformación y carga")
+    parser.add_argument('--movies', type=int, default=400, help="Películas a extraer del servidor local por lista")
+    parser.add_argument('--lists', nargs='+', default=['popular'], help="Listas de TMDb a extraer")
+    parser.add_argument('--latency', type=float, default=0.01)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--fixtures', default=None, help="Directorio con respuestas grabadas de TMDb")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--with-db', action='store_true', help="Incluye la carga en PostgreSQL (DB_NAME de pruebas)")
+    parser.add_argument('--with-debug-dumps', action='store_true', help="Mantiene los volcados de depuración")
+    parser.add_argument('--load-mode', default=LOAD_MODE)
+    parser.add_argument('--output', default=DEFAULT_OUTPUT)
+    parser.add_argument('--baseline', default=None)
+    parser.add_argument('--max-regression', type=float, default=0.25)
+    args = parser.parse_args()
+
+    report = {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'environment': {
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'platform': platform.platform(),
+        },
+        'parameters': {key: value for key, value in vars(args).items() if key not in ('output', 'baseline')},
+        'benchmarks': run(args),
+    }
+
+    os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResultados guardados en {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            regressions = compare(report, json.load(f), args.max_regression)
+        if regressions:
+            print(f"Regresiones detectadas: {', '.join(regressions)}")
+            sys.exit(1)
@@ -0,0 +1,288 @@
+"""Servidor TMDb local para pruebas de rendimiento sin clave de API.
+
+Sirve las listas /movie/{popular,top_rated,now_playing,upcoming} y /movie/{id} a partir de respuestas
+grabadas (--fixtures) o generadas,
+con latencia, tasa de errores 5xx y límite de solicitudes configurables.
+
+Uso: python -m benchmarks.stub_tmdb_server [--port 8000] [--latency 0.05] [--error-rate 0.01]
+     python -m benchmarks.stub_tmdb_server --record DIR --pages 10   (graba respuestas reales de TMDb)
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+PAGE_SIZE = 20
+
+# Desplazamiento de IDs y número máximo de páginas por lista: popular y top_rated se solapan a medias,
+# como ocurre con las listas reales de TMDb
+MOVIE_LISTS = {
+    'popular': (0, None),
+    'top_rated': (PAGE_SIZE // 2, None),
+    'now_playing': (100_000, 5),
+    'upcoming': (100_000 + PAGE_SIZE // 2, 5),
+}
+
+
+def build_movie(movie_id: int) -> dict:
+
+    return {
+        'id': movie_id,
+        'title': f"movie {movie_id}",
+        'release_date': f"{1980 + movie_id % 40}-01-01",
+        'vote_average': round((movie_id % 100) / 10, 1),
+        'vote_count': 100 + movie_id % 5000,
+        'popularity': float(movie_id % 1000),
+    }
+
+
+def build_detail(movie_id: int, append=()) -> dict:
+
+    detail = {
+        'id': movie_id,
+        'genres': [{'id': 28, 'name': 'Action'}, {'id': 18, 'name': 'Drama'}],
+        'runtime': 90 + movie_id % 60,
+        'budget': (movie_id % 7) * 1_000_000,
+        'revenue': (movie_id % 11) * 1_500_000,
+    }
+    # Subrecursos de append_to_response con la misma forma que los de TMDb
+    if 'credits' in append:
+        detail['credits'] = {
+            'cast': [{'id': movie_id * 10 + i, 'name': f"actor {i}", 'character': f"character {i}",
+                      'credit_id': f"c{movie_id}-{i}", 'order': i} for i in range(5)],
+            'crew': [{'id': movie_id * 10 + 5 + i, 'name': f"crew {i}", 'department': department, 'job': job,
+                      'credit_id': f"w{movie_id}-{i}"}
+                     for i, (department, job) in enumerate([('Directing', 'Director'), ('Writing', 'Screenplay')])],
+        }
+    if 'keywords' in append:
+        detail['keywords'] = {'keywords': [{'id': 1000 + movie_id % 50, 'name': f"keyword {movie_id % 50}"},
+                                           {'id': 2000 + movie_id % 7, 'name': f"theme {movie_id % 7}"}]}
+    if 'release_dates' in append:
+        detail['release_dates'] = {'results': [
+            {'iso_3166_1': country, 'release_dates': [
+                {'certification': 'PG-13', 'iso_639_1': '', 'note': '', 'type': 3,
+                 'release_date': f"{1980 + movie_id % 40}-01-01T00:00:00.000Z"},
+                {'certification': '', 'iso_639_1': '', 'note': '', 'type': 4,
+                 'release_date': f"{1980 + movie_id % 40}-06-01T00:00:00.000Z"},
+            ]} for country in ('US', 'ES')
+        ]}
+    return detail
+
+
+class FixtureStore:
+    """Respuestas grabadas en disco: {lista}_page_{n}.json y movie_{id}.json."""
+
+    def __init__(self, directory: str = None):
+
+        self.directory = directory
+        self._cache = {}
+
+    def _load(self, filename: str):
+
+        if not self.directory:
+            return None
+        if filename not in self._cache:
+            path = os.path.join(self.directory, filename)
+            self._cache[filename] = None
+            if os.path.exists(path):
+                with open(path, encoding='utf-8') as f:
+                    self._cache[filename] = json.load(f)
+        return self._cache[filename]
+
+    def list_page(self, list_name: str, page: int, total_pages: int) -> dict:
+
+        payload = self._load(f"{list_name}_page_{page}.json")
+        if payload is not None:
+            return payload
+        offset, max_pages = MOVIE_LISTS[list_name]
+        total_pages = min(total_pages, max_pages or total_pages)
+        results = [build_movie(offset + (page - 1) * PAGE_SIZE + i + 1) for i in range(PAGE_SIZE)] \
+            if page <= total_pages else []
+        return {'page': page, 'results': results, 'total_pages': total_pages}
+
+    def movie(self, movie_id: int, append=()) -> dict:
+
+        payload = self._load(f"movie_{movie_id}.json")
+        return payload if payload is not None else build_detail(movie_id, append)
+
+
+class StubTMDbServer:
+    """Servidor HTTP local que imita los endpoints de TMDb usados por el Extractor."""
+
+    def __init__(self, latency: float = 0.02, rate_limit: float = None, error_rate: float = 0.0,
+                 fixtures_dir: str = None, total_pages: int = 500, host: str = '127.0.0.1', port: int = 0,
+                 seed: int = 0):
+
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.error_rate = error_rate
+        self.total_pages = total_pages
+        self.fixtures = FixtureStore(fixtures_dir)
+        self.requests_served = 0
+        self.rate_limited = 0
+        self.errors = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._window_start = time.monotonic()
+        self._window_count = 0
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _over_limit(self) -> bool:
+        # Ventana fija de un segundo, suficiente para provocar 429 en las pruebas
+        if not self.rate_limit:
+            return False
+        with self._lock:
+            now = time.monotonic()
+            if now - self._window_start >= 1.0:
+                self._window_start = now
+                self._window_count = 0
+            self._window_count += 1
+            if self._window_count > self.rate_limit:
+                self.rate_limited += 1
+                return True
+            return False
+
+    def _should_fail(self) -> bool:
+
+        with self._lock:
+            if self.error_rate and self._random.random() < self.error_rate:
+                self.errors += 1
+                return True
+            self.requests_served += 1
+            return False
+
+    def _handler_class(self):
+
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status, payload, headers=None):
+                body = json.dumps(payload).encode()
+                etag = f'"{hashlib.md5(body).hexdigest()}"'
+                if status == 200 and self.headers.get('If-None-Match') == etag:
+                    status, body = 304, b''
+                self.send_response(status)
+                if status in (200, 304):
+                    self.send_header('ETag', etag)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                if body:
+                    self.wfile.write(body)
+
+            def do_GET(self):
+                if stub._over_limit():
+                    self._send(429, {'status_message': 'rate limited'}, {'Retry-After': '1'})
+                    return
+
+                time.sleep(stub.latency)
+                if stub._should_fail():
+                    self._send(503, {'status_message': 'service unavailable'})
+                    return
+
+                parsed = urlparse(self.path)
+                query = parse_qs(parsed.query)
+
+                match = re.fullmatch(r'/movie/(\w+)', parsed.path)
+                if match and match.group(1) in MOVIE_LISTS:
+                    page = int(query.get('page', ['1'])[0])
+                    self._send(200, stub.fixtures.list_page(match.group(1), page, stub.total_pages))
+                    return
+
+                match = re.fullmatch(r'/movie/(\d+)', parsed.path)
+                if match:
+                    append = query.get('append_to_response', [''])[0].split(',')
+                    self._send(200, stub.fixtures.movie(int(match.group(1)), append))
+                    return
+
+                self._send(404, {'status_message': 'not found'})
+
+        return Handler
+
+    def start(self):
+
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+
+def record_fixtures(directory: str, pages: int, lists=tuple(MOVIE_LISTS)):
+    # Graba respuestas reales de TMDb (requiere API_KEY) en el formato que lee FixtureStore
+    from etl.extractor import Extractor
+
+    os.makedirs(directory, exist_ok=True)
+    extractor = Extractor(use_cache=False)
+    movie_ids = []
+    for list_name in lists:
+        for page in range(1, pages + 1):
+            payload = extractor.fetch_data(f"/movie/{list_name}", params={'page': page})
+            if not payload:
+                continue
+            with open(os.path.join(directory, f"{list_name}_page_{page}.json"), 'w', encoding='utf-8') as f:
+                json.dump(payload, f)
+            movie_ids.extend(movie['id'] for movie in payload.get('results', []))
+    movie_ids = list(dict.fromkeys(movie_ids))
+
+    append = {'append_to_response': ','.join(extractor.detail_append)} if extractor.detail_append else {}
+    for movie_id in movie_ids:
+        payload = extractor.fetch_data(f"/movie/{movie_id}", params=dict(append))
+        if payload:
+            with open(os.path.join(directory, f"movie_{movie_id}.json"), 'w', encoding='utf-8') as f:
+                json.dump(payload, f)
+    print(f"Respuestas grabadas en {directory}: {pages} páginas por lista, {len(movie_ids)} películas.")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--latency', type=float, default=0.05)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--rate-limit', type=float, default=None)
+    parser.add_argument('--fixtures', default=None, help="Directorio con respuestas grabadas")
+    parser.add_argument('--record', default=None, help="Graba respuestas reales de TMDb en este directorio")
+    parser.add_argument('--pages', type=int, default=10)
+    args = parser.parse_args()
+
+    if args.record:
+        record_fixtures(args.record, args.pages)
+    else:
+        server = StubTMDbServer(latency=args.latency, rate_limit=args.rate_limit, error_rate=args.error_rate,
+                                fixtures_dir=args.fixtures, port=args.port)
+        print(f"Servidor TMDb local en {server.base_url} (Ctrl+C para detener).")
+        try:
+            server.start()._thread.join()
+        except KeyboardInterrupt:
+            server.stop()
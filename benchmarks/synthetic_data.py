@@ -0,0 +1,124 @@
+import numpy as np
+import pandas as pd
+
+GENRES = ['Action', 'Drama', 'Comedy', 'Thriller', 'Horror', 'Romance', 'Animation', 'Documentary']
+
+
+def make_transformed_frame(rows: int, seed: int = 42) -> pd.DataFrame:
+    """Genera un DataFrame con el esquema de salida de Transformer.transform_data."""
+
+    rng = np.random.default_rng(seed)
+    budget = rng.integers(0, 200_000_000, rows) * (rng.random(rows) > 0.3)
+    revenue = rng.integers(0, 800_000_000, rows) * (rng.random(rows) > 0.2)
+    rating = np.round(rng.uniform(0, 10, rows), 1)
+
+    df = pd.DataFrame({
+        'movie_id': np.arange(1, rows + 1),
+        'title': pd.Series(np.arange(1, rows + 1)).map(lambda i: f"Movie {i}"),
+        'release_date': pd.Timestamp('1950-01-01') + pd.to_timedelta(rng.integers(0, 27000, rows), unit='D'),
+        'rating': rating,
+        'vote_count': rng.integers(50, 30000, rows),
+        'popularity_score': np.round(rng.uniform(0, 5000, rows), 3),
+        'genres': rng.choice(GENRES, rows),
+        'duration_minutes': rng.integers(60, 200, rows),
+        'budget_usd': budget,
+        'revenue_usd': revenue,
+    })
+    df['profit_margin'] = np.where(budget == 0, np.nan, (revenue - budget) / np.where(budget == 0, 1, budget))
+    df['rating_category'] = pd.cut(
+        df['rating'],
+        bins=[-float('inf'), 0.4, 6.0, 8.0, float('inf')],
+        labels=['Malo', 'Promedio', 'Bueno', 'Excelente']
+    )
+    return df
+
+
+def make_cleaned_frame(rows: int, seed: int = 42) -> pd.DataFrame:
+    """Genera un DataFrame con el esquema de salida de CleanerValidator.clean_and_validate."""
+
+    transformed = make_transformed_frame(rows, seed=seed)
+    return transformed.drop(columns=['profit_margin', 'rating_category']).rename(columns={
+        'movie_id': 'id',
+        'rating': 'vote_average',
+        'popularity_score': 'popularity',
+        'duration_minutes': 'runtime',
+        'budget_usd': 'budget',
+        'revenue_usd': 'revenue'
+    })
+
+
+def make_subresource_pool(size: int = 16) -> list:
+    # Respuestas de append_to_response (credits, keywords, release_dates) reutilizadas entre filas
+    pool = []
+    for i in range(size):
+        pool.append({
+            'credits': {
+                'cast': [{'credit_id': f"cast-{i}-{order}", 'id': 1000 * i + order, 'name': f"Actor {i}-{order}",
+                          'character': f"Character {order}", 'order': order} for order in range(i % 4 + 1)],
+                'crew': [{'credit_id': f"crew-{i}-{n}", 'id': 5000 + 1000 * i + n, 'name': f"Crew {i}-{n}",
+                          'department': ('Directing', 'Writing')[n % 2], 'job': ('Director', 'Screenplay')[n % 2]}
+                         for n in range(i % 3)],
+            },
+            'keywords': {'keywords': [{'id': 100 + (i + n) % 20, 'name': f"keyword {(i + n) % 20}"} for n in range(i % 3)]},
+            'release_dates': {'results': [
+                {'iso_3166_1': country, 'release_dates': [
+                    {'type': 3, 'release_date': f"20{10 + i % 10}-0{1 + i % 9}-15T00:00:00.000Z",
+                     'certification': ('', 'PG-13', 'R')[i % 3]},
+                ]} for country in ('US', 'ES')[:i % 2 + 1]
+            ]},
+        })
+    return pool
+
+
+def make_raw_frames(rows: int, seed: int = 42, duplicate_fraction: float = 0.01, invalid_fraction: float = 0.02,
+                    subresources: bool = False):
+    """Genera los DataFrames 'movies' y 'details' con la forma de las respuestas de TMDb.
+
+    Incluye duplicados, fechas inválidas o futuras, pocos votos y presupuestos faltantes para
+    ejercitar todas las reglas de CleanerValidator. Las listas de géneros se comparten entre filas
+    para que generar 10^7 filas no dispare la memoria. Con subresources=True los detalles incluyen
+    también credits, keywords y release_dates.
+    """
+
+    rng = np.random.default_rng(seed)
+    ids = np.arange(1, rows + 1)
+    duplicates = rng.choice(ids, int(rows * duplicate_fraction))
+    movie_ids = np.concatenate([ids, duplicates])
+    n = len(movie_ids)
+
+    dates = (pd.Timestamp('1950-01-01') + pd.to_timedelta(rng.integers(0, 27000, n), unit='D')).strftime('%Y-%m-%d')
+    dates = np.asarray(dates, dtype=object)
+    invalid = rng.random(n) < invalid_fraction
+    dates[invalid] = rng.choice(['', 'not-a-date', '2099-01-01'], int(invalid.sum()))
+
+    movies = pd.DataFrame({
+        'id': movie_ids,
+        'title': pd.Series(movie_ids).map(lambda i: f"movie {i}").to_numpy(),
+        'release_date': dates,
+        'vote_average': np.round(rng.uniform(0, 10, n), 1),
+        'vote_count': rng.integers(0, 30000, n),
+        'popularity': np.round(rng.uniform(0, 5000, n), 3),
+        'original_language': 'en',
+        'adult': False,
+    })
+
+    genre_pool = [
+        [{'id': GENRES.index(name) + 1, 'name': name} for name in combo]
+        for combo in ([], [GENRES[0]], [GENRES[1]], GENRES[:2], GENRES[2:5], GENRES[5:])
+    ]
+    budget = rng.integers(0, 200_000_000, n).astype('float64')
+    budget[rng.random(n) < invalid_fraction] = np.nan
+    details = pd.DataFrame({
+        'id': movie_ids,
+        'genres': [genre_pool[i] for i in rng.integers(0, len(genre_pool), n)],
+        'runtime': rng.integers(60, 200, n),
+        'budget': budget,
+        'revenue': rng.integers(0, 800_000_000, n),
+        'overview': 'Lorem ipsum dolor sit amet',
+    })
+    if subresources:
+        pool = make_subresource_pool()
+        choices = rng.integers(0, len(pool), n)
+        for column in ('credits', 'keywords', 'release_dates'):
+            details[column] = [pool[i][column] for i in choices]
+    return movies, details
@@ -0,0 +1,92 @@
+import threading
+import time
+
+import psycopg2
+from psycopg2.pool import ThreadedConnectionPool
+
+
+class ConnectionPool:
+    """Pool de conexiones compartido por el proceso con espera acotada, health check y expiración por inactividad."""
+
+    def __init__(self, db_config: dict, min_size: int = 1, max_size: int = 10,
+                 idle_timeout: float = 300.0, checkout_timeout: float = 30.0):
+
+        self.idle_timeout = idle_timeout
+        self.checkout_timeout = checkout_timeout
+        self._pool = ThreadedConnectionPool(min_size, max_size, **db_config)
+        # ThreadedConnectionPool falla al agotarse; el semáforo hace que los hilos esperen turno
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._lock = threading.Lock()
+        self._returned_at = {}
+        self._stats = {'checkouts': 0, 'wait_seconds': 0.0, 'max_wait_seconds': 0.0, 'discarded': 0}
+
+    def getconn(self):
+
+        start = time.monotonic()
+        if not self._slots.acquire(timeout=self.checkout_timeout):
+            raise psycopg2.pool.PoolError(
+                f"No hay conexiones disponibles tras esperar {self.checkout_timeout}s.")
+        waited = time.monotonic() - start
+
+        try:
+            connection = self._healthy_connection()
+        except Exception:
+            self._slots.release()
+            raise
+
+        with self._lock:
+            self._stats['checkouts'] += 1
+            self._stats['wait_seconds'] += waited
+            self._stats['max_wait_seconds'] = max(self._stats['max_wait_seconds'], waited)
+        return connection
+
+    def _healthy_connection(self):
+
+        while True:
+            connection = self._pool.getconn()
+            with self._lock:
+                returned_at = self._returned_at.pop(id(connection), None)
+
+            expired = returned_at is not None and time.monotonic() - returned_at > self.idle_timeout
+            if not expired and self._is_alive(connection):
+                return connection
+
+            # Conexión caída o inactiva demasiado tiempo: se descarta y se pide otra
+            with self._lock:
+                self._stats['discarded'] += 1
+            self._pool.putconn(connection, close=True)
+
+    @staticmethod
+    def _is_alive(connection) -> bool:
+
+        if connection.closed:
+            return False
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            connection.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def putconn(self, connection, close: bool = False):
+
+        try:
+            if not close and not connection.closed:
+                with self._lock:
+                    self._returned_at[id(connection)] = time.monotonic()
+            self._pool.putconn(connection, close=close or bool(connection.closed))
+        finally:
+            self._slots.release()
+
+    def stats(self) -> dict:
+
+        with self._lock:
+            stats = dict(self._stats)
+        stats['wait_seconds'] = round(stats['wait_seconds'], 4)
+        stats['max_wait_seconds'] = round(stats['max_wait_seconds'], 4)
+        return stats
+
+    def closeall(self):
+
+        self._pool.closeall()
@@ -1,32 +1,67 @@
-import os
+import atexit
+import threading
 import psycopg2
 from contextlib import contextmanager
-from dotenv import load_dotenv
 
+from database.connection_pool import ConnectionPool
 from utils.logger_manager import LoggerManager
+from utils.settings import settings
 
-load_dotenv()
+POOL_ENABLED = settings.get_bool('DB_POOL_ENABLED', True)
+POOL_MIN_SIZE = settings.get_int('DB_POOL_MIN_SIZE', 1)
+POOL_MAX_SIZE = settings.get_int('DB_POOL_MAX_SIZE', 10)
+POOL_IDLE_TIMEOUT = settings.get_float('DB_POOL_IDLE_TIMEOUT', 300)
+POOL_CHECKOUT_TIMEOUT = settings.get_float('DB_POOL_CHECKOUT_TIMEOUT', 30)
 
 
 class DatabaseManager:
-    def __init__(self,  script_name: str = __file__):
+    _pool = None
+    _pool_lock = threading.Lock()
+
+    def __init__(self,  script_name: str = __file__, use_pool: bool = POOL_ENABLED):
 
         self.db_config = {
-            'dbname': os.getenv('DB_NAME', 'postgres'),
-            'user': os.getenv('DB_USER', 'postgres'),
-            'password': os.getenv('DB_PASSWORD', 'password'),
-            'host': os.getenv('DB_HOST', 'localhost'),
-            'port': int(os.getenv('DB_PORT', 5432))
+            'dbname': settings.get('DB_NAME', 'postgres'),
+            'user': settings.get('DB_USER', 'postgres'),
+            'password': settings.get('DB_PASSWORD', 'password'),
+            'host': settings.get('DB_HOST', 'localhost'),
+            'port': settings.get_int('DB_PORT', 5432)
         }
         self.connection = None
+        self.use_pool = use_pool
+        self._in_transaction = False
 
         self.logger = LoggerManager(script_name=script_name).get_logger()
 
+    @classmethod
+    def get_pool(cls, db_config: dict) -> ConnectionPool:
+
+        with cls._pool_lock:
+            if cls._pool is None:
+                cls._pool = ConnectionPool(
+                    db_config, min_size=POOL_MIN_SIZE, max_size=POOL_MAX_SIZE,
+                    idle_timeout=POOL_IDLE_TIMEOUT, checkout_timeout=POOL_CHECKOUT_TIMEOUT
+                )
+                atexit.register(cls.close_pool)
+            return cls._pool
+
+    @classmethod
+    def close_pool(cls):
+
+        with cls._pool_lock:
+            if cls._pool is not None:
+                cls._pool.closeall()
+                cls._pool = None
+
     def connect(self):
 
         try:
-            self.connection = psycopg2.connect(**self.db_config)
-            self.logger.info("Conexión a la base de datos exitosa.")
+            if self.use_pool:
+                self.connection = self.get_pool(self.db_config).getconn()
+                self.logger.info("Conexión obtenida del pool de la base de datos.")
+            else:
+                self.connection = psycopg2.connect(**self.db_config)
+                self.logger.info("Conexión a la base de datos exitosa.")
         except psycopg2.Error as e:
             self.logger.error(f"Error al conectar con la base de datos: {e}", exc_info=True)
             raise
@@ -34,8 +69,38 @@ class DatabaseManager:
     def close(self):
 
         if self.connection:
-            self.connection.close()
-            self.logger.info("Conexión a la base de datos cerrada.")
+            if self.use_pool:
+                pool = self.get_pool(self.db_config)
+                pool.putconn(self.connection)
+                stats = pool.stats()
+                self.logger.info(
+                    f"Conexión devuelta al pool. Checkouts: {stats['checkouts']}, "
+                    f"espera total: {stats['wait_seconds']}s, espera máxima: {stats['max_wait_seconds']}s, "
+                    f"descartadas: {stats['discarded']}.")
+            else:
+                self.connection.close()
+                self.logger.info("Conexión a la base de datos cerrada.")
+            self.connection = None
+
+    @contextmanager
+    def transaction(self):
+        # Agrupa varias sentencias en una sola transacción; los cursores internos no hacen commit
+        if self._in_transaction:
+            yield self
+            return
+
+        if not self.connection:
+            self.connect()
+        self._in_transaction = True
+        try:
+            yield self
+            self.connection.commit()
+        except Exception as e:
+            self.connection.rollback()
+            self.logger.error(f"Error durante la transacción, cambios revertidos: {e}", exc_info=True)
+            raise
+        finally:
+            self._in_transaction = False
 
     @contextmanager
     def cursor(self):
@@ -45,9 +110,11 @@ class DatabaseManager:
         cursor = self.connection.cursor()
         try:
             yield cursor
-            self.connection.commit()
+            if not self._in_transaction:
+                self.connection.commit()
         except Exception as e:
-            self.connection.rollback()
+            if not self._in_transaction:
+                self.connection.rollback()
             self.logger.error(f"Error durante la operación: {e}", exc_info=True)
             raise
         finally:
@@ -65,3 +132,62 @@ class DatabaseManager:
         except Exception as e:
             self.logger.error(f"Error al ejecutar la consulta: {e}", exc_info=True)
             raise
+
+    def fetch_all(self, query: str, params: tuple = None) -> list:
+
+        try:
+            self.logger.info(f"Ejecutando consulta de lectura: {query}")
+            with self.cursor() as cursor:
+                cursor.execute(query, params)
+                rows = cursor.fetchall()
+            self.logger.info(f"Consulta de lectura ejecutada exitosamente. Filas obtenidas: {len(rows)}")
+            return rows
+        except Exception as e:
+            self.logger.error(f"Error al ejecutar la consulta de lectura: {e}", exc_info=True)
+            raise
+
+    def fetch_records(self, query: str, params=None) -> list:
+        # Filas como diccionarios columna -> valor
+
+        try:
+            self.logger.info(f"Ejecutando consulta de lectura: {query}")
+            with self.cursor() as cursor:
+                cursor.execute(query, params)
+                columns = [column.name for column in cursor.description]
+                rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+            self.logger.info(f"Consulta de lectura ejecutada exitosamente. Filas obtenidas: {len(rows)}")
+            return rows
+        except Exception as e:
+            self.logger.error(f"Error al ejecutar la consulta de lectura: {e}", exc_info=True)
+            raise
+
+    # Consultas de los tableros sobre las vistas materializadas que mantiene el Loader
+
+    def get_ratings_by_category_year(self, start_year: int = None, end_year: int = None,
+                                     rating_category: str = None) -> list:
+
+        return self.fetch_records("""
+        SELECT release_year, rating_category, movie_count, avg_rating, avg_popularity, total_revenue_usd
+        FROM mv_ratings_by_category_year
+        WHERE (%(start_year)s IS NULL OR release_year >= %(start_year)s)
+          AND (%(end_year)s IS NULL OR release_year <= %(end_year)s)
+          AND (%(rating_category)s IS NULL OR rating_category = %(rating_category)s)
+        ORDER BY release_year, rating_category;
+        """, {'start_year': start_year, 'end_year': end_year, 'rating_category': rating_category})
+
+    def get_top_profit_margins(self, limit: int = 20) -> list:
+
+        return self.fetch_records("""
+        SELECT movie_id, title, release_date, rating, budget_usd, revenue_usd, profit_margin
+        FROM mv_top_profit_margins
+        ORDER BY profit_margin DESC, movie_id
+        LIMIT %s;
+        """, (limit,))
+
+    def get_genre_stats(self) -> list:
+
+        return self.fetch_records("""
+        SELECT genre_id, genre_name, movie_count, avg_rating, avg_popularity, avg_profit_margin
+        FROM mv_genre_stats
+        ORDER BY movie_count DESC, genre_id;
+        """)
@@ -0,0 +1,218 @@
+import json
+import os
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from etl.loader import compute_content_hash
+from etl.transformer import Transformer
+from utils.clean_data import CleanerValidator
+from utils.logger_manager import LoggerManager
+from utils.schema import enforce_schema, RAW_DETAIL_FIELDS, RAW_DETAIL_SCHEMA, RAW_MOVIE_SCHEMA, TRANSFORMED_SCHEMA
+from utils.settings import settings
+
+# pyarrow se importa al crear el primer DataLake: los módulos que solo usan las constantes no lo cargan
+pa = ds = LocalFileSystem = None
+
+DATA_LAKE_ENABLED = settings.get_bool('DATA_LAKE_ENABLED', False)
+DATA_LAKE_PATH = settings.get('DATA_LAKE_PATH', 'data_lake')
+
+RAW_MOVIES = 'movies_raw'
+RAW_DETAILS = 'details_raw'
+TRANSFORMED = 'movies_transformed'
+
+# Las columnas anidadas de TMDb (listas y diccionarios) se guardan como JSON con este sufijo
+JSON_SUFFIX = '__json'
+# Posición de la fila dentro de la ejecución: las particiones se leen en otro orden y la regla de
+# duplicados de CleanerValidator depende del orden original
+ROW_NUMBER = 'row_number'
+
+# Esquema fijo de cada conjunto: columnas con su tipo de pandas y columnas anidadas guardadas como JSON.
+# Todos los archivos se escriben y se leen con el mismo esquema de Arrow, sin inferirlo de los datos
+DATASET_SCHEMAS = {
+    RAW_MOVIES: (RAW_MOVIE_SCHEMA, []),
+    RAW_DETAILS: (RAW_DETAIL_SCHEMA, [field for field, nested in RAW_DETAIL_FIELDS.items() if nested is not None]),
+    TRANSFORMED: (TRANSFORMED_SCHEMA, []),
+}
+
+
+def _import_pyarrow():
+
+    global pa, ds, LocalFileSystem
+    if pa is None:
+        try:
+            import pyarrow
+            import pyarrow.dataset
+            import pyarrow.fs
+        except ImportError:
+            raise ImportError("pyarrow no está instalado; el data lake requiere pyarrow.") from None
+        pa, ds, LocalFileSystem = pyarrow, pyarrow.dataset, pyarrow.fs.LocalFileSystem
+
+
+def _arrow_type(dtype: str):
+    # Tipo de Arrow de un tipo de pandas de utils.schema. Las categorías se guardan como texto (Parquet
+    # ya las codifica como diccionario), así las categorías y el orden de cada archivo no tienen que coincidir
+    if dtype.startswith('datetime64'):
+        return pa.timestamp('ns')
+    if dtype == 'category' or dtype.startswith('string'):
+        return pa.string()
+    return pa.from_numpy_dtype(np.dtype(dtype.lower()))
+
+
+def _arrow_schema(dataset: str):
+
+    columns, nested = DATASET_SCHEMAS[dataset]
+    return pa.schema(
+        [(column, _arrow_type(dtype)) for column, dtype in columns.items()]
+        + [(f"{column}{JSON_SUFFIX}", pa.string()) for column in nested]
+        + [('run_id', pa.string()), (ROW_NUMBER, pa.int64()), ('run_date', pa.string()), ('release_year', pa.int32())]
+    )
+
+
+def _encode_nested(df: pd.DataFrame, nested: list) -> pd.DataFrame:
+    # Las columnas anidadas del esquema pasan a JSON aunque todos sus valores sean nulos
+    encoded = {}
+    for column in df.columns:
+        if column in nested:
+            encoded[f"{column}{JSON_SUFFIX}"] = [
+                json.dumps(value) if isinstance(value, (list, dict)) else None for value in df[column]
+            ]
+        else:
+            encoded[column] = df[column]
+    return pd.DataFrame(encoded, index=df.index)
+
+
+def _decode_nested(df: pd.DataFrame) -> pd.DataFrame:
+
+    for column in [column for column in df.columns if column.endswith(JSON_SUFFIX)]:
+        df[column[:-len(JSON_SUFFIX)]] = pd.Series(
+            [json.loads(value) if value is not None else None for value in df[column]], index=df.index, dtype=object)
+        df = df.drop(columns=column)
+    return df
+
+
+def compare_frames(stored: pd.DataFrame, replayed: pd.DataFrame) -> dict:
+    # Compara dos salidas de Transformer por movie_id usando la misma huella de contenido que la carga
+    left = pd.DataFrame({'movie_id': stored['movie_id'], 'stored': compute_content_hash(stored)})
+    right = pd.DataFrame({'movie_id': replayed['movie_id'], 'replayed': compute_content_hash(replayed)})
+    merged = left.merge(right, on='movie_id', how='outer', indicator=True)
+    both = merged['_merge'] == 'both'
+    return {
+        'same': int((both & (merged['stored'] == merged['replayed'])).sum()),
+        'changed': int((both & (merged['stored'] != merged['replayed'])).sum()),
+        'only_stored': int((merged['_merge'] == 'left_only').sum()),
+        'only_replayed': int((merged['_merge'] == 'right_only').sum()),
+    }
+
+
+class DataLake:
+    """Copia en Parquet de los extractos crudos y la salida transformada de cada ejecución.
+
+    Cada conjunto se particiona al estilo Hive por run_date y release_year, así las lecturas filtradas
+    por fecha de ejecución o año de estreno solo abren los archivos de esas particiones. Las lecturas
+    usan archivos mapeados en memoria y permiten reprocesar una ejecución sin llamar a TMDb ni a PostgreSQL.
+    """
+
+    def __init__(self, path: str = DATA_LAKE_PATH, run_id: str = None, script_name: str = __file__):
+
+        self.logger = LoggerManager(script_name=script_name).get_logger()
+        _import_pyarrow()
+
+        self.path = path
+        now = datetime.now()
+        self.run_id = run_id or now.strftime('%Y%m%dT%H%M%S')
+        self.run_date = now.strftime('%Y-%m-%d')
+        self._sequence = 0
+        self._rows = {}
+        self._filesystem = LocalFileSystem(use_mmap=True)
+        self._partitioning = ds.partitioning(
+            pa.schema([('run_date', pa.string()), ('release_year', pa.int32())]), flavor='hive')
+        self._schemas = {dataset: _arrow_schema(dataset) for dataset in DATASET_SCHEMAS}
+
+    def write(self, dataset: str, df: pd.DataFrame, release_dates: pd.Series = None):
+        # release_dates: fecha de estreno por fila cuando el DataFrame no trae su propia columna release_date
+        if df.empty:
+            return
+
+        if release_dates is None:
+            release_dates = df['release_date']
+        release_year = pd.to_datetime(release_dates, errors='coerce').dt.year.astype('Int32')
+        offset = self._rows.get(dataset, 0)
+        self._rows[dataset] = offset + len(df)
+        schema = self._schemas[dataset]
+        frame = _encode_nested(df, DATASET_SCHEMAS[dataset][1]).assign(
+            run_id=self.run_id, run_date=self.run_date, release_year=release_year.to_numpy(),
+            **{ROW_NUMBER: range(offset, offset + len(df))})
+        ignored = [column for column in frame.columns if column not in schema.names]
+        if ignored:
+            self.logger.warning(f"Data lake: columnas fuera del esquema de '{dataset}' no guardadas: {ignored}.")
+        # Las columnas del esquema que no trae el DataFrame se guardan como nulas
+        table = pa.Table.from_pandas(frame.reindex(columns=schema.names), schema=schema, preserve_index=False)
+
+        # Un nombre de archivo por escritura: varias ejecuciones del mismo día o varios bloques no se pisan
+        self._sequence += 1
+        ds.write_dataset(
+            table, os.path.join(self.path, dataset), format='parquet', partitioning=self._partitioning,
+            basename_template=f"{self.run_id}-{self._sequence:05d}-{{i}}.parquet",
+            existing_data_behavior='overwrite_or_ignore',
+        )
+        self.logger.info(f"Data lake: {len(df)} registros escritos en '{dataset}' (ejecución {self.run_id}).")
+
+    def write_raw(self, movies: pd.DataFrame, details: pd.DataFrame = None):
+
+        self.write(RAW_MOVIES, movies)
+        if details is not None:
+            self.write_details(details, movies)
+
+    def write_details(self, details: pd.DataFrame, movies: pd.DataFrame):
+        # Los detalles no traen fecha de estreno: se toma la de la película para particionar igual
+        release_dates = movies.drop_duplicates(subset=['id']).set_index('id')['release_date']
+        self.write(RAW_DETAILS, details, release_dates=details['id'].map(release_dates))
+
+    def _dataset(self, dataset: str):
+        # Con el esquema explícito, las columnas que falten en archivos anteriores se leen como nulas
+        return ds.dataset(os.path.join(self.path, dataset), format='parquet', partitioning=self._partitioning,
+                          filesystem=self._filesystem, schema=self._schemas[dataset])
+
+    def latest_run_id(self, run_date: str, dataset: str = RAW_MOVIES) -> str:
+
+        table = self._dataset(dataset).to_table(columns=['run_id'], filter=ds.field('run_date') == run_date)
+        if table.num_rows == 0:
+            raise ValueError(f"No hay datos de la ejecución del {run_date} en '{dataset}'.")
+        return max(table.column('run_id').unique().to_pylist())
+
+    def read(self, dataset: str, run_date: str = None, run_id: str = None, release_years=None,
+             columns: list = None, predicate=None) -> pd.DataFrame:
+        # Los filtros de partición descartan directorios completos; el resto (predicate, una expresión de
+        # pyarrow.dataset) se evalúa con las estadísticas de cada grupo de filas de Parquet
+        expression = predicate
+        for condition in (
+            ds.field('run_date') == run_date if run_date else None,
+            ds.field('run_id') == run_id if run_id else None,
+            ds.field('release_year').isin(list(release_years)) if release_years else None,
+        ):
+            if condition is not None:
+                expression = condition if expression is None else expression & condition
+
+        if not os.path.isdir(os.path.join(self.path, dataset)):
+            return pd.DataFrame()
+        if columns is not None:
+            columns = list(dict.fromkeys(list(columns) + ['run_id', ROW_NUMBER]))
+        table = self._dataset(dataset).to_table(columns=columns, filter=expression)
+        table = table.sort_by([('run_id', 'ascending'), (ROW_NUMBER, 'ascending')]).drop_columns([ROW_NUMBER])
+        # El esquema del conjunto no lleva los metadatos de pandas: los tipos compactos se restauran aquí
+        return enforce_schema(_decode_nested(table.to_pandas()), DATASET_SCHEMAS[dataset][0])
+
+    def replay(self, run_date: str, run_id: str = None, release_years=None):
+        # Reprocesa los extractos crudos guardados con CleanerValidator y Transformer
+        run_id = run_id or self.latest_run_id(run_date)
+        self.logger.info(f"Reprocesando la ejecución {run_id} del {run_date} desde el data lake.")
+
+        movies = self.read(RAW_MOVIES, run_date, run_id, release_years)
+        details = self.read(RAW_DETAILS, run_date, run_id, release_years)
+        if movies.empty or details.empty:
+            raise ValueError(f"No hay extractos de la ejecución {run_id} para los filtros indicados.")
+        cleaner_validator = CleanerValidator()
+        transformed = Transformer().transform_data(cleaner_validator.clean_and_validate(movies, details))
+        return transformed, cleaner_validator.related, run_id
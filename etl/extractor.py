@@ -1,23 +1,41 @@
-import os
+from concurrent.futures import ThreadPoolExecutor
 
 import requests
 import pandas as pd
-from dotenv import load_dotenv
 
+from utils.http_cache import ResponseCache, CACHE_ENABLED
+from utils.http_client import HttpClient, POOL_SIZE
+from utils.instrumentation import instrument
 from utils.logger_manager import LoggerManager
 from utils.save_csv_debug import SaveFileDebug
+from utils.schema import (
+    frame_from_records, project_fields, RAW_MOVIE_SCHEMA, RAW_DETAIL_SCHEMA, RAW_MOVIE_FIELDS, RAW_DETAIL_FIELDS
+)
+from utils.settings import settings
 
-load_dotenv()
-
-BASE_URL = os.getenv('BASE_URL')
-API_KEY = os.getenv('API_KEY')
-output_path = os.getenv('LOG_FOLDER_DATA')
+BASE_URL = settings.get('BASE_URL')
+API_KEY = settings.get('API_KEY')
+output_path = settings.get('LOG_FOLDER_DATA')
+MAX_WORKERS = settings.get_int('EXTRACT_MAX_WORKERS', 8)
+MOVIE_LISTS = settings.get_list('EXTRACT_MOVIE_LISTS', 'popular,top_rated,now_playing,upcoming')
+MAX_PAGES = settings.get_int('EXTRACT_MAX_PAGES', 10)  # por lista, 20 películas por página; 0 = todas
+TMDB_MAX_PAGE = 500  # TMDb rechaza páginas posteriores
+# Subrecursos pedidos junto con cada /movie/{id} mediante append_to_response (una sola solicitud por película)
+DETAIL_APPEND = settings.get_list('EXTRACT_DETAIL_APPEND', 'credits,keywords,release_dates')
 
 class Extractor:
-    def __init__(self, script_name: str = __file__):
+    def __init__(self, script_name: str = __file__, max_workers: int = MAX_WORKERS, use_cache: bool = CACHE_ENABLED,
+                 detail_append=None, checkpoint=None):
 
         self.logger = LoggerManager(script_name=script_name).get_logger()
+        self.max_workers = max(1, max_workers)
+        self.detail_append = list(DETAIL_APPEND if detail_append is None else detail_append)
+        self.http = HttpClient(pool_size=max(POOL_SIZE, self.max_workers), logger=self.logger)
+        self.cache = ResponseCache() if use_cache else None
+        # Punto de control opcional: páginas y detalles ya obtenidos en una ejecución interrumpida
+        self.checkpoint = checkpoint
 
+    @instrument()
     def fetch_data(self, endpoint, params=None):
 
         url = f"{BASE_URL}{endpoint}"
@@ -25,60 +43,223 @@ class Extractor:
         params['api_key'] = API_KEY
 
         try:
-            self.logger.info(f"Realizando solicitud a la URL: {url} con parámetros: {params}")
-            response = requests.get(url, params=params)
+            entry = None
+            headers = None
+            if self.cache:
+                key = ResponseCache.make_key(endpoint, params)
+                entry = self.cache.get(key, endpoint)
+                if entry and entry.is_fresh:
+                    self.logger.info("Respuesta obtenida de la caché para la URL: %s", url)
+                    return entry.json()
+                if entry:
+                    headers = entry.conditional_headers()
+
+            # Formato diferido con %s: sin coste si el nivel INFO está desactivado
+            self.logger.info("Realizando solicitud a la URL: %s con parámetros: %s", url, params)
+            response = self.http.get(url, params=params, headers=headers)
+
+            if response.status_code == 304 and entry:
+                self.cache.revalidated(key, entry)
+                self.logger.info("Respuesta en caché revalidada para la URL: %s", url)
+                return entry.json()
+
             response.raise_for_status()
-            self.logger.info(f"Solicitud exitosa a la URL: {url}")
+            if self.cache:
+                self.cache.put(key, endpoint, response.content,
+                               response.headers.get('ETag'), response.headers.get('Last-Modified'))
+            self.logger.info("Solicitud exitosa a la URL: %s", url)
             return response.json()
         except requests.exceptions.RequestException as e:
             self.logger.error(f"Error al realizar solicitud a la URL: {url} - {e}", exc_info=True)
             return None
 
-    def extract_movies(self):
+    def log_http_stats(self):
+
+        stats = self.http.stats()
+        self.logger.info(
+            f"Estadísticas HTTP: solicitudes={stats['requests']}, reintentos={stats['retries']}, "
+            f"fallos={stats['failures']}, conexiones abiertas={stats['connections_opened']}, "
+            f"conexiones reutilizadas={stats['connections_reused']}, espera={stats['wait_seconds']}s."
+        )
+        if self.cache:
+            cache_stats = self.cache.stats()
+            self.logger.info(
+                f"Estadísticas de caché: aciertos={cache_stats['hits']}, fallos={cache_stats['misses']}, "
+                f"revalidadas={cache_stats['revalidated']}, bytes ahorrados={cache_stats['bytes_saved']}, "
+                f"desalojadas={cache_stats['evicted']}, tamaño={cache_stats['size_bytes']} bytes."
+            )
+            stats['cache'] = cache_stats
+        return stats
+
+    def _fetch_list_page(self, list_name: str, page: int) -> dict:
+
+        if self.checkpoint:
+            data = self.checkpoint.get_page(list_name, page)
+            if data is not None:
+                self.logger.info("Lista '%s', página %s recuperada del punto de control.", list_name, page)
+                return self._project_page(data)
+
+        self.logger.info("Extrayendo películas de la lista '%s', página %s.", list_name, page)
+        data = self.fetch_data(f"/movie/{list_name}", params={'page': page})
+
+        if data:
+            data = self._project_page(data)
+            if self.checkpoint:
+                self.checkpoint.save_page(list_name, page, data)
+            self.logger.info("Lista '%s', página %s procesada con %d películas.",
+                             list_name, page, len(data.get('results', [])))
+            return data
+
+        self.logger.warning("No se obtuvieron datos para la lista '%s', página %s.", list_name, page)
+        return {}
+
+    @staticmethod
+    def _project_page(data: dict) -> dict:
+        # Solo los campos que se usan de cada película; total_pages se conserva para paginar
+        return {'total_pages': data.get('total_pages'),
+                'results': project_fields(data.get('results', []), RAW_MOVIE_FIELDS)}
+
+    @staticmethod
+    def _page_count(first_page: dict, max_pages: int) -> int:
+
+        limit = min(max_pages, TMDB_MAX_PAGE) if max_pages > 0 else TMDB_MAX_PAGE
+        return max(1, min(int(first_page.get('total_pages') or 1), limit))
+
+    def _iter_list_pages(self, lists, pages=None, max_pages: int = MAX_PAGES):
+        # Genera (lista, página, resultados) en orden de lista y página. Las páginas se piden en paralelo y
+        # cada una se entrega en cuanto ella y todas las anteriores están disponibles
+        lists = list(dict.fromkeys(lists))
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        try:
+            if pages is not None:
+                futures = {list_name: [(page, executor.submit(self._fetch_list_page, list_name, page)) for page in pages]
+                           for list_name in lists}
+            else:
+                # La primera página de cada lista informa total_pages; el resto de páginas de una lista se
+                # envía en cuanto llega su primera página, sin esperar a las listas anteriores
+                first_pages = {list_name: executor.submit(self._fetch_list_page, list_name, 1) for list_name in lists}
+                futures = {}
+
+                def submit_pending(wait_for=None):
+                    for list_name, first in first_pages.items():
+                        if list_name in futures or not (first.done() or list_name == wait_for):
+                            continue
+                        payload = first.result()
+                        futures[list_name] = [(1, first)] + [
+                            (page, executor.submit(self._fetch_list_page, list_name, page))
+                            for page in range(2, self._page_count(payload, max_pages) + 1 if payload else 2)
+                        ]
+
+            for list_name in lists:
+                if pages is None:
+                    submit_pending(wait_for=list_name)
+                for page, future in futures[list_name]:
+                    payload = future.result()
+                    if pages is None:
+                        submit_pending()
+                    yield list_name, page, payload.get('results', [])
+        finally:
+            # Si el consumidor deja de iterar, las páginas aún no iniciadas no se piden
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    @instrument()
+    def extract_movies(self, pages=None, lists=None):
 
         try:
-            self.logger.info("Iniciando extracción de películas populares.")
+            lists = list(lists or MOVIE_LISTS)
+            self.logger.info(f"Iniciando extracción de las listas de películas: {', '.join(lists)}.")
             movies = []
 
-            for page in range(1, 11):  # 200 películas, 20 por página
-                self.logger.info(f"Extrayendo películas de la página {page}.")
-                data = self.fetch_data("/movie/popular", params={'page': page})
+            for _, _, page_results in self._iter_list_pages(lists, pages):
+                movies.extend(page_results)
 
-                if data:
-                    page_results = data.get('results', [])
-                    movies.extend(page_results)
-                    self.logger.info(f"Página {page} procesada con {len(page_results)} películas.")
-                else:
-                    self.logger.warning(f"No se obtuvieron datos para la página {page}.")
+            movies = frame_from_records(movies, RAW_MOVIE_FIELDS, RAW_MOVIE_SCHEMA)
+            if not movies.empty:
+                # Una película presente en varias listas se procesa una sola vez
+                total = len(movies)
+                movies = movies.drop_duplicates(subset=['id'], ignore_index=True)
+                self.logger.info(f"Películas repetidas entre listas descartadas: {total - len(movies)}.")
 
-            self.logger.info(f"Extracción completada. Total de películas obtenidas: {len(movies)}.")
+            self.logger.info(f"Extracción completada. Total de películas únicas obtenidas: {len(movies)}.")
+            self.log_http_stats()
             save = SaveFileDebug(path=output_path, filename="movies_api.csv")
-            save.save(pd.DataFrame(movies))
-            return pd.DataFrame(movies)
+            save.save(movies)
+            return movies
         except Exception as e:
-            self.logger.error(f"Error durante la extracción de películas populares: {e}", exc_info=True)
+            self.logger.error(f"Error durante la extracción de listas de películas: {e}", exc_info=True)
             return pd.DataFrame()
 
-    def extract_movie_details(self, movie_ids):
+    def iter_movie_pages(self, pages=None, lists=None):
+        # Versión en streaming de extract_movies: un DataFrame por página, sin volcado de depuración
+        lists = list(lists or MOVIE_LISTS)
+        self.logger.info(f"Iniciando extracción por páginas de las listas de películas: {', '.join(lists)}.")
+        for _, _, page_results in self._iter_list_pages(lists, pages):
+            if page_results:
+                yield frame_from_records(page_results, RAW_MOVIE_FIELDS, RAW_MOVIE_SCHEMA)
+        self.log_http_stats()
 
-        try:
-            self.logger.info("Iniciando extracción de detalles de películas.")
-            details = []
+    def _fetch_movie_detail(self, movie_id, idx, total):
+
+        if self.checkpoint:
+            data = self.checkpoint.get_detail(movie_id)
+            if data is not None:
+                self.logger.info("Detalles de la película con ID: %s recuperados del punto de control.", movie_id)
+                return project_fields(data, RAW_DETAIL_FIELDS)
+
+        self.logger.info("Extrayendo detalles para la película con ID: %s (%d/%d).", movie_id, idx, total)
+        params = {'append_to_response': ','.join(self.detail_append)} if self.detail_append else None
+        # La respuesta completa se descarta en cuanto se proyecta: solo se acumulan los campos usados
+        data = project_fields(self.fetch_data(f"/movie/{movie_id}", params=params), RAW_DETAIL_FIELDS)
 
-            for idx, movie_id in enumerate(movie_ids, start=1):
-                self.logger.info(f"Extrayendo detalles para la película con ID: {movie_id} ({idx}/{len(movie_ids)}).")
-                data = self.fetch_data(f"/movie/{movie_id}")
+        if data:
+            if self.checkpoint:
+                self.checkpoint.save_detail(movie_id, data)
+            self.logger.info("Detalles obtenidos para la película con ID: %s.", movie_id)
+        else:
+            self.logger.warning("No se obtuvieron detalles para la película con ID: %s.", movie_id)
+        return data
 
-                if data:
-                    details.append(data)
-                    self.logger.info(f"Detalles obtenidos para la película con ID: {movie_id}.")
-                else:
-                    self.logger.warning(f"No se obtuvieron detalles para la película con ID: {movie_id}.")
+    def _fetch_movie_details(self, movie_ids: list, max_workers: int) -> list:
+
+        total = len(movie_ids)
+        if max_workers == 1:
+            results = [self._fetch_movie_detail(movie_id, idx, total) for idx, movie_id in enumerate(movie_ids, start=1)]
+        else:
+            # executor.map conserva el orden de entrada de los IDs
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                results = list(executor.map(
+                    self._fetch_movie_detail, movie_ids, range(1, total + 1), [total] * total
+                ))
+
+        return [data for data in results if data]
+
+    @instrument()
+    def extract_movie_details(self, movie_ids, max_workers: int = None):
+
+        try:
+            max_workers = max(1, max_workers or self.max_workers)
+            # Cada /movie/{id} se pide una sola vez por ejecución
+            movie_ids = list(dict.fromkeys(movie_ids))
+            self.logger.info(f"Iniciando extracción de detalles de películas con {max_workers} solicitudes concurrentes.")
+
+            details = self._fetch_movie_details(movie_ids, max_workers)
 
             self.logger.info(f"Extracción de detalles completada. Total de películas procesadas: {len(details)}.")
+            self.log_http_stats()
+            details = frame_from_records(details, RAW_DETAIL_FIELDS, RAW_DETAIL_SCHEMA)
             save = SaveFileDebug(path=output_path, filename="details_api.csv")
-            save.save(pd.DataFrame(details))
-            return pd.DataFrame(details)
+            save.save(details)
+            return details
         except Exception as e:
             self.logger.error(f"Error durante la extracción de detalles de películas: {e}", exc_info=True)
             return pd.DataFrame()
+
+    def iter_movie_details(self, movie_ids, batch_size: int, max_workers: int = None):
+        # Versión en streaming de extract_movie_details: un DataFrame por lote de IDs
+        max_workers = max(1, max_workers or self.max_workers)
+        movie_ids = list(dict.fromkeys(movie_ids))
+        for offset in range(0, len(movie_ids), batch_size):
+            batch = movie_ids[offset:offset + batch_size]
+            details = self._fetch_movie_details(batch, max_workers)
+            self.logger.info(f"Lote de detalles extraído: {len(details)} de {len(batch)} películas.")
+            yield frame_from_records(details, RAW_DETAIL_FIELDS, RAW_DETAIL_SCHEMA)
@@ -1,39 +1,453 @@
+import hashlib
+import io
+import os
+import threading
+import time
+
 from database.database_manager import DatabaseManager
 from utils.logger_manager import LoggerManager
+from utils.instrumentation import instrument
+from utils.schema import enforce_schema, TRANSFORMED_SCHEMA
+from utils.settings import settings
+import numpy as np
 import pandas as pd
 from psycopg2.extras import execute_batch
 
+INCREMENTAL_MAX_AGE_HOURS = settings.get_float('INCREMENTAL_MAX_AGE_HOURS', 24)
+# Espera antes de volver a pedir una película que no llegó a cargarse (sin detalles o descartada en la
+# validación); se duplica con cada intento fallido hasta INCREMENTAL_RETRY_MAX_HOURS
+INCREMENTAL_RETRY_BACKOFF_HOURS = settings.get_float('INCREMENTAL_RETRY_BACKOFF_HOURS', 6)
+INCREMENTAL_RETRY_MAX_HOURS = settings.get_float('INCREMENTAL_RETRY_MAX_HOURS', 168)
+LOAD_MODE = settings.get('LOAD_MODE', 'batch')
+LOAD_MODES = ('batch', 'copy')
+COPY_CHUNK_SIZE = settings.get_int('COPY_CHUNK_SIZE', 50000)
+TOP_PROFIT_LIMIT = settings.get_int('ANALYTICS_TOP_PROFIT_LIMIT', 100)
+# Presupuestos mínimos para el ranking de márgenes: con presupuestos simbólicos el margen no es comparable
+TOP_PROFIT_MIN_BUDGET = settings.get_int('ANALYTICS_TOP_PROFIT_MIN_BUDGET', 1000000)
+
+MOVIE_COLUMNS = [
+    'movie_id', 'title', 'release_date', 'rating', 'vote_count', 'popularity_score', 'genres',
+    'duration_minutes', 'budget_usd', 'revenue_usd', 'profit_margin', 'rating_category'
+]
+INTEGER_COLUMNS = ['movie_id', 'vote_count', 'duration_minutes', 'budget_usd', 'revenue_usd']
+# Columnas cuyo cambio obliga a reescribir la fila en 'movies'
+HASH_COLUMNS = MOVIE_COLUMNS[1:]
+
+# movie_fetch_state guarda la última extracción por película fuera de 'movies', para que marcar como
+# vigente una película sin cambios no reescriba su fila; se inicializa una sola vez desde movies.last_fetched_at.
+# related_hash es la huella de las filas relacionadas de la película (géneros y subrecursos) ya cargadas.
+# movie_fetch_attempts registra las películas pedidas que no se cargaron; no tiene clave foránea porque
+# esas películas no están en 'movies'
+CREATE_TABLE_QUERY = """
+CREATE TABLE IF NOT EXISTS movies (
+    id SERIAL PRIMARY KEY,
+    movie_id INT UNIQUE, 
+    title VARCHAR,
+    release_date DATE,
+    rating DECIMAL(3, 1),
+    vote_count INT,
+    popularity_score DECIMAL,
+    genres TEXT,
+    duration_minutes INT,
+    budget_usd BIGINT,
+    revenue_usd BIGINT,
+    profit_margin DECIMAL,
+    rating_category VARCHAR,
+    last_fetched_at TIMESTAMP DEFAULT NOW(),
+    content_hash BIGINT
+);
+ALTER TABLE movies ADD COLUMN IF NOT EXISTS last_fetched_at TIMESTAMP DEFAULT NOW();
+ALTER TABLE movies ADD COLUMN IF NOT EXISTS content_hash BIGINT;
+
+CREATE TABLE IF NOT EXISTS movie_fetch_state (
+    movie_id INT PRIMARY KEY REFERENCES movies (movie_id) ON DELETE CASCADE,
+    last_fetched_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    related_hash BIGINT
+);
+ALTER TABLE movie_fetch_state ADD COLUMN IF NOT EXISTS related_hash BIGINT;
+INSERT INTO movie_fetch_state (movie_id, last_fetched_at)
+SELECT movie_id, COALESCE(last_fetched_at, NOW()) FROM movies
+WHERE movie_id IS NOT NULL AND NOT EXISTS (SELECT 1 FROM movie_fetch_state)
+ON CONFLICT (movie_id) DO NOTHING;
+
+CREATE TABLE IF NOT EXISTS movie_fetch_attempts (
+    movie_id INT PRIMARY KEY,
+    last_attempted_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    attempts INT NOT NULL DEFAULT 1
+);
+"""
+
+# Tablas relacionadas con la película (géneros y subrecursos de append_to_response). Las dimensiones y
+# tablas puente permiten filtrar por género, palabra clave o persona con índices en lugar de buscar en texto
+CREATE_RELATED_TABLES_QUERY = """
+CREATE TABLE IF NOT EXISTS genres (
+    genre_id INT PRIMARY KEY,
+    name VARCHAR NOT NULL
+);
+CREATE TABLE IF NOT EXISTS movie_genres (
+    movie_id INT NOT NULL REFERENCES movies (movie_id) ON DELETE CASCADE,
+    genre_id INT NOT NULL REFERENCES genres (genre_id),
+    PRIMARY KEY (movie_id, genre_id)
+);
+CREATE INDEX IF NOT EXISTS idx_movie_genres_genre_id ON movie_genres (genre_id, movie_id);
+CREATE INDEX IF NOT EXISTS idx_genres_name ON genres (name);
+
+CREATE TABLE IF NOT EXISTS keywords (
+    keyword_id INT PRIMARY KEY,
+    name VARCHAR NOT NULL
+);
+CREATE TABLE IF NOT EXISTS movie_keywords (
+    movie_id INT NOT NULL REFERENCES movies (movie_id) ON DELETE CASCADE,
+    keyword_id INT NOT NULL REFERENCES keywords (keyword_id),
+    PRIMARY KEY (movie_id, keyword_id)
+);
+CREATE INDEX IF NOT EXISTS idx_movie_keywords_keyword_id ON movie_keywords (keyword_id, movie_id);
+
+CREATE TABLE IF NOT EXISTS movie_credits (
+    movie_id INT NOT NULL REFERENCES movies (movie_id) ON DELETE CASCADE,
+    credit_id VARCHAR NOT NULL,
+    credit_type VARCHAR NOT NULL,
+    person_id INT NOT NULL,
+    name VARCHAR,
+    character VARCHAR,
+    department VARCHAR,
+    job VARCHAR,
+    cast_order SMALLINT,
+    PRIMARY KEY (movie_id, credit_id)
+);
+CREATE INDEX IF NOT EXISTS idx_movie_credits_person_id ON movie_credits (person_id);
+
+CREATE TABLE IF NOT EXISTS movie_release_dates (
+    movie_id INT NOT NULL REFERENCES movies (movie_id) ON DELETE CASCADE,
+    country VARCHAR(2) NOT NULL,
+    release_type SMALLINT,
+    release_date DATE,
+    certification VARCHAR
+);
+CREATE INDEX IF NOT EXISTS idx_movie_release_dates_movie_id ON movie_release_dates (movie_id);
+CREATE INDEX IF NOT EXISTS idx_movie_release_dates_country ON movie_release_dates (country, release_date);
+"""
+
+# Índices secundarios para los filtros de los tableros y vistas materializadas con los agregados que leen.
+# Cada vista tiene un índice único sobre columnas simples, requisito de REFRESH ... CONCURRENTLY
+CREATE_ANALYTICS_QUERY = f"""
+CREATE INDEX IF NOT EXISTS idx_movies_release_date ON movies (release_date);
+CREATE INDEX IF NOT EXISTS idx_movies_rating_category ON movies (rating_category, release_date);
+CREATE INDEX IF NOT EXISTS idx_movies_popularity_score ON movies (popularity_score DESC);
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS mv_ratings_by_category_year AS
+SELECT
+    EXTRACT(YEAR FROM release_date)::INT AS release_year,
+    rating_category,
+    COUNT(*) AS movie_count,
+    ROUND(AVG(rating), 2) AS avg_rating,
+    ROUND(AVG(popularity_score), 3) AS avg_popularity,
+    SUM(revenue_usd) AS total_revenue_usd
+FROM movies
+WHERE release_date IS NOT NULL AND rating_category IS NOT NULL
+GROUP BY 1, 2;
+CREATE UNIQUE INDEX IF NOT EXISTS ux_mv_ratings_by_category_year
+    ON mv_ratings_by_category_year (release_year, rating_category);
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS mv_top_profit_margins AS
+SELECT movie_id, title, release_date, rating, budget_usd, revenue_usd, profit_margin
+FROM movies
+WHERE profit_margin IS NOT NULL AND budget_usd >= {TOP_PROFIT_MIN_BUDGET}
+ORDER BY profit_margin DESC, movie_id
+LIMIT {TOP_PROFIT_LIMIT};
+CREATE UNIQUE INDEX IF NOT EXISTS ux_mv_top_profit_margins ON mv_top_profit_margins (movie_id);
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS mv_genre_stats AS
+SELECT
+    g.genre_id,
+    g.name AS genre_name,
+    COUNT(*) AS movie_count,
+    ROUND(AVG(m.rating), 2) AS avg_rating,
+    ROUND(AVG(m.popularity_score), 3) AS avg_popularity,
+    ROUND(AVG(m.profit_margin), 4) AS avg_profit_margin
+FROM movie_genres mg
+JOIN movies m ON m.movie_id = mg.movie_id
+JOIN genres g ON g.genre_id = mg.genre_id
+GROUP BY g.genre_id, g.name;
+CREATE UNIQUE INDEX IF NOT EXISTS ux_mv_genre_stats ON mv_genre_stats (genre_id);
+"""
+
+ANALYTICS_VIEWS = ('mv_ratings_by_category_year', 'mv_top_profit_margins', 'mv_genre_stats')
+# CREATE MATERIALIZED VIEW IF NOT EXISTS no modifica una vista existente: si la definición cambia (por
+# ejemplo ANALYTICS_TOP_PROFIT_LIMIT), las vistas se borran y se vuelven a crear con la nueva
+DROP_ANALYTICS_QUERY = ''.join(f"DROP MATERIALIZED VIEW IF EXISTS {view};\n" for view in ANALYTICS_VIEWS)
+
+# Huella de la definición aplicada de cada parte del esquema. ALTER TABLE ... ADD COLUMN IF NOT EXISTS
+# toma un bloqueo ACCESS EXCLUSIVE aunque no cambie nada: el DDL solo se ejecuta si la huella cambió
+CREATE_SCHEMA_STATE_QUERY = """
+CREATE TABLE IF NOT EXISTS etl_schema (
+    component VARCHAR PRIMARY KEY,
+    fingerprint VARCHAR NOT NULL,
+    applied_at TIMESTAMP NOT NULL DEFAULT NOW()
+);
+"""
+SCHEMA_COMPONENTS = (
+    ('tables', CREATE_TABLE_QUERY + CREATE_RELATED_TABLES_QUERY),
+    ('analytics', DROP_ANALYTICS_QUERY + CREATE_ANALYTICS_QUERY),
+)
+# Clave del bloqueo consultivo que serializa la migración entre procesos que arrancan a la vez
+SCHEMA_LOCK_KEY = 72_190_401
+
+
+def schema_fingerprint(query: str) -> str:
+
+    return hashlib.sha256(query.encode('utf-8')).hexdigest()[:16]
+
+
+class RelatedTable:
+    """Tabla hija de 'movies' que se reemplaza por película; dimension = (tabla, clave, columna de nombre)."""
+
+    def __init__(self, name: str, columns: list, integer_columns: list, dimension: tuple = None):
+
+        self.name = name
+        self.columns = columns
+        self.integer_columns = integer_columns
+        self.dimension = dimension
+
+
+RELATED_TABLES = {
+    table.name: table for table in (
+        RelatedTable('movie_genres', ['movie_id', 'genre_id'], ['movie_id', 'genre_id'],
+                     dimension=('genres', 'genre_id', 'genre_name')),
+        RelatedTable('movie_keywords', ['movie_id', 'keyword_id'], ['movie_id', 'keyword_id'],
+                     dimension=('keywords', 'keyword_id', 'keyword_name')),
+        RelatedTable('movie_credits', [
+            'movie_id', 'credit_id', 'credit_type', 'person_id', 'name', 'character', 'department', 'job', 'cast_order'
+        ], ['movie_id', 'person_id', 'cast_order']),
+        RelatedTable('movie_release_dates', ['movie_id', 'country', 'release_type', 'release_date', 'certification'],
+                     ['movie_id', 'release_type']),
+    )
+}
+
+
 class Loader:
+    # El esquema se comprueba una sola vez por proceso
+    _schema_ready = False
+    _schema_lock = threading.Lock()
+
     def __init__(self, script_name: str = __file__):
         self.logger = LoggerManager(script_name=script_name).get_logger()
 
-    def load_to_postgres(self, df: pd.DataFrame):
+    def ensure_schema(self):
+        # Migración al arrancar, en su propia transacción: las cargas y las consultas de vigencia no
+        # ejecutan DDL. Si las huellas guardadas coinciden, solo se hace una lectura del catálogo
+        with Loader._schema_lock:
+            if Loader._schema_ready:
+                return
+            db_manager = DatabaseManager()
+            try:
+                applied = {}
+                if db_manager.fetch_all("SELECT to_regclass('etl_schema') IS NOT NULL;")[0][0]:
+                    applied = dict(db_manager.fetch_all("SELECT component, fingerprint FROM etl_schema;"))
+                pending = [(name, query) for name, query in SCHEMA_COMPONENTS
+                           if applied.get(name) != schema_fingerprint(query)]
+                if pending:
+                    with db_manager.transaction(), db_manager.cursor() as cursor:
+                        cursor.execute("SELECT pg_advisory_xact_lock(%s);", (SCHEMA_LOCK_KEY,))
+                        cursor.execute(CREATE_SCHEMA_STATE_QUERY)
+                        for name, query in pending:
+                            cursor.execute(query)
+                            cursor.execute("""
+                            INSERT INTO etl_schema (component, fingerprint, applied_at) VALUES (%s, %s, NOW())
+                            ON CONFLICT (component) DO UPDATE
+                            SET fingerprint = EXCLUDED.fingerprint, applied_at = EXCLUDED.applied_at;
+                            """, (name, schema_fingerprint(query)))
+                    self.logger.info(f"Esquema de la base de datos actualizado: {', '.join(name for name, _ in pending)}.")
+                Loader._schema_ready = True
+            finally:
+                db_manager.close()
 
-        db_manager = DatabaseManager()
+    def get_fresh_movie_ids(self, movie_ids, max_age_hours: float = INCREMENTAL_MAX_AGE_HOURS,
+                            retry_backoff_hours: float = INCREMENTAL_RETRY_BACKOFF_HOURS,
+                            retry_max_hours: float = INCREMENTAL_RETRY_MAX_HOURS) -> set:
+        # IDs que no hay que pedir: los cargados cuya última extracción es más reciente que max_age_hours y
+        # los que fallaron hace menos de retry_backoff_hours * 2^(intentos - 1), como mucho retry_max_hours
+        movie_ids = [int(movie_id) for movie_id in movie_ids]
+        if not movie_ids:
+            return set()
 
-        create_table_query = """
-        CREATE TABLE IF NOT EXISTS movies (
-            id SERIAL PRIMARY KEY,
-            movie_id INT UNIQUE, 
-            title VARCHAR,
-            release_date DATE,
-            rating DECIMAL(3, 1),
-            vote_count INT,
-            popularity_score DECIMAL,
-            genres TEXT,
-            duration_minutes INT,
-            budget_usd BIGINT,
-            revenue_usd BIGINT,
-            profit_margin DECIMAL,
-            rating_category VARCHAR
-        );
+        self.ensure_schema()
+        db_manager = DatabaseManager()
+        query = """
+        SELECT movie_id, FALSE FROM movie_fetch_state
+        WHERE movie_id = ANY(%s)
+          AND last_fetched_at >= NOW() - make_interval(secs => %s)
+        UNION ALL
+        SELECT movie_id, TRUE FROM movie_fetch_attempts
+        WHERE movie_id = ANY(%s)
+          AND last_attempted_at >= NOW() - make_interval(secs => LEAST(%s * POWER(2, attempts - 1), %s));
         """
 
+        try:
+            rows = db_manager.fetch_all(query, (movie_ids, max_age_hours * 3600, movie_ids,
+                                                retry_backoff_hours * 3600, retry_max_hours * 3600))
+            waiting_ids = {row[0] for row in rows if row[1]}
+            fresh_ids = {row[0] for row in rows if not row[1]}
+            self.logger.info(
+                f"Películas vigentes en la base de datos: {len(fresh_ids)} de {len(movie_ids)} "
+                f"(antigüedad máxima {max_age_hours} horas); en espera tras un intento fallido: {len(waiting_ids)}.")
+            return fresh_ids | waiting_ids
+        finally:
+            db_manager.close()
+
+    def mark_attempted(self, movie_ids) -> bool:
+        # Películas pedidas a TMDb que no se cargaron: el modo incremental las omite durante la espera.
+        # Como refresh_views, un fallo aquí no invalida la carga ya confirmada
+        movie_ids = [int(movie_id) for movie_id in movie_ids]
+        if not movie_ids:
+            return True
+
+        db_manager = DatabaseManager()
+        try:
+            self.ensure_schema()
+            db_manager.execute_query("""
+            INSERT INTO movie_fetch_attempts (movie_id, last_attempted_at, attempts)
+            SELECT UNNEST(%s::INT[]), NOW(), 1
+            ON CONFLICT (movie_id) DO UPDATE SET
+                last_attempted_at = EXCLUDED.last_attempted_at,
+                attempts = movie_fetch_attempts.attempts + 1;
+            """, (movie_ids,))
+            self.logger.info(f"Películas pedidas sin cargar registradas para reintentar más tarde: {len(movie_ids)}.")
+            return True
+        except Exception as e:
+            self.logger.warning(f"No se pudieron registrar las películas sin cargar: {e}", exc_info=True)
+            return False
+        finally:
+            db_manager.close()
+
+    @instrument()
+    def load_to_postgres(self, df: pd.DataFrame, mode: str = LOAD_MODE, related: dict = None,
+                         refresh: bool = True, mark_fetched: bool = True) -> dict:
+        # Devuelve el número de películas nuevas, modificadas y sin cambios; con refresh=True las vistas
+        # analíticas se recalculan al terminar si alguna película cambió. mark_fetched=False no toca
+        # movie_fetch_state: para cargas de datos guardados, que no son una extracción reciente
+
+        if mode not in LOAD_MODES:
+            raise ValueError(f"Modo de carga no soportado: {mode}. Opciones: {', '.join(LOAD_MODES)}")
+
+        self.ensure_schema()
+        db_manager = DatabaseManager()
+        # Una fila por película (gana la última), como al aplicar los upserts uno tras otro
+        df = df.drop_duplicates(subset=['movie_id'], keep='last')
+        df = df.assign(content_hash=compute_content_hash(df))
+
+        try:
+            # Carga en una única transacción, sin DDL: solo bloqueos de fila sobre 'movies'
+            with db_manager.transaction():
+
+                changed, stats = self._detect_changes(db_manager, df)
+                self.logger.info(
+                    f"Cambios detectados en 'movies': {stats['inserted']} nuevas, {stats['updated']} modificadas, "
+                    f"{stats['unchanged']} sin cambios.")
+
+                if not changed.empty:
+                    self.logger.info(
+                        f"Iniciando la inserción de {len(changed)} registros en la tabla 'movies' (modo '{mode}').")
+                    if mode == 'copy':
+                        self._load_copy(db_manager, changed)
+                    else:
+                        self._load_batch(db_manager, changed)
+
+                related_hash = None
+                if related is not None:
+                    # Solo se reescriben las filas relacionadas de las películas cuya huella cambió
+                    related_hash = compute_related_hash(df['movie_id'], related)
+                    changed_ids = self._detect_related_changes(db_manager, related_hash)
+                    self.logger.info(
+                        f"Películas con tablas relacionadas modificadas: {len(changed_ids)} de {len(related_hash)}.")
+                    if changed_ids:
+                        for name, frame in related.items():
+                            self._load_related(db_manager, changed_ids, RELATED_TABLES[name],
+                                               frame[frame['movie_id'].isin(changed_ids)], mode)
+                if mark_fetched:
+                    self._mark_fetched(db_manager, df['movie_id'], related_hash)
+
+            self.logger.info("Inserción o actualización de datos completada exitosamente.")
+            if refresh and (stats['inserted'] or stats['updated']):
+                self.refresh_views()
+            return stats
+        except Exception as e:
+            self.logger.error(f"Error durante la carga de datos: {e}", exc_info=True)
+            raise
+        finally:
+            db_manager.close()
+
+    def refresh_views(self) -> bool:
+        # Fuera de la transacción de carga; CONCURRENTLY deja leer las vistas mientras se recalculan.
+        # Los datos ya están confirmados: un fallo aquí no invalida la carga, solo deja las vistas atrasadas
+        db_manager = DatabaseManager()
+
+        try:
+            for view in ANALYTICS_VIEWS:
+                start = time.perf_counter()
+                db_manager.execute_query(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {view};")
+                self.logger.info(f"Vista materializada '{view}' actualizada en {time.perf_counter() - start:.2f}s.")
+            return True
+        except Exception as e:
+            self.logger.warning(
+                f"La carga se confirmó, pero no se pudieron actualizar las vistas materializadas: {e}. "
+                f"Se recalcularán en la próxima carga con cambios o con REFRESH MATERIALIZED VIEW.", exc_info=True)
+            return False
+        finally:
+            db_manager.close()
+
+    def _detect_changes(self, db_manager: DatabaseManager, df: pd.DataFrame):
+        # Compara la huella de cada fila con la guardada; solo las nuevas o modificadas se escriben
+        rows = db_manager.fetch_all(
+            "SELECT movie_id, content_hash FROM movies WHERE movie_id = ANY(%s);",
+            ([int(movie_id) for movie_id in df['movie_id']],)
+        )
+        stored = pd.DataFrame(rows, columns=['movie_id', 'stored_hash']).astype({'stored_hash': 'Int64'})
+        merged = df[['movie_id', 'content_hash']].merge(stored, on='movie_id', how='left', indicator=True)
+
+        is_new = (merged['_merge'] == 'left_only').to_numpy()
+        unchanged = merged['stored_hash'].eq(merged['content_hash']).fillna(False).to_numpy(dtype=bool)
+        stats = {
+            'inserted': int(is_new.sum()),
+            'updated': int((~is_new & ~unchanged).sum()),
+            'unchanged': int(unchanged.sum()),
+        }
+        return df[~unchanged], stats
+
+    def _detect_related_changes(self, db_manager: DatabaseManager, related_hash: pd.Series) -> list:
+        # IDs cuya huella de tablas relacionadas no coincide con la guardada (o no hay ninguna guardada)
+        rows = db_manager.fetch_all(
+            "SELECT movie_id, related_hash FROM movie_fetch_state WHERE movie_id = ANY(%s);",
+            ([int(movie_id) for movie_id in related_hash.index],)
+        )
+        stored = pd.Series({movie_id: stored_hash for movie_id, stored_hash in rows}, dtype='Int64')
+        unchanged = stored.reindex(related_hash.index).eq(related_hash).fillna(False).to_numpy(dtype=bool)
+        return [int(movie_id) for movie_id in related_hash.index[~unchanged]]
+
+    def _mark_fetched(self, db_manager: DatabaseManager, movie_ids: pd.Series, related_hash: pd.Series = None):
+        # Sin related_hash se conserva la huella guardada de las tablas relacionadas
+        movie_ids = [int(movie_id) for movie_id in movie_ids]
+        hashes = [None] * len(movie_ids) if related_hash is None else [
+            int(value) for value in related_hash.reindex(movie_ids)]
+
+        with db_manager.cursor() as cursor:
+            cursor.execute("""
+            INSERT INTO movie_fetch_state (movie_id, last_fetched_at, related_hash)
+            SELECT UNNEST(%s::INT[]), NOW(), UNNEST(%s::BIGINT[])
+            ON CONFLICT (movie_id) DO UPDATE SET
+                last_fetched_at = EXCLUDED.last_fetched_at,
+                related_hash = COALESCE(EXCLUDED.related_hash, movie_fetch_state.related_hash);
+            """, (movie_ids, hashes))
+            # Una película cargada deja de estar en espera de reintento
+            cursor.execute("DELETE FROM movie_fetch_attempts WHERE movie_id = ANY(%s);", (movie_ids,))
+
+    def _load_batch(self, db_manager: DatabaseManager, df: pd.DataFrame):
+
         insert_query = """
         INSERT INTO movies (
-            movie_id, title, release_date, rating, vote_count, popularity_score, genres, duration_minutes, budget_usd, revenue_usd, profit_margin, rating_category
+            movie_id, title, release_date, rating, vote_count, popularity_score, genres, duration_minutes, budget_usd, revenue_usd, profit_margin, rating_category, content_hash, last_fetched_at
         )
-        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, NOW())
         ON CONFLICT (movie_id) 
         DO UPDATE SET
             title = EXCLUDED.title,
@@ -46,32 +460,195 @@ class Loader:
             budget_usd = EXCLUDED.budget_usd,
             revenue_usd = EXCLUDED.revenue_usd,
             profit_margin = EXCLUDED.profit_margin,
-            rating_category = EXCLUDED.rating_category;
+            rating_category = EXCLUDED.rating_category,
+            content_hash = EXCLUDED.content_hash,
+            last_fetched_at = EXCLUDED.last_fetched_at
+        WHERE movies.content_hash IS DISTINCT FROM EXCLUDED.content_hash;
         """
 
-        try:
-            # Crear la tabla si no existe
-            self.logger.info("Verificando si la tabla 'movies' existe o debe ser creada.")
-            db_manager.execute_query(create_table_query)
-            self.logger.info("Tabla 'movies' creada o ya existente.")
-
-            # Insertar datos en lote para mejorar el rendimiento
-            self.logger.info(f"Iniciando la inserción de {len(df)} registros en la tabla 'movies'.")
-            data = [
-                (
-                    row['movie_id'], row['title'], row['release_date'], row['rating'],
-                    row['vote_count'], row['popularity_score'], row['genres'],
-                    row['duration_minutes'], row['budget_usd'], row['revenue_usd'],
-                    row['profit_margin'], row['rating_category']
-                ) for _, row in df.iterrows()
-            ]
-
-            with db_manager.cursor() as cursor:
-                execute_batch(cursor, insert_query, data, page_size=100)
+        # Insertar datos en lote para mejorar el rendimiento
+        data = list(_prepare_batch_frame(df, MOVIE_COLUMNS + ['content_hash']).itertuples(index=False, name=None))
 
-            self.logger.info("Inserción o actualización de datos completada exitosamente.")
-        except Exception as e:
-            self.logger.error(f"Error durante la carga de datos: {e}", exc_info=True)
-            raise
-        finally:
-            db_manager.close()
+        with db_manager.cursor() as cursor:
+            execute_batch(cursor, insert_query, data, page_size=100)
+
+    def _load_copy(self, db_manager: DatabaseManager, df: pd.DataFrame):
+
+        columns = ', '.join(MOVIE_COLUMNS + ['content_hash'])
+
+        staging_query = f"""
+        CREATE TEMP TABLE movies_staging ON COMMIT DROP AS
+        SELECT {columns} FROM movies WITH NO DATA;
+        """
+
+        copy_query = f"COPY movies_staging ({columns}) FROM STDIN WITH (FORMAT csv, NULL '\\N')"
+
+        # DISTINCT ON evita que ON CONFLICT actualice la misma fila dos veces en una sentencia
+        merge_query = f"""
+        INSERT INTO movies ({columns}, last_fetched_at)
+        SELECT DISTINCT ON (movie_id) {columns}, NOW()
+        FROM movies_staging
+        ORDER BY movie_id
+        ON CONFLICT (movie_id)
+        DO UPDATE SET
+            title = EXCLUDED.title,
+            release_date = EXCLUDED.release_date,
+            rating = EXCLUDED.rating,
+            vote_count = EXCLUDED.vote_count,
+            popularity_score = EXCLUDED.popularity_score,
+            genres = EXCLUDED.genres,
+            duration_minutes = EXCLUDED.duration_minutes,
+            budget_usd = EXCLUDED.budget_usd,
+            revenue_usd = EXCLUDED.revenue_usd,
+            profit_margin = EXCLUDED.profit_margin,
+            rating_category = EXCLUDED.rating_category,
+            content_hash = EXCLUDED.content_hash,
+            last_fetched_at = EXCLUDED.last_fetched_at
+        WHERE movies.content_hash IS DISTINCT FROM EXCLUDED.content_hash;
+        """
+
+        with db_manager.cursor() as cursor:
+            cursor.execute(staging_query)
+            cursor.copy_expert(copy_query, DataFrameCsvStream(_prepare_copy_frame(df)))
+            self.logger.info(f"Registros copiados a la tabla temporal 'movies_staging': {len(df)}.")
+            cursor.execute(merge_query)
+            self.logger.info(f"Registros insertados o actualizados desde la tabla temporal: {cursor.rowcount}.")
+
+    def _load_related(self, db_manager: DatabaseManager, movie_ids: list, table: RelatedTable,
+                      frame: pd.DataFrame, mode: str):
+        # Reemplaza las filas de las películas indicadas; la dimensión solo cambia si cambia el nombre
+        columns = ', '.join(table.columns)
+
+        with db_manager.cursor() as cursor:
+            if table.dimension:
+                dimension, key, name_column = table.dimension
+                values = frame[[key, name_column]].drop_duplicates(subset=[key])
+                execute_batch(cursor, f"""
+                INSERT INTO {dimension} ({key}, name) VALUES (%s, %s)
+                ON CONFLICT ({key}) DO UPDATE SET name = EXCLUDED.name
+                WHERE {dimension}.name IS DISTINCT FROM EXCLUDED.name;
+                """, [(int(value), str(name)) for value, name in values.itertuples(index=False)], page_size=1000)
+
+            cursor.execute(f"DELETE FROM {table.name} WHERE movie_id = ANY(%s);", (movie_ids,))
+
+            if mode == 'copy':
+                cursor.execute(f"""
+                CREATE TEMP TABLE {table.name}_staging ON COMMIT DROP AS
+                SELECT {columns} FROM {table.name} WITH NO DATA;
+                """)
+                cursor.copy_expert(f"COPY {table.name}_staging ({columns}) FROM STDIN WITH (FORMAT csv, NULL '\\N')",
+                                   DataFrameCsvStream(_prepare_copy_frame(frame, table.columns, table.integer_columns)))
+                cursor.execute(f"""
+                INSERT INTO {table.name} ({columns})
+                SELECT {columns} FROM {table.name}_staging
+                ON CONFLICT DO NOTHING;
+                """)
+            else:
+                placeholders = ', '.join(['%s'] * len(table.columns))
+                execute_batch(cursor, f"""
+                INSERT INTO {table.name} ({columns}) VALUES ({placeholders})
+                ON CONFLICT DO NOTHING;
+                """, list(_prepare_batch_frame(frame, table.columns).itertuples(index=False, name=None)),
+                    page_size=1000)
+
+        self.logger.info(f"Registros cargados en '{table.name}': {len(frame)}.")
+
+
+def _prepare_batch_frame(df: pd.DataFrame, columns: list = MOVIE_COLUMNS) -> pd.DataFrame:
+    # Valores nativos de Python para psycopg2: los nulos de los tipos compactos (pd.NA, NaN, NaT) pasan a None
+    frame = df[columns].astype(object)
+    return frame.where(df[columns].notna(), None)
+
+
+def _normalize_for_hash(df: pd.DataFrame, columns: list) -> pd.DataFrame:
+    # Valores independientes de los tipos compactos: enteros y decimales como float64 redondeado, fechas
+    # como datetime64 y el resto como texto
+    normalized = {}
+    for column in columns:
+        series = df[column]
+        if pd.api.types.is_numeric_dtype(series) and not isinstance(series.dtype, pd.CategoricalDtype):
+            normalized[column] = pd.to_numeric(series).astype('float64').round(6)
+        elif column == 'release_date':
+            normalized[column] = pd.to_datetime(series, errors='coerce').astype('datetime64[ns]')
+        else:
+            normalized[column] = series.astype(object).where(series.notna(), None)
+    return pd.DataFrame(normalized, index=df.index)
+
+
+def compute_content_hash(df: pd.DataFrame) -> np.ndarray:
+    # Huella de 64 bits por fila sobre los valores normalizados
+    hashes = pd.util.hash_pandas_object(_normalize_for_hash(df, HASH_COLUMNS), index=False).to_numpy()
+    # BIGINT de PostgreSQL es con signo
+    return hashes.view(np.int64)
+
+
+def compute_related_hash(movie_ids: pd.Series, related: dict) -> pd.Series:
+    # Huella de 64 bits por película sobre sus filas en todas las tablas relacionadas. Cada fila se
+    # combina con el nombre de su tabla y las huellas se suman (módulo 2^64), así el orden de las filas
+    # no influye; una película sin filas relacionadas tiene huella 0
+    unique_ids = np.unique(movie_ids.to_numpy(dtype=np.int64))
+    totals = np.zeros(len(unique_ids), dtype=np.uint64)
+    for name in sorted(related):
+        frame, table = related[name], RELATED_TABLES[name]
+        columns = table.columns + ([table.dimension[2]] if table.dimension else [])
+        frame = frame[frame['movie_id'].isin(unique_ids)]
+        if frame.empty:
+            continue
+        rows = _normalize_for_hash(frame, columns).assign(related_table=name)
+        row_hashes = pd.util.hash_pandas_object(rows, index=False).to_numpy()
+        np.add.at(totals, np.searchsorted(unique_ids, frame['movie_id'].to_numpy(dtype=np.int64)), row_hashes)
+    return pd.Series(totals.view(np.int64), index=unique_ids, dtype='Int64')
+
+
+def read_artifact(path: str) -> pd.DataFrame:
+    # Salida de Transformer guardada en disco (movies_transformed en CSV, Parquet o Feather) para cargarla
+    # sin repetir la extracción; los tipos se restauran con el mismo esquema que usa Transformer
+    name = os.path.basename(path).lower()
+    if name.endswith('.parquet'):
+        df = pd.read_parquet(path)
+    elif name.endswith('.feather'):
+        df = pd.read_feather(path)
+    else:
+        df = pd.read_csv(path, parse_dates=['release_date'])
+    missing = [column for column in MOVIE_COLUMNS if column not in df.columns]
+    if missing:
+        raise ValueError(f"El archivo {path} no tiene las columnas {missing}.")
+    return enforce_schema(df[[column for column in TRANSFORMED_SCHEMA if column in df.columns]], TRANSFORMED_SCHEMA)
+
+
+def _prepare_copy_frame(df: pd.DataFrame, columns: list = MOVIE_COLUMNS + ['content_hash'],
+                        integer_columns: list = INTEGER_COLUMNS) -> pd.DataFrame:
+    # Columnas enteras como Int64 para que COPY no reciba valores como '120.0'
+    frame = df[columns].copy()
+    for column in integer_columns:
+        frame[column] = pd.to_numeric(frame[column], errors='coerce').round().astype('Int64')
+    return frame
+
+
+class DataFrameCsvStream:
+    """Objeto tipo archivo que serializa el DataFrame a CSV por bloques bajo demanda para COPY."""
+
+    def __init__(self, df: pd.DataFrame, chunk_size: int = COPY_CHUNK_SIZE):
+
+        self.df = df
+        self.chunk_size = chunk_size
+        self._offset = 0
+        # Bloque actual como StringIO: cada read avanza un puntero en lugar de copiar el resto del bloque
+        self._buffer = io.StringIO()
+
+    def _next_chunk(self) -> str:
+
+        chunk = self.df.iloc[self._offset:self._offset + self.chunk_size]
+        self._offset += self.chunk_size
+        return chunk.to_csv(index=False, header=False, na_rep='\\N', date_format='%Y-%m-%d')
+
+    def read(self, size: int = -1) -> str:
+
+        parts = [self._buffer.read(size)]
+        pending = size - len(parts[0]) if size >= 0 else -1
+        while pending != 0 and self._offset < len(self.df):
+            self._buffer = io.StringIO(self._next_chunk())
+            parts.append(self._buffer.read(pending))
+            if pending > 0:
+                pending -= len(parts[-1])
+        return ''.join(parts)
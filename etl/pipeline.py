@@ -0,0 +1,174 @@
+import threading
+from queue import Queue
+
+import pandas as pd
+
+from etl.data_lake import RAW_MOVIES, TRANSFORMED
+from etl.extractor import Extractor
+from etl.loader import Loader, LOAD_MODE
+from etl.transformer import Transformer
+from utils.clean_data import CleanerValidator
+from utils.logger_manager import LoggerManager
+from utils.save_csv_debug import chunk_suffix
+from utils.settings import settings
+
+CHUNK_SIZE = settings.get_int('STREAM_CHUNK_SIZE', 100)
+MAX_PENDING_CHUNKS = settings.get_int('STREAM_MAX_PENDING_CHUNKS', 2)
+
+
+class StreamingPipeline:
+    """Ejecuta extracción, limpieza, transformación y carga por bloques acotados.
+
+    La carga se hace en un hilo aparte que consume una cola limitada, de modo que la
+    escritura en PostgreSQL se solapa con la extracción del siguiente bloque. Con un punto de
+    control, cada bloque cargado se registra y una ejecución reanudada lo omite.
+    """
+
+    def __init__(self, chunk_size: int = CHUNK_SIZE, full_refresh: bool = False, load_mode: str = LOAD_MODE,
+                 max_pending_chunks: int = MAX_PENDING_CHUNKS, checkpoint=None, data_lake=None,
+                 script_name: str = __file__):
+
+        self.chunk_size = max(1, chunk_size)
+        self.full_refresh = full_refresh
+        self.load_mode = load_mode
+        self.logger = LoggerManager(script_name=script_name).get_logger()
+
+        self.checkpoint = checkpoint
+        self.data_lake = data_lake
+        self.extractor = Extractor(checkpoint=checkpoint)
+        self.cleaner_validator = CleanerValidator()
+        self.transformer = Transformer()
+        self.loader = Loader()
+
+        self._queue = Queue(maxsize=max(1, max_pending_chunks))
+        self._load_error = None
+        self._stats = {'chunks': 0, 'extracted': 0, 'skipped_fresh': 0, 'skipped_checkpoint': 0, 'details': 0,
+                       'loaded': 0, 'inserted': 0, 'updated': 0, 'unchanged': 0}
+
+    def _movie_chunks(self, pages):
+        # Agrupa páginas hasta alcanzar chunk_size películas únicas
+        seen_ids = set()
+        buffer = []
+        buffered = 0
+
+        for page in self.extractor.iter_movie_pages(pages):
+            page = page[~page['id'].isin(seen_ids)].drop_duplicates(subset=['id'])
+            seen_ids.update(page['id'].tolist())
+            self._stats['extracted'] += len(page)
+            buffer.append(page)
+            buffered += len(page)
+
+            if buffered >= self.chunk_size:
+                chunk = pd.concat(buffer, ignore_index=True)
+                for offset in range(0, len(chunk), self.chunk_size):
+                    yield chunk.iloc[offset:offset + self.chunk_size]
+                buffer, buffered = [], 0
+
+        if buffered:
+            yield pd.concat(buffer, ignore_index=True)
+
+    def _load_worker(self):
+
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            if self._load_error is not None:
+                continue
+            chunk, related, chunk_key, unloaded_ids = item
+            try:
+                if chunk is not None:
+                    # Las vistas analíticas se recalculan una sola vez al final de la ejecución
+                    changes = self.loader.load_to_postgres(chunk, mode=self.load_mode, related=related, refresh=False)
+                    self._stats['loaded'] += len(chunk)
+                    for key, count in changes.items():
+                        self._stats[key] += count
+                if unloaded_ids:
+                    # Películas del bloque sin detalles o descartadas: esperan antes de volver a pedirse
+                    self.loader.mark_attempted(unloaded_ids)
+                if chunk_key is not None:
+                    # Todas las cargas del bloque terminaron: se registra en el punto de control
+                    self.checkpoint.mark_chunk_loaded(chunk_key)
+            except Exception as e:
+                # Se sigue vaciando la cola para que el productor no quede bloqueado
+                self._load_error = e
+
+    def _filter_fresh(self, movies: pd.DataFrame) -> pd.DataFrame:
+
+        if self.full_refresh:
+            return movies
+        try:
+            fresh_ids = self.loader.get_fresh_movie_ids(movies['id'])
+        except Exception as e:
+            self.logger.warning(f"No se pudo consultar el estado incremental, se procesará el bloque completo: {e}")
+            return movies
+        self._stats['skipped_fresh'] += len(fresh_ids)
+        return movies[~movies['id'].isin(fresh_ids)]
+
+    def run(self, pages=None) -> dict:
+
+        self.logger.info(f"Iniciando el proceso ETL en streaming con bloques de {self.chunk_size} películas.")
+        # El DDL se aplica antes de empezar: las cargas de cada bloque y las consultas de vigencia no
+        # toman bloqueos exclusivos y la extracción del bloque siguiente no espera a la carga en curso
+        self.loader.ensure_schema()
+        worker = threading.Thread(target=self._load_worker, name='streaming-loader', daemon=True)
+        worker.start()
+
+        batch = 0
+        try:
+            for movies in self._movie_chunks(pages):
+                if self._load_error is not None:
+                    raise self._load_error
+
+                chunk_key = None
+                if self.checkpoint:
+                    chunk_key = self.checkpoint.chunk_key(movies['id'])
+                    if self.checkpoint.is_chunk_loaded(chunk_key):
+                        self._stats['skipped_checkpoint'] += len(movies)
+                        continue
+
+                movies = self._filter_fresh(movies)
+                if movies.empty:
+                    self._queue.put((None, None, chunk_key, None))
+                    continue
+
+                if self.data_lake:
+                    self.data_lake.write(RAW_MOVIES, movies)
+                loaded_ids = set()
+                for details in self.extractor.iter_movie_details(movies['id'], batch_size=self.chunk_size):
+                    if details.empty:
+                        continue
+                    self._stats['details'] += len(details)
+                    if self.data_lake:
+                        self.data_lake.write_details(details, movies)
+                    # Cada bloque guarda sus artefactos de depuración con nombre propio
+                    batch += 1
+                    self.cleaner_validator.debug_suffix = self.transformer.debug_suffix = chunk_suffix(batch)
+                    data = self.cleaner_validator.clean_and_validate(movies, details)
+                    if data.empty:
+                        continue
+                    transformed = self.transformer.transform_data(data)
+                    if self.data_lake:
+                        self.data_lake.write(TRANSFORMED, transformed)
+                    self._stats['chunks'] += 1
+                    loaded_ids.update(transformed['movie_id'].tolist())
+                    self._queue.put((transformed, self.cleaner_validator.related, None, None))
+                    self.logger.info(f"Bloque {self._stats['chunks']} encolado para carga: {len(transformed)} registros.")
+                self._queue.put((None, None, chunk_key, movies.loc[~movies['id'].isin(loaded_ids), 'id'].tolist()))
+        finally:
+            self._queue.put(None)
+            worker.join()
+
+        if self._load_error is not None:
+            raise self._load_error
+        if self._stats['inserted'] or self._stats['updated']:
+            self.loader.refresh_views()
+
+        self.logger.info(
+            f"Proceso ETL en streaming completado. Bloques: {self._stats['chunks']}, "
+            f"películas extraídas: {self._stats['extracted']}, omitidas por vigentes: {self._stats['skipped_fresh']}, "
+            f"omitidas por punto de control: {self._stats['skipped_checkpoint']}, "
+            f"detalles: {self._stats['details']}, registros cargados: {self._stats['loaded']} "
+            f"({self._stats['inserted']} nuevos, {self._stats['updated']} modificados, "
+            f"{self._stats['unchanged']} sin cambios).")
+        return dict(self._stats)
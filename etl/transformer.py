@@ -1,31 +1,77 @@
-import os
 import pandas as pd
-from dotenv import load_dotenv
 from utils.logger_manager import LoggerManager
+from utils.instrumentation import instrument
 from utils.save_csv_debug import SaveFileDebug
+from utils.schema import enforce_schema, TRANSFORMED_SCHEMA
+from utils.settings import settings
 
-load_dotenv()
-output_path = os.getenv('LOG_FOLDER_DATA')
+output_path = settings.get('LOG_FOLDER_DATA')
+
+COLUMN_MAPPING = {
+    'id': 'movie_id',
+    'vote_average': 'rating',
+    'popularity': 'popularity_score',
+    'runtime': 'duration_minutes',
+    'budget': 'budget_usd',
+    'revenue': 'revenue_usd'
+}
+
+RATING_BINS = [-float('inf'), 0.4, 6.0, 8.0, float('inf')]
+RATING_LABELS = ['Malo', 'Promedio', 'Bueno', 'Excelente']
+
+
+def compute_profit_margin(budget: pd.Series, revenue: pd.Series) -> pd.Series:
+    # Presupuesto 0 se convierte en NaN para que la división no genere inf
+    budget = budget.astype('float64')
+    valid_budget = budget.where(budget != 0)
+    return (revenue - valid_budget) / valid_budget
+
+
+def compute_rating_category(rating: pd.Series) -> pd.Series:
+    # El redondeo a 3 decimales (precisión de TMDb) evita que un float32 como 0.4000000059 cambie de categoría
+    return pd.cut(rating.astype('float64').round(3), bins=RATING_BINS, labels=RATING_LABELS)
 
 
 class Transformer:
     def __init__(self, script_name: str = __file__):
         self.logger = LoggerManager(script_name=script_name).get_logger()
+        # Sufijo de los artefactos de depuración; el proceso en streaming fija uno por bloque para no sobrescribirlos
+        self.debug_suffix = ''
+
+    def save_debug_outputs(self, df: pd.DataFrame):
+
+        try:
+            # Filtrar y guardar películas con budget_usd == 0
+            self.logger.info("Filtrando películas con budget_usd igual a 0.")
+            zero_budget = df['budget_usd'].eq(0)
+            if zero_budget.any():
+                save_zero_budget = SaveFileDebug(path=output_path, filename=f"movies_zero_budget{self.debug_suffix}.csv")
+                save_zero_budget.save(df[zero_budget])
+                self.logger.info(f"Películas con presupuesto 0 guardadas en 'movies_zero_budget{self.debug_suffix}.csv'.")
+
+            # Filtrar y guardar películas con revenue_usd == 0
+            self.logger.info("Filtrando películas con revenue_usd igual a 0.")
+            zero_revenue = df['revenue_usd'].eq(0)
+            if zero_revenue.any():
+                save_zero_revenue = SaveFileDebug(path=output_path, filename=f"movies_zero_revenue{self.debug_suffix}.csv")
+                save_zero_revenue.save(df[zero_revenue])
+                self.logger.info(f"Películas con revenue 0 guardadas en 'movies_zero_revenue{self.debug_suffix}.csv'.")
+
+        except Exception as e:
+            self.logger.error(f"Error al filtrar o guardar películas con presupuesto o revenue 0: {e}")
+            raise
+
+        save = SaveFileDebug(path=output_path, filename=f"movies_transformed{self.debug_suffix}.csv")
+        save.save(df)
 
+    @instrument()
     def transform_data(self, df: pd.DataFrame) -> pd.DataFrame:
         self.logger.info("Iniciando la transformación de datos.")
 
         try:
-            # Renombrar columnas
+            # Renombrar columnas (rename devuelve una copia, el DataFrame de entrada no se modifica)
             self.logger.info("Renombrando columnas del DataFrame.")
-            df.rename(columns={
-                'id': 'movie_id',
-                'vote_average': 'rating',
-                'popularity': 'popularity_score',
-                'runtime': 'duration_minutes',
-                'budget': 'budget_usd',
-                'revenue': 'revenue_usd'
-            }, inplace=True)
+            df = df.rename(columns=COLUMN_MAPPING)
             self.logger.info("Columnas renombradas correctamente.")
         except Exception as e:
             self.logger.error(f"Error al renombrar columnas: {e}")
@@ -34,10 +80,7 @@ class Transformer:
         try:
             # Calcular margen de beneficio
             self.logger.info("Calculando margen de beneficio para las películas.")
-            df['profit_margin'] = df.apply(
-                lambda x: None if x['budget_usd'] == 0 else (x['revenue_usd'] - x['budget_usd']) / x['budget_usd'],
-                axis=1
-            )
+            df['profit_margin'] = compute_profit_margin(df['budget_usd'], df['revenue_usd'])
             self.logger.info("Margen de beneficio calculado correctamente.")
         except Exception as e:
             self.logger.error(f"Error al calcular el margen de beneficio: {e}")
@@ -46,39 +89,14 @@ class Transformer:
         try:
             # Categorizar calificaciones
             self.logger.info("Categorizando calificaciones en 'rating_category'.")
-            df['rating_category'] = pd.cut(
-                df['rating'],
-                bins=[-float('inf'), 0.4, 6.0, 8.0, float('inf')],
-                labels=['Malo', 'Promedio', 'Bueno', 'Excelente']
-            )
+            df['rating_category'] = compute_rating_category(df['rating'])
             self.logger.info("Calificaciones categorizadas correctamente.")
         except Exception as e:
             self.logger.error(f"Error al categorizar calificaciones: {e}")
             raise
 
-        try:
-            # Filtrar y guardar películas con budget_usd == 0
-            self.logger.info("Filtrando películas con budget_usd igual a 0.")
-            movies_with_zero_budget = df[df['budget_usd'] == 0]
-            if not movies_with_zero_budget.empty:
-                save_zero_budget = SaveFileDebug(path=output_path, filename="movies_zero_budget.csv")
-                save_zero_budget.save(movies_with_zero_budget)
-                self.logger.info(f"Películas con presupuesto 0 guardadas en 'movies_zero_budget.csv'.")
-
-            # Filtrar y guardar películas con revenue_usd == 0
-            self.logger.info("Filtrando películas con revenue_usd igual a 0.")
-            movies_with_zero_revenue = df[df['revenue_usd'] == 0]
-            if not movies_with_zero_revenue.empty:
-                save_zero_revenue = SaveFileDebug(path=output_path, filename="movies_zero_revenue.csv")
-                save_zero_revenue.save(movies_with_zero_revenue)
-                self.logger.info(f"Películas con revenue 0 guardadas en 'movies_zero_revenue.csv'.")
-
-        except Exception as e:
-            self.logger.error(f"Error al filtrar o guardar películas con presupuesto o revenue 0: {e}")
-            raise
-
         self.logger.info("Transformación de datos completada.")
-        save = SaveFileDebug(path=output_path, filename="movies_transformed.csv")
-        save.save(df)
+        df = enforce_schema(df, TRANSFORMED_SCHEMA)
+        self.save_debug_outputs(df)
 
         return df
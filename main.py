@@ -1,26 +1,195 @@
-from etl.extractor import Extractor
-from etl.loader import Loader
-from etl.transformer import Transformer
-from utils.clean_data import CleanerValidator
+import time
+
+_STARTED = time.perf_counter()
+
+import argparse
+import importlib.util
+import os
+import sys
+
+from utils.instrumentation import run_instrumentation, stage
 from utils.logger_manager import LoggerManager
+from utils.settings import settings
 
+run_instrumentation.record_import('main', time.perf_counter() - _STARTED)
 
-def main():
-    logger = LoggerManager(script_name=__file__).get_logger()
+# Módulos de etapa que importa cada subcomando; el resto se importa solo si una opción lo requiere
+COMMAND_MODULES = {
+    'run': ['etl.extractor', 'etl.loader', 'utils.clean_data', 'etl.transformer', 'utils.checkpoint'],
+    'extract': ['etl.extractor', 'etl.loader', 'utils.checkpoint', 'etl.data_lake'],
+    'replay': ['etl.data_lake', 'etl.loader'],
+    'load': ['etl.loader'],
+    'check': [],
+}
+# Módulos del proceso completo con todas las opciones: referencia para medir el arranque
+ALL_MODULES = COMMAND_MODULES['run'] + ['etl.parallel', 'etl.pipeline', 'etl.data_lake']
+REQUIRED_SETTINGS = ('BASE_URL', 'API_KEY')
+
+
+def load_modules(names: list):
+    # Importa y mide los módulos de etapa; los ya importados cuentan 0
+    for name in names:
+        run_instrumentation.import_module(name)
+
+
+def parse_args(argv=None):
+
+    parser = argparse.ArgumentParser(description="Proceso ETL de películas de TMDb hacia PostgreSQL.")
+    subparsers = parser.add_subparsers(dest='command', metavar='COMANDO')
+
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--import-times', action='store_true',
+                        help="Muestra al final el tiempo de importación de cada módulo de etapa.")
+    staged = argparse.ArgumentParser(add_help=False, parents=[common])
+    staged.add_argument('--profile', nargs='+', default=[], metavar='ETAPA',
+                        help="Guarda un volcado de cProfile por etapa (extract, clean, transform, clean_transform, "
+                             "load, streaming, replay o all).")
+
+    run = subparsers.add_parser('run', parents=[staged], help="Proceso completo: extracción, limpieza, transformación y carga (por defecto).")
+    run.add_argument('--full-refresh', action='store_true',
+                     help="Extrae y carga todas las películas, aunque ya estén vigentes en la base de datos.")
+    run.add_argument('--stream', action='store_true',
+                     help="Procesa y carga las películas por bloques en lugar de mantener todo en memoria.")
+    run.add_argument('--chunk-size', type=int,
+                     help="Número de películas por bloque en el modo --stream (por defecto STREAM_CHUNK_SIZE).")
+    run.add_argument('--workers', type=int,
+                     help="Procesos para limpiar y transformar en paralelo (modo por lotes); 1 desactiva el paralelismo "
+                          "(por defecto PARALLEL_WORKERS).")
+    run.add_argument('--resume', action='store_true',
+                     help="Retoma la última ejecución interrumpida, omitiendo páginas, detalles y bloques ya completados.")
+    run.add_argument('--data-lake', action='store_true', default=None,
+                     help="Guarda los extractos crudos y los datos transformados en Parquet (DATA_LAKE_PATH).")
+
+    extract = subparsers.add_parser('extract', parents=[staged], help="Solo extracción: guarda los extractos crudos en el data lake.")
+    extract.add_argument('--full-refresh', action='store_true',
+                         help="Extrae todas las películas, aunque ya estén vigentes en la base de datos.")
+    extract.add_argument('--resume', action='store_true',
+                         help="Retoma la última extracción interrumpida.")
+
+    replay = subparsers.add_parser('replay', parents=[staged], help="Reprocesa desde el data lake una ejecución, sin llamar a TMDb.")
+    replay.add_argument('date', metavar='FECHA', help="Fecha de la ejecución (AAAA-MM-DD).")
+    replay.add_argument('--run', dest='run_id', metavar='RUN_ID',
+                        help="Ejecución concreta a reprocesar (por defecto, la última de esa fecha).")
+    replay.add_argument('--release-years', type=int, nargs='+', metavar='AÑO',
+                        help="Limita el reproceso a las películas estrenadas en estos años.")
+    replay.add_argument('--load', action='store_true', help="Carga el resultado en PostgreSQL.")
+
+    load = subparsers.add_parser('load', parents=[staged], help="Solo carga: lleva a PostgreSQL una salida transformada ya guardada.")
+    source = load.add_mutually_exclusive_group(required=True)
+    source.add_argument('--input', metavar='ARCHIVO',
+                        help="movies_transformed guardado por el depurador (CSV, Parquet o Feather).")
+    source.add_argument('--from-lake', metavar='FECHA',
+                        help="Carga los datos transformados del data lake de esa fecha (AAAA-MM-DD).")
+    load.add_argument('--run', dest='run_id', metavar='RUN_ID',
+                      help="Ejecución concreta de --from-lake (por defecto, la última de esa fecha).")
+
+    check = subparsers.add_parser('check', parents=[common], help="Comprueba la configuración sin ejecutar ninguna etapa.")
+    check.add_argument('--connect', action='store_true', help="Comprueba también la conexión con PostgreSQL.")
+
+    argv = sys.argv[1:] if argv is None else list(argv)
+    # Sin subcomando se ejecuta el proceso completo, con las mismas opciones que antes
+    if not argv or (argv[0] not in subparsers.choices and argv[0] not in ('-h', '--help')):
+        argv = ['run'] + argv
+    return parser.parse_args(argv)
+
+
+def write_run_report(logger):
 
     try:
-        logger.info("Iniciando el proceso ETL.")
-        print("Iniciando el proceso ETL.")
+        path = run_instrumentation.write_report()
+        logger.info(f"Informe de ejecución guardado en {path}.")
+        print(f"Informe de ejecución guardado en {path}.")
+    except Exception as e:
+        logger.error(f"Error al guardar el informe de ejecución: {e}", exc_info=True)
 
-        try:
-            extractor = Extractor()
 
-            logger.info("Extrayendo datos de películas populares.")
-            print("Extrayendo datos de películas populares.")
+def print_import_times():
+
+    imports = run_instrumentation.import_times()
+    print(f"{'módulo':<28} {'importación (s)':>16}")
+    for name, seconds in imports.items():
+        print(f"{name:<28} {seconds:>16.4f}")
+    print(f"{'total':<28} {sum(imports.values()):>16.4f}")
+
+
+def open_checkpoint(resume: bool, logger):
+
+    from utils.checkpoint import CheckpointStore, CHECKPOINT_ENABLED
+
+    if not CHECKPOINT_ENABLED:
+        if resume:
+            logger.warning("Puntos de control deshabilitados (CHECKPOINT_ENABLED=false): se ignora --resume.")
+        return None
+    checkpoint = CheckpointStore(resume=resume)
+    if checkpoint.resumed:
+        logger.info(f"Reanudando la ejecución {checkpoint.run_id} desde el punto de control.")
+        print(f"Reanudando la ejecución {checkpoint.run_id} desde el punto de control.")
+    elif resume:
+        logger.info("No hay ejecuciones interrumpidas para reanudar; se inicia una ejecución nueva.")
+    return checkpoint
+
+
+def close_checkpoint(checkpoint, logger, error=None):
+
+    if checkpoint is None:
+        return
+    try:
+        if error is None:
+            checkpoint.complete()
+        else:
+            checkpoint.fail(error)
+        logger.info(f"Punto de control: {checkpoint.stats()}.")
+        checkpoint.close()
+    except Exception as e:
+        logger.error(f"Error al cerrar el punto de control: {e}", exc_info=True)
+
+
+def open_data_lake(enabled: bool, logger):
+
+    if not enabled:
+        return None
+    load_modules(['etl.data_lake'])
+    from etl.data_lake import DataLake
+
+    try:
+        return DataLake()
+    except ImportError as e:
+        logger.warning(f"Data lake deshabilitado: {e}")
+        print(f"Data lake deshabilitado: {e}")
+        return None
+
+
+def extract_stage(full_refresh: bool, checkpoint, logger):
+    # Devuelve (películas, detalles); (None, None) si en modo incremental no hay nada nuevo que procesar
+    from etl.extractor import Extractor
+    from etl.loader import Loader
+
+    try:
+        with stage('extract') as metrics:
+            extractor = Extractor(checkpoint=checkpoint)
+
+            logger.info("Extrayendo listas de películas de TMDb.")
+            print("Extrayendo listas de películas de TMDb.")
             movies = extractor.extract_movies()
 
-            logger.info(f"Películas populares extraídas: {len(movies)} registros.")
-            print(f"Películas populares extraídas: {len(movies)} registros.")
+            logger.info(f"Películas únicas extraídas: {len(movies)} registros.")
+            print(f"Películas únicas extraídas: {len(movies)} registros.")
+
+            if not full_refresh and not movies.empty:
+                # Modo incremental: solo se procesan películas nuevas o desactualizadas
+                try:
+                    fresh_ids = Loader().get_fresh_movie_ids(movies['id'])
+                    movies = movies[~movies['id'].isin(fresh_ids)]
+                    logger.info(f"Modo incremental: {len(movies)} películas nuevas o desactualizadas por procesar.")
+                    print(f"Modo incremental: {len(movies)} películas nuevas o desactualizadas por procesar.")
+                except Exception as e:
+                    logger.warning(f"No se pudo consultar el estado incremental, se hará una carga completa: {e}")
+                    print(f"No se pudo consultar el estado incremental, se hará una carga completa: {e}")
+
+                if movies.empty:
+                    logger.info("No hay películas nuevas o desactualizadas. Proceso ETL completado sin cambios.")
+                    print("No hay películas nuevas o desactualizadas. Proceso ETL completado sin cambios.")
+                    return None, None
 
             logger.info("Extrayendo detalles de las películas.")
             print("Extrayendo detalles de las películas.")
@@ -28,51 +197,306 @@ def main():
 
             logger.info(f"Detalles de películas extraídos: {len(movie_details)} registros.")
             print(f"Detalles de películas extraídos: {len(movie_details)} registros.")
-        except Exception as e:
-            logger.error(f"Error durante la extracción de datos: {e}", exc_info=True)
-            print(f"Error durante la extracción de datos: {e}")
-            raise
+            metrics.rows_out = len(movie_details)
+        return movies, movie_details
+    except Exception as e:
+        logger.error(f"Error durante la extracción de datos: {e}", exc_info=True)
+        print(f"Error durante la extracción de datos: {e}")
+        raise
 
-        # Limpieza y validación
-        try:
-            logger.info("Limpiando y validando los datos.")
-            print("Limpiando y validando los datos.")
 
-            cleaner_validator = CleanerValidator()
-            data = cleaner_validator.clean_and_validate(movies, movie_details)
+def main_check(connect: bool = False) -> int:
+    # Comprobación de la configuración para cron o k8s: no importa pandas ni escribe informes
+    problems = []
+    print(f"Archivo .env: {'cargado' if settings.dotenv_loaded else 'no encontrado; se usa solo el entorno'}.")
+    for name in REQUIRED_SETTINGS:
+        if not settings.get(name):
+            problems.append(f"Falta la variable {name}.")
+    if settings.get_bool('DATA_LAKE_ENABLED', False) and importlib.util.find_spec('pyarrow') is None:
+        problems.append("DATA_LAKE_ENABLED=true pero pyarrow no está instalado.")
 
-            logger.info(f"Datos limpiados y validados: {len(data)} registros.")
-            print(f"Datos limpiados y validados: {len(data)} registros.")
-        except Exception as e:
-            logger.error(f"Error durante la limpieza y validación de los datos: {e}", exc_info=True)
-            print(f"Error durante la limpieza y validación de los datos: {e}")
-            raise
+    print(f"Base de datos: {settings.get('DB_USER', 'postgres')}@{settings.get('DB_HOST', 'localhost')}:"
+          f"{settings.get('DB_PORT', 5432)}/{settings.get('DB_NAME', 'postgres')}.")
+    if connect:
+        load_modules(['database.database_manager'])
+        from database.database_manager import DatabaseManager
 
-        # Transformación
+        db_manager = DatabaseManager(script_name=__file__, use_pool=False)
         try:
-            logger.info("Transformando los datos.")
-            print("Transformando los datos.")
+            db_manager.fetch_all("SELECT 1;")
+            print("Conexión con PostgreSQL correcta.")
+        except Exception as e:
+            problems.append(f"No se pudo conectar con PostgreSQL: {e}")
+        finally:
+            db_manager.close()
 
-            transformer = Transformer()
-            transformed_data = transformer.transform_data(data)
+    for problem in problems:
+        print(problem)
+    print("Configuración correcta." if not problems else f"Configuración con {len(problems)} problema(s).")
+    return 1 if problems else 0
 
-            logger.info(f"Datos transformados con éxito. Total de registros: {len(transformed_data)}.")
-            print(f"Datos transformados con éxito. Total de registros: {len(transformed_data)}.")
-        except Exception as e:
-            logger.error(f"Error durante la transformación de los datos: {e}", exc_info=True)
-            print(f"Error durante la transformación de los datos: {e}")
-            raise
+
+def main_load(input_path: str = None, lake_date: str = None, run_id: str = None) -> int:
+    logger = LoggerManager(script_name=__file__).get_logger()
+
+    try:
+        from etl.loader import Loader, read_artifact
+        from utils.save_csv_debug import is_chunk_artifact, is_sampled_artifact
+
+        with stage('load') as metrics:
+            if input_path:
+                if is_sampled_artifact(input_path):
+                    raise ValueError(
+                        f"{input_path} es una muestra del depurador (DEBUG_SINK_SAMPLE_ROWS / "
+                        f"DEBUG_SINK_SAMPLE_FRACTION), no la salida completa; no se carga.")
+                if is_chunk_artifact(input_path):
+                    logger.warning(f"{input_path} es un solo bloque de una ejecución en streaming: "
+                                   f"solo se cargan sus películas.")
+                    print(f"Aviso: {input_path} es un solo bloque de una ejecución en streaming: "
+                          f"solo se cargan sus películas.")
+                logger.info(f"Cargando en la base de datos la salida transformada de {input_path}.")
+                print(f"Cargando en la base de datos la salida transformada de {input_path}.")
+                transformed_data = read_artifact(input_path)
+            else:
+                data_lake = open_data_lake(True, logger)
+                if data_lake is None:
+                    raise RuntimeError("El data lake no está disponible.")
+                from etl.data_lake import TRANSFORMED
+
+                run_id = run_id or data_lake.latest_run_id(lake_date, TRANSFORMED)
+                logger.info(f"Cargando en la base de datos la salida transformada de la ejecución {run_id}.")
+                print(f"Cargando en la base de datos la salida transformada de la ejecución {run_id}.")
+                transformed_data = data_lake.read(TRANSFORMED, lake_date, run_id).drop(
+                    columns=['run_id', 'run_date', 'release_year'])
+
+            metrics.rows_in = len(transformed_data)
+            # Sin las tablas relacionadas: solo se actualiza 'movies'; para reconstruirlas, replay --load.
+            # Los datos guardados no son una extracción reciente: movie_fetch_state no se modifica, así el
+            # modo incremental sigue pidiendo a TMDb las películas que no se extrajeron hace poco
+            changes = Loader().load_to_postgres(transformed_data, mark_fetched=False)
+            metrics.rows_out = len(transformed_data)
+
+        logger.info(f"Datos cargados en la base de datos con éxito: {changes['inserted']} nuevos, "
+                    f"{changes['updated']} modificados, {changes['unchanged']} sin cambios.")
+        print(f"Datos cargados en la base de datos con éxito: {changes['inserted']} nuevos, "
+              f"{changes['updated']} modificados, {changes['unchanged']} sin cambios.")
+        return 0
+    except Exception as e:
+        logger.critical(f"Error crítico en la carga: {e}", exc_info=True)
+        print(f"Error crítico en la carga: {e}")
+        return 1
+    finally:
+        write_run_report(logger)
+
+
+def main_extract(full_refresh: bool = False, resume: bool = False) -> int:
+    logger = LoggerManager(script_name=__file__).get_logger()
+    checkpoint = open_checkpoint(resume, logger)
+    error = None
+
+    try:
+        data_lake = open_data_lake(True, logger)
+        if data_lake is None:
+            raise RuntimeError("La extracción por separado guarda los extractos en el data lake, que no está disponible.")
+
+        movies, movie_details = extract_stage(full_refresh, checkpoint, logger)
+        if movies is not None:
+            data_lake.write_raw(movies, movie_details)
+            logger.info(f"Extractos guardados en el data lake: ejecución {data_lake.run_id} del {data_lake.run_date}.")
+            print(f"Extractos guardados en el data lake: ejecución {data_lake.run_id} del {data_lake.run_date}. "
+                  f"Para procesarlos: python main.py replay {data_lake.run_date} --run {data_lake.run_id} --load")
+        return 0
+    except Exception as e:
+        error = e
+        logger.critical(f"Error crítico en la extracción: {e}", exc_info=True)
+        print(f"Error crítico en la extracción: {e}")
+        return 1
+    finally:
+        close_checkpoint(checkpoint, logger, error)
+        write_run_report(logger)
+
+
+def main_replay(run_date: str, run_id: str = None, release_years=None, load: bool = False) -> int:
+    logger = LoggerManager(script_name=__file__).get_logger()
+
+    try:
+        from etl.data_lake import DataLake, TRANSFORMED, compare_frames
+        from etl.loader import Loader
+
+        logger.info(f"Reprocesando desde el data lake la ejecución del {run_date}.")
+        print(f"Reprocesando desde el data lake la ejecución del {run_date}.")
+
+        with stage('replay') as metrics:
+            data_lake = DataLake()
+            transformed_data, related, run_id = data_lake.replay(run_date, run_id, release_years)
+            metrics.rows_out = len(transformed_data)
+
+        logger.info(f"Ejecución {run_id} reprocesada: {len(transformed_data)} registros.")
+        print(f"Ejecución {run_id} reprocesada: {len(transformed_data)} registros.")
+
+        # Comparación con la salida que se guardó en la ejecución original
+        stored = data_lake.read(TRANSFORMED, run_date, run_id, release_years)
+        if not stored.empty:
+            differences = compare_frames(stored, transformed_data)
+            logger.info(f"Comparación con la salida original: {differences}.")
+            print(f"Comparación con la salida original: {differences}.")
+
+        if load:
+            with stage('load', rows_in=len(transformed_data)) as metrics:
+                changes = Loader().load_to_postgres(transformed_data, related=related)
+                metrics.rows_out = len(transformed_data)
+            logger.info(f"Resultado reprocesado cargado en la base de datos: {changes}.")
+            print(f"Resultado reprocesado cargado en la base de datos: {changes}.")
+        return 0
+    except Exception as e:
+        logger.critical(f"Error crítico al reprocesar desde el data lake: {e}", exc_info=True)
+        print(f"Error crítico al reprocesar desde el data lake: {e}")
+        return 1
+    finally:
+        write_run_report(logger)
+
+
+def main_streaming(full_refresh: bool = False, chunk_size: int = None, resume: bool = False,
+                   data_lake: bool = None) -> int:
+    logger = LoggerManager(script_name=__file__).get_logger()
+    load_modules(['etl.pipeline'])
+    from etl.pipeline import StreamingPipeline, CHUNK_SIZE
+
+    chunk_size = chunk_size or CHUNK_SIZE
+    if data_lake is None:
+        data_lake = settings.get_bool('DATA_LAKE_ENABLED', False)
+    checkpoint = open_checkpoint(resume, logger)
+    error = None
+
+    try:
+        logger.info(f"Iniciando el proceso ETL en streaming (bloques de {chunk_size} películas).")
+        print(f"Iniciando el proceso ETL en streaming (bloques de {chunk_size} películas).")
+
+        with stage('streaming') as metrics:
+            stats = StreamingPipeline(chunk_size=chunk_size, full_refresh=full_refresh, checkpoint=checkpoint,
+                                      data_lake=open_data_lake(data_lake, logger)).run()
+            metrics.rows_in = stats['extracted']
+            metrics.rows_out = stats['loaded']
+
+        logger.info(f"Proceso ETL en streaming completado exitosamente: {stats}.")
+        print(f"Proceso ETL en streaming completado exitosamente: {stats}.")
+        return 0
+    except Exception as e:
+        error = e
+        logger.critical(f"Error crítico en el proceso ETL en streaming: {e}", exc_info=True)
+        print(f"Error crítico en el proceso ETL en streaming: {e}")
+        return 1
+    finally:
+        close_checkpoint(checkpoint, logger, error)
+        write_run_report(logger)
+
+
+def main(full_refresh: bool = False, resume: bool = False, workers: int = None, data_lake: bool = None) -> int:
+    logger = LoggerManager(script_name=__file__).get_logger()
+    from etl.loader import Loader
+    from etl.transformer import Transformer
+    from utils.clean_data import CleanerValidator
+
+    workers = settings.get_int('PARALLEL_WORKERS', 1) if workers is None else workers
+    # Más procesos que CPU solo reparten el mismo tiempo de CPU y añaden el arranque y la unión
+    cpus = len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else os.cpu_count() or 1
+    if workers > cpus:
+        logger.warning(f"Se pidieron {workers} procesos y hay {cpus} CPU disponibles: se usarán {cpus}.")
+        workers = cpus
+    if data_lake is None:
+        data_lake = settings.get_bool('DATA_LAKE_ENABLED', False)
+    checkpoint = open_checkpoint(resume, logger)
+    data_lake = open_data_lake(data_lake, logger)
+    error = None
+
+    try:
+        logger.info("Iniciando el proceso ETL.")
+        print("Iniciando el proceso ETL.")
+
+        movies, movie_details = extract_stage(full_refresh, checkpoint, logger)
+        if movies is None:
+            return 0
+        if data_lake:
+            data_lake.write_raw(movies, movie_details)
+
+        if workers > 1:
+            # Limpieza, validación y transformación en varios procesos por rangos de movie_id
+            try:
+                load_modules(['etl.parallel'])
+                from etl.parallel import ParallelCleanTransform
+
+                logger.info(f"Limpiando, validando y transformando los datos con {workers} procesos.")
+                print(f"Limpiando, validando y transformando los datos con {workers} procesos.")
+
+                with stage('clean_transform', rows_in=len(movies) + len(movie_details)) as metrics:
+                    parallel = ParallelCleanTransform(workers=workers)
+                    transformed_data = parallel.run(movies, movie_details)
+                    related = parallel.related
+                    metrics.rows_out = len(transformed_data)
+
+                logger.info(f"Datos transformados con éxito. Total de registros: {len(transformed_data)}.")
+                print(f"Datos transformados con éxito. Total de registros: {len(transformed_data)}.")
+            except Exception as e:
+                logger.error(f"Error durante la limpieza y transformación de los datos: {e}", exc_info=True)
+                print(f"Error durante la limpieza y transformación de los datos: {e}")
+                raise
+        else:
+            # Limpieza y validación
+            try:
+                logger.info("Limpiando y validando los datos.")
+                print("Limpiando y validando los datos.")
+
+                with stage('clean', rows_in=len(movies) + len(movie_details)) as metrics:
+                    cleaner_validator = CleanerValidator()
+                    data = cleaner_validator.clean_and_validate(movies, movie_details)
+                    metrics.rows_out = len(data)
+
+                logger.info(f"Datos limpiados y validados: {len(data)} registros.")
+                print(f"Datos limpiados y validados: {len(data)} registros.")
+            except Exception as e:
+                logger.error(f"Error durante la limpieza y validación de los datos: {e}", exc_info=True)
+                print(f"Error durante la limpieza y validación de los datos: {e}")
+                raise
+
+            # Transformación
+            try:
+                logger.info("Transformando los datos.")
+                print("Transformando los datos.")
+
+                with stage('transform', rows_in=len(data)) as metrics:
+                    transformer = Transformer()
+                    transformed_data = transformer.transform_data(data)
+                    metrics.rows_out = len(transformed_data)
+                related = cleaner_validator.related
+
+                logger.info(f"Datos transformados con éxito. Total de registros: {len(transformed_data)}.")
+                print(f"Datos transformados con éxito. Total de registros: {len(transformed_data)}.")
+            except Exception as e:
+                logger.error(f"Error durante la transformación de los datos: {e}", exc_info=True)
+                print(f"Error durante la transformación de los datos: {e}")
+                raise
+
+        if data_lake:
+            from etl.data_lake import TRANSFORMED
+
+            data_lake.write(TRANSFORMED, transformed_data)
 
         # Carga
         try:
             logger.info("Cargando datos transformados en la base de datos.")
             print("Cargando datos transformados en la base de datos.")
 
-            loader = Loader()
-            loader.load_to_postgres(transformed_data)
+            with stage('load', rows_in=len(transformed_data)) as metrics:
+                loader = Loader()
+                changes = loader.load_to_postgres(transformed_data, related=related)
+                metrics.rows_out = len(transformed_data)
+                # Las películas pedidas sin detalles o descartadas en la validación esperan antes de volver a pedirse
+                loader.mark_attempted(movies.loc[~movies['id'].isin(transformed_data['movie_id']), 'id'])
 
-            logger.info("Datos cargados en la base de datos con éxito.")
-            print("Datos cargados en la base de datos con éxito.")
+            logger.info(f"Datos cargados en la base de datos con éxito: {changes['inserted']} nuevos, "
+                        f"{changes['updated']} modificados, {changes['unchanged']} sin cambios.")
+            print(f"Datos cargados en la base de datos con éxito: {changes['inserted']} nuevos, "
+                  f"{changes['updated']} modificados, {changes['unchanged']} sin cambios.")
         except Exception as e:
             logger.error(f"Error durante la carga de datos en la base de datos: {e}", exc_info=True)
             print(f"Error durante la carga de datos en la base de datos: {e}")
@@ -80,11 +504,38 @@ def main():
 
         logger.info("Proceso ETL completado exitosamente.")
         print("Proceso ETL completado exitosamente.")
+        return 0
 
     except Exception as e:
+        error = e
         logger.critical(f"Error crítico en el proceso ETL: {e}", exc_info=True)
         print(f"Error crítico en el proceso ETL: {e}")
+        return 1
+    finally:
+        close_checkpoint(checkpoint, logger, error)
+        write_run_report(logger)
 
 
 if __name__ == "__main__":
-    main()
+    args = parse_args()
+    load_modules(COMMAND_MODULES[args.command])
+    # Cada subcomando devuelve 0 si termina bien y 1 si falla, para que cron o k8s detecten el error
+    if args.command == 'check':
+        exit_code = main_check(connect=args.connect)
+    else:
+        run_instrumentation.profile_stages.update(args.profile)
+        if args.command == 'extract':
+            exit_code = main_extract(full_refresh=args.full_refresh, resume=args.resume)
+        elif args.command == 'replay':
+            exit_code = main_replay(args.date, run_id=args.run_id, release_years=args.release_years, load=args.load)
+        elif args.command == 'load':
+            exit_code = main_load(input_path=args.input, lake_date=args.from_lake, run_id=args.run_id)
+        elif args.stream:
+            exit_code = main_streaming(full_refresh=args.full_refresh, chunk_size=args.chunk_size,
+                                       resume=args.resume, data_lake=args.data_lake)
+        else:
+            exit_code = main(full_refresh=args.full_refresh, resume=args.resume, workers=args.workers,
+                             data_lake=args.data_lake)
+    if args.import_times:
+        print_import_times()
+    sys.exit(exit_code)
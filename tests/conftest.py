@@ -0,0 +1,19 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Sin volcados de depuración durante las pruebas
+os.environ['DEBUG_SINK_ENABLED'] = 'false'
+
+
+@pytest.fixture(autouse=True, scope='session')
+def workdir(tmp_path_factory):
+    # Logs, informes y cachés de las pruebas en un directorio temporal, no en el repositorio
+    previous = os.getcwd()
+    os.chdir(tmp_path_factory.mktemp('run'))
+    yield
+    os.chdir(previous)
@@ -0,0 +1,56 @@
+import pandas as pd
+import pytest
+
+pytest.importorskip('pyarrow')
+
+from benchmarks.synthetic_data import make_raw_frames
+from etl.data_lake import DataLake, RAW_DETAILS, RAW_MOVIES, TRANSFORMED
+from etl.transformer import Transformer
+from utils.clean_data import CleanerValidator
+
+RUN_COLUMNS = ['run_id', 'run_date', 'release_year']
+
+
+def test_nested_columns_survive_null_first_write_and_new_columns(tmp_path):
+
+    movies, details = make_raw_frames(400, seed=5, subresources=True)
+    first, second = details.iloc[:200].copy(), details.iloc[200:]
+    # Primer bloque sin créditos en ninguna película y sin la columna keywords
+    first['credits'] = None
+    first = first.drop(columns=['keywords'])
+
+    # Primer bloque de películas con una columna de texto completamente nula
+    movies = movies.astype({'title': 'string'})
+    movies.loc[movies.index[:100], 'title'] = pd.NA
+
+    lake = DataLake(path=str(tmp_path))
+    lake.write(RAW_MOVIES, movies.iloc[:100])
+    lake.write(RAW_MOVIES, movies.iloc[100:])
+    lake.write_details(first, movies)
+    lake.write_details(second, movies)
+    stored = lake.read(RAW_DETAILS).drop(columns=RUN_COLUMNS)
+
+    assert stored['credits'].iloc[:200].isna().all() and stored['keywords'].iloc[:200].isna().all()
+    assert stored['credits'].iloc[200:].tolist() == second['credits'].tolist()
+    assert stored['keywords'].iloc[200:].tolist() == second['keywords'].tolist()
+
+    assert lake.read(RAW_MOVIES)['title'].isna().sum() == 100
+
+    # El reproceso desde el data lake da la misma salida que el proceso directo
+    direct_details = pd.concat([first.assign(keywords=None), second], ignore_index=True)
+    expected = Transformer().transform_data(CleanerValidator().clean_and_validate(movies, direct_details))
+    replayed, _, _ = lake.replay(lake.run_date, lake.run_id)
+    pd.testing.assert_frame_equal(replayed, expected, check_exact=True)
+
+
+def test_transformed_round_trip_keeps_values_order_and_dtypes(tmp_path):
+
+    movies, details = make_raw_frames(500, seed=6)
+    transformed = Transformer().transform_data(CleanerValidator().clean_and_validate(movies, details))
+
+    lake = DataLake(path=str(tmp_path))
+    lake.write(TRANSFORMED, transformed.iloc[:100])
+    lake.write(TRANSFORMED, transformed.iloc[100:])
+    stored = lake.read(TRANSFORMED).drop(columns=RUN_COLUMNS)
+
+    pd.testing.assert_frame_equal(stored, transformed.reset_index(drop=True), check_categorical=False)
@@ -0,0 +1,61 @@
+import threading
+
+import pytest
+
+from benchmarks.stub_tmdb_server import build_movie
+from etl.extractor import Extractor
+
+TOTAL_PAGES = {'popular': 4, 'top_rated': 2, 'upcoming': 3}
+
+
+class PagedExtractor(Extractor):
+    # _fetch_list_page sin HTTP: cada página tarda hasta que se libera su evento
+    def __init__(self, max_workers: int, released=()):
+
+        super().__init__(max_workers=max_workers, use_cache=False)
+        self.events = {(list_name, page): threading.Event()
+                       for list_name, total in TOTAL_PAGES.items() for page in range(1, total + 1)}
+        for task in released or self.events:
+            self.events[task].set()
+        self.fetched = []
+
+    def _fetch_list_page(self, list_name: str, page: int) -> dict:
+
+        if not self.events[(list_name, page)].wait(timeout=5):
+            raise TimeoutError(f"{list_name} {page} no se liberó")
+        self.fetched.append((list_name, page))
+        movie_id = len(TOTAL_PAGES) * 100 * page + list(TOTAL_PAGES).index(list_name)
+        return {'total_pages': TOTAL_PAGES[list_name], 'results': [build_movie(movie_id)]}
+
+
+@pytest.mark.parametrize('max_workers', [1, 4])
+def test_list_pages_are_yielded_in_list_and_page_order(max_workers):
+
+    extractor = PagedExtractor(max_workers)
+    pages = [(list_name, page) for list_name, page, _ in extractor._iter_list_pages(TOTAL_PAGES, max_pages=0)]
+    assert pages == [(list_name, page) for list_name, total in TOTAL_PAGES.items() for page in range(1, total + 1)]
+
+    extractor = PagedExtractor(max_workers)
+    pages = [(list_name, page) for list_name, page, _ in extractor._iter_list_pages(TOTAL_PAGES, pages=[2, 1])]
+    assert pages == [(list_name, page) for list_name in TOTAL_PAGES for page in (2, 1)]
+
+
+def test_first_page_is_yielded_before_the_rest_are_fetched():
+
+    # Solo la primera página de 'popular' está disponible: debe entregarse sin esperar al resto
+    extractor = PagedExtractor(max_workers=4, released=[('popular', 1)])
+    pages = extractor._iter_list_pages(TOTAL_PAGES, max_pages=0)
+    list_name, page, results = next(pages)
+    assert (list_name, page) == ('popular', 1) and results
+    assert extractor.fetched == [('popular', 1)]
+
+    for event in extractor.events.values():
+        event.set()
+    assert len(list(pages)) == sum(TOTAL_PAGES.values()) - 1
+
+
+def test_iter_movie_pages_matches_extract_movies():
+
+    frames = list(PagedExtractor(max_workers=4).iter_movie_pages(lists=TOTAL_PAGES))
+    movies = PagedExtractor(max_workers=4).extract_movies(lists=TOTAL_PAGES)
+    assert [frame['id'].iloc[0] for frame in frames] == movies['id'].tolist()
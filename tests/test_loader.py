@@ -0,0 +1,252 @@
+import io
+import os
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+import psycopg2
+
+from benchmarks.synthetic_data import make_raw_frames, make_transformed_frame
+from etl.loader import (
+    compute_content_hash, compute_related_hash, DataFrameCsvStream, Loader, _prepare_copy_frame, read_artifact,
+    RELATED_TABLES
+)
+import etl.loader as loader_module
+import utils.schema
+from etl.transformer import Transformer
+from utils.clean_data import CleanerValidator
+
+
+def copy_frame(rows: int) -> pd.DataFrame:
+
+    df = make_transformed_frame(rows)
+    df['content_hash'] = compute_content_hash(df)
+    return _prepare_copy_frame(df)
+
+
+def test_csv_stream_reads_are_chunk_independent():
+
+    frame = copy_frame(1000)
+    expected = frame.to_csv(index=False, header=False, na_rep='\\N', date_format='%Y-%m-%d')
+    for size in (1, 13, 8192, 10 ** 7):
+        stream = DataFrameCsvStream(frame, chunk_size=97)
+        parts = []
+        while True:
+            data = stream.read(size)
+            if not data:
+                break
+            assert len(data) <= size
+            parts.append(data)
+        assert ''.join(parts) == expected
+    assert DataFrameCsvStream(frame, chunk_size=97).read() == expected
+
+
+class StoredHashes:
+    # DatabaseManager mínimo para _detect_changes: fetch_all devuelve las huellas guardadas
+    def __init__(self, rows):
+
+        self.rows = rows
+
+    def fetch_all(self, query, params):
+
+        return [row for row in self.rows if row[0] in params[0]]
+
+
+def transformed_frame(rows: int) -> pd.DataFrame:
+
+    movies, details = make_raw_frames(rows, seed=7)
+    return Transformer().transform_data(CleanerValidator().clean_and_validate(movies, details))
+
+
+def test_content_hash_survives_dtype_and_csv_round_trip(tmp_path):
+
+    df = transformed_frame(500)
+    expected = compute_content_hash(df)
+
+    # Tipos sin compactar, como los de una salida anterior a enforce_schema
+    loose = df.astype({'rating_category': str, 'genres': str, 'title': object, 'vote_count': 'int64',
+                       'rating': 'float64', 'budget_usd': 'float64'})
+    np.testing.assert_array_equal(compute_content_hash(loose), expected)
+
+    path = os.path.join(tmp_path, 'movies_transformed.csv')
+    df.to_csv(path, index=False)
+    np.testing.assert_array_equal(compute_content_hash(read_artifact(path)), expected)
+
+    changed = df.copy()
+    changed.loc[changed.index[3], 'vote_count'] += 1
+    assert (compute_content_hash(changed) != expected).sum() == 1
+
+
+def test_detect_changes_counts():
+
+    df = make_transformed_frame(200)
+    df = df.assign(content_hash=compute_content_hash(df))
+    stored = list(zip(df['movie_id'].tolist(), df['content_hash'].tolist()))
+    # 150 guardadas: 20 con otra huella, 130 iguales; las 50 restantes son nuevas
+    stored = [(movie_id, value + 1 if index < 20 else value) for index, (movie_id, value) in enumerate(stored[:150])]
+
+    changed, stats = Loader()._detect_changes(StoredHashes(stored), df)
+
+    assert stats == {'inserted': 50, 'updated': 20, 'unchanged': 130}
+    assert sorted(changed['movie_id']) == sorted(df['movie_id'].iloc[list(range(20)) + list(range(150, 200))])
+
+
+def test_related_hash_detects_changed_movies_only():
+
+    movies, details = make_raw_frames(300, seed=3, subresources=True)
+    cleaner_validator = CleanerValidator()
+    df = Transformer().transform_data(cleaner_validator.clean_and_validate(movies, details))
+    related = cleaner_validator.related
+    expected = compute_related_hash(df['movie_id'], related)
+
+    # El orden de las filas y los tipos compactos no cambian la huella
+    shuffled = {name: frame.sample(frac=1, random_state=0).astype({'movie_id': 'int64'})
+                for name, frame in related.items()}
+    pd.testing.assert_series_equal(compute_related_hash(df['movie_id'], shuffled), expected)
+
+    credits = related['movie_credits'].copy()
+    movie_id = int(credits['movie_id'].iloc[0])
+    credits.loc[credits.index[0], 'name'] = 'Otra persona'
+    changed = compute_related_hash(df['movie_id'], {**related, 'movie_credits': credits})
+    assert changed.index[changed.ne(expected)].tolist() == [movie_id]
+
+    stored = [(int(movie_id), int(value)) for movie_id, value in expected.items()]
+    stored = stored[:-1]  # la última película aún no tiene huella guardada
+    loader = Loader()
+    assert loader._detect_related_changes(StoredHashes(stored), expected) == [int(expected.index[-1])]
+    assert loader._detect_related_changes(StoredHashes(stored), changed) == [movie_id, int(expected.index[-1])]
+
+
+class FailingRefresh:
+    # DatabaseManager cuyo REFRESH falla, como con una vista bloqueada o sin su índice único
+    def execute_query(self, query, params=None):
+
+        raise psycopg2.OperationalError('could not refresh')
+
+    def close(self):
+        pass
+
+
+def test_refresh_failure_does_not_fail_the_load(monkeypatch):
+
+    monkeypatch.setattr(loader_module, 'DatabaseManager', FailingRefresh)
+    assert Loader().refresh_views() is False
+
+
+class RecordingDatabase:
+    # DatabaseManager en memoria: registra cada sentencia y guarda las huellas de etl_schema
+    statements = []
+    fingerprints = {}
+    stored_hashes = []
+    copies = {}
+
+    def fetch_all(self, query, params=None):
+
+        RecordingDatabase.statements.append(query)
+        if 'to_regclass' in query:
+            return [(bool(RecordingDatabase.fingerprints),)]
+        if 'FROM etl_schema' in query:
+            return list(RecordingDatabase.fingerprints.items())
+        if 'FROM movies' in query:
+            return RecordingDatabase.stored_hashes
+        return []
+
+    def execute(self, query, params=None):
+
+        # execute_batch envía las sentencias ya formateadas como bytes
+        query = query.decode() if isinstance(query, bytes) else query
+        RecordingDatabase.statements.append(query)
+        if 'INSERT INTO etl_schema' in query:
+            RecordingDatabase.fingerprints[params[0]] = params[1]
+
+    def mogrify(self, query, params=None):
+
+        return query.encode()
+
+    def copy_expert(self, query, stream):
+
+        RecordingDatabase.copies[query.split()[1]] = stream.read()
+
+    @contextmanager
+    def transaction(self):
+        yield self
+
+    @contextmanager
+    def cursor(self):
+        yield self
+
+    def close(self):
+        pass
+
+
+def is_ddl(query: str) -> bool:
+
+    return any(keyword in query.upper() for keyword in ('CREATE ', 'ALTER ', 'DROP '))
+
+
+def test_schema_ddl_runs_once_and_not_in_loads(monkeypatch):
+
+    monkeypatch.setattr(loader_module, 'DatabaseManager', RecordingDatabase)
+    monkeypatch.setattr(Loader, '_schema_ready', False)
+    RecordingDatabase.statements, RecordingDatabase.fingerprints = [], {}
+
+    Loader().ensure_schema()
+    assert any(is_ddl(query) for query in RecordingDatabase.statements)
+    assert set(RecordingDatabase.fingerprints) == {name for name, _ in loader_module.SCHEMA_COMPONENTS}
+
+    # Otro proceso con el esquema al día: solo lee las huellas
+    monkeypatch.setattr(Loader, '_schema_ready', False)
+    RecordingDatabase.statements = []
+    loader = Loader()
+    loader.ensure_schema()
+    assert not any(is_ddl(query) for query in RecordingDatabase.statements)
+
+    # Las consultas de vigencia y las cargas no ejecutan DDL
+    df = make_transformed_frame(50)
+    RecordingDatabase.stored_hashes = list(zip(df['movie_id'].tolist(), compute_content_hash(df).tolist()))
+    loader.get_fresh_movie_ids(df['movie_id'])
+    assert loader.load_to_postgres(df, mode='batch') == {'inserted': 0, 'updated': 0, 'unchanged': 50}
+    assert RecordingDatabase.statements and not any(is_ddl(query) for query in RecordingDatabase.statements)
+
+
+def test_related_copy_writes_integers_without_compact_dtypes(monkeypatch):
+
+    monkeypatch.setattr(utils.schema, 'COMPACT_DTYPES', False)
+    movies, details = make_raw_frames(200, seed=9, subresources=True)
+    cleaner_validator = CleanerValidator()
+    cleaner_validator.clean_and_validate(movies, details)
+    related = cleaner_validator.related
+    # El equipo técnico no tiene orden de reparto: sin tipos compactos la columna queda en float64
+    assert related['movie_credits']['cast_order'].dtype == 'float64'
+
+    RecordingDatabase.copies = {}
+    loader = Loader()
+    for name, frame in related.items():
+        loader._load_related(RecordingDatabase(), [1], RELATED_TABLES[name], frame, mode='copy')
+
+    for name, table in RELATED_TABLES.items():
+        copied = pd.read_csv(io.StringIO(RecordingDatabase.copies[f"{name}_staging"]), header=None,
+                             names=table.columns, dtype=str, keep_default_na=False)
+        assert len(copied) == len(related[name])
+        for column in table.integer_columns:
+            assert copied[column].str.fullmatch(r'-?\d+|\\N').all(), (name, column)
+
+
+def test_analytics_views_are_recreated_when_their_definition_changes(monkeypatch):
+
+    monkeypatch.setattr(loader_module, 'DatabaseManager', RecordingDatabase)
+    monkeypatch.setattr(Loader, '_schema_ready', False)
+    RecordingDatabase.statements, RecordingDatabase.fingerprints = [], {}
+    Loader().ensure_schema()
+
+    # Otro límite del ranking de márgenes, como al cambiar ANALYTICS_TOP_PROFIT_LIMIT entre ejecuciones
+    components = dict(loader_module.SCHEMA_COMPONENTS)
+    components['analytics'] = components['analytics'].replace(f"LIMIT {loader_module.TOP_PROFIT_LIMIT};", 'LIMIT 5;')
+    monkeypatch.setattr(loader_module, 'SCHEMA_COMPONENTS', tuple(components.items()))
+    monkeypatch.setattr(Loader, '_schema_ready', False)
+    RecordingDatabase.statements = []
+    Loader().ensure_schema()
+
+    executed = ''.join(RecordingDatabase.statements)
+    assert 'ALTER TABLE' not in executed
+    assert executed.index('DROP MATERIALIZED VIEW IF EXISTS mv_top_profit_margins') < executed.index('LIMIT 5;')
@@ -0,0 +1,64 @@
+import os
+import subprocess
+import sys
+
+import etl.loader
+import main
+from benchmarks.synthetic_data import make_transformed_frame
+from utils.save_csv_debug import chunk_suffix, DebugSink, is_chunk_artifact, is_sampled_artifact
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class RecordingLoader:
+    # Loader sin base de datos: guarda los argumentos de cada carga
+    calls = []
+
+    def load_to_postgres(self, df, **kwargs):
+
+        RecordingLoader.calls.append((len(df), kwargs))
+        return {'inserted': len(df), 'updated': 0, 'unchanged': 0}
+
+
+def test_partial_artifacts_are_recognized_by_name():
+
+    assert is_sampled_artifact('output/movies_transformed_sample.csv')
+    assert is_sampled_artifact(f"movies_transformed{chunk_suffix(3)}_sample.csv.gz")
+    assert not is_sampled_artifact('movies_transformed.parquet')
+    assert is_chunk_artifact(f"output/movies_transformed{chunk_suffix(12)}.csv")
+    assert is_chunk_artifact(f"movies_transformed{chunk_suffix(12)}_sample.feather")
+    assert not is_chunk_artifact('movies_transformed.csv')
+
+
+def test_debug_sink_marks_samples(tmp_path):
+
+    df = make_transformed_frame(50)
+    sink = DebugSink(file_format='csv', sample_rows=10)
+    sink.submit(df, str(tmp_path), 'movies_transformed.csv')
+    sink.submit(df.head(5), str(tmp_path), 'movies_zero_budget.csv')
+    sink.close()
+    assert sorted(os.listdir(tmp_path)) == ['movies_transformed_sample.csv', 'movies_zero_budget.csv']
+
+
+def test_load_refuses_samples_and_keeps_fetch_state(tmp_path, monkeypatch):
+
+    monkeypatch.setattr(etl.loader, 'Loader', RecordingLoader)
+    df = make_transformed_frame(20)
+    sample = os.path.join(tmp_path, 'movies_transformed_sample.csv')
+    complete = os.path.join(tmp_path, 'movies_transformed.csv')
+    df.to_csv(sample, index=False)
+    df.to_csv(complete, index=False)
+
+    assert main.main_load(input_path=sample) == 1
+    assert RecordingLoader.calls == []
+    assert main.main_load(input_path=complete) == 0
+    assert RecordingLoader.calls == [(20, {'mark_fetched': False})]
+
+
+def test_failed_command_exits_with_error(tmp_path):
+
+    env = dict(os.environ, DEBUG_SINK_ENABLED='false')
+    missing = os.path.join(tmp_path, 'missing.csv')
+    result = subprocess.run([sys.executable, os.path.join(ROOT, 'main.py'), 'load', '--input', missing],
+                            cwd=tmp_path, env=env, capture_output=True, text=True)
+    assert result.returncode == 1
@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic_data import make_raw_frames
+from etl.parallel import first_positions, ParallelCleanTransform
+from etl.transformer import Transformer
+from utils.clean_data import CleanerValidator
+from utils.logger_manager import _get_backend
+
+
+def log_lines(logger_name: str, text: str) -> int:
+
+    handler = _get_backend().router._handlers[logger_name]
+    handler.flush()
+    try:
+        with open(handler.baseFilename, encoding='utf-8') as file:
+            return sum(text in line for line in file)
+    except FileNotFoundError:
+        return 0
+
+
+@pytest.mark.parametrize('start_method', ['forkserver', 'spawn'])
+def test_parallel_output_and_worker_logs(start_method):
+
+    movies, details = make_raw_frames(3000, subresources=True)
+    details = details.sample(frac=1, random_state=0).reset_index(drop=True)
+    cleaner_validator = CleanerValidator()
+    expected = Transformer().transform_data(cleaner_validator.clean_and_validate(movies, details))
+
+    parallel = ParallelCleanTransform(workers=3, min_rows=0, start_method=start_method)
+    before = log_lines('clean_data', 'Seleccionando columnas necesarias')
+    result = parallel.run(movies, details)
+
+    pd.testing.assert_frame_equal(expected, result, check_exact=True)
+    for table, frame in cleaner_validator.related.items():
+        pd.testing.assert_frame_equal(frame, parallel.related[table], check_exact=True, obj=table)
+    # Cada proceso hijo registra su limpieza en el archivo de log del proceso principal
+    assert log_lines('clean_data', 'Seleccionando columnas necesarias') - before == 3
+
+
+def test_fork_is_rejected():
+
+    with pytest.raises(ValueError):
+        ParallelCleanTransform(workers=2, start_method='fork')
+
+
+def test_first_positions_with_dense_and_sparse_ids():
+
+    dense = pd.Series([5, 3, 5, 9, 3, 4])
+    sparse = dense * 10 ** 9  # rango demasiado amplio para la tabla indexada por ID
+    expected = np.array([1, 0, 5, 3, 1])
+    for source in (dense, sparse):
+        positions = first_positions(source)
+        np.testing.assert_array_equal(positions(source.to_numpy()[[1, 0, 5, 3, 4]]), expected)
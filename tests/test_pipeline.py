@@ -0,0 +1,79 @@
+import threading
+
+from benchmarks.synthetic_data import make_raw_frames
+from etl.pipeline import StreamingPipeline
+
+PAGE_SIZE = 50
+
+
+class PagedSource:
+    # Extractor sin HTTP: páginas de listas y detalles sacados de los mismos datos sintéticos
+    def __init__(self, rows: int):
+
+        self.movies, self.details = make_raw_frames(rows, seed=11, duplicate_fraction=0, invalid_fraction=0)
+        self.detail_requests = []
+        self.second_chunk = threading.Event()
+
+    def iter_movie_pages(self, pages=None):
+
+        for offset in range(0, len(self.movies), PAGE_SIZE):
+            yield self.movies.iloc[offset:offset + PAGE_SIZE]
+
+    def iter_movie_details(self, movie_ids, batch_size: int):
+
+        movie_ids = list(movie_ids)
+        self.detail_requests.append(movie_ids)
+        if len(self.detail_requests) == 2:
+            self.second_chunk.set()
+        yield self.details[self.details['id'].isin(movie_ids)]
+
+
+class BlockingLoader:
+    # La carga del primer bloque no termina hasta que se extraen los detalles del segundo
+    def __init__(self, source: PagedSource):
+
+        self.source = source
+        self.loads = []
+        self.loaded_ids = []
+        self.attempted_ids = []
+        self.overlapped = None
+
+    def ensure_schema(self):
+        pass
+
+    def get_fresh_movie_ids(self, movie_ids):
+
+        return set()
+
+    def load_to_postgres(self, df, **kwargs):
+
+        self.loads.append(len(df))
+        self.loaded_ids += df['movie_id'].tolist()
+        if len(self.loads) == 1:
+            # Sin solapamiento, el segundo bloque no se pediría hasta que esta carga terminase
+            self.overlapped = self.source.second_chunk.wait(timeout=5)
+        return {'inserted': len(df), 'updated': 0, 'unchanged': 0}
+
+    def mark_attempted(self, movie_ids):
+
+        self.attempted_ids += list(movie_ids)
+
+    def refresh_views(self):
+
+        return True
+
+
+def test_next_chunk_is_extracted_while_the_previous_one_loads():
+
+    pipeline = StreamingPipeline(chunk_size=100)
+    pipeline.extractor = source = PagedSource(300)
+    pipeline.loader = loader = BlockingLoader(source)
+
+    stats = pipeline.run()
+
+    assert loader.overlapped is True
+    assert stats['chunks'] == 3 and len(loader.loads) == 3
+    assert stats['loaded'] == sum(loader.loads)
+    # Las películas descartadas en la validación quedan registradas para reintentarse más tarde
+    assert loader.attempted_ids and not set(loader.attempted_ids) & set(loader.loaded_ids)
+    assert sorted(loader.attempted_ids + loader.loaded_ids) == sorted(source.movies['id'])
@@ -0,0 +1,94 @@
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic_data import make_raw_frames
+from utils.clean_data import (
+    CleanerValidator, DETAIL_COLUMNS, DETAIL_RULES, MIN_VOTE_COUNT, MOVIE_COLUMNS, MOVIE_RULES
+)
+
+NOW = datetime(2024, 6, 1)
+
+
+def legacy_movie_rules(movies: pd.DataFrame, now: datetime):
+    # Filtros secuenciales de CleanerValidator antes del RuleEngine: {regla: índices descartados}, filas finales
+    discarded = {}
+    discarded['duplicated_id'] = movies.index[movies.duplicated(subset=['id'])]
+    movies = movies.drop_duplicates(subset=['id'])
+    discarded['invalid_date'] = movies.index[movies['release_date'].isna()]
+    movies = movies[movies['release_date'].notna()]
+    discarded['future_date'] = movies.index[movies['release_date'] > now]
+    movies = movies[movies['release_date'] <= now]
+    discarded['low_votes'] = movies.index[movies['vote_count'] < MIN_VOTE_COUNT]
+    movies = movies[movies['vote_count'] >= MIN_VOTE_COUNT]
+    return discarded, movies
+
+
+def legacy_detail_rules(details: pd.DataFrame):
+
+    discarded = {'duplicated_id': details.index[details.duplicated(subset=['id'])]}
+    details = details.drop_duplicates(subset=['id'])
+    # El presupuesto faltante se informaba sin descartar la fila
+    return discarded, details.index[details['budget'].isna()], details
+
+
+def random_frames(seed: int):
+
+    movies, details = make_raw_frames(3000, seed=seed, duplicate_fraction=0.05, invalid_fraction=0.1)
+    rng = np.random.default_rng(seed)
+    # Más películas con pocos votos que en los datos sintéticos por defecto
+    low = rng.random(len(movies)) < 0.1
+    movies.loc[low, 'vote_count'] = rng.integers(0, 2 * MIN_VOTE_COUNT, int(low.sum()))
+    movies = movies[MOVIE_COLUMNS].copy()
+    movies['release_date'] = pd.to_datetime(movies['release_date'], format='%Y-%m-%d', errors='coerce')
+    return movies, details[DETAIL_COLUMNS].copy()
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_movie_rules_match_sequential_filters(seed):
+
+    movies, _ = random_frames(seed)
+    legacy_discarded, legacy_clean = legacy_movie_rules(movies, NOW)
+    clean, rejects, counts = MOVIE_RULES.evaluate(movies, {'now': NOW})
+
+    pd.testing.assert_frame_equal(clean, legacy_clean)
+    dropped = rejects[rejects['dropped']]
+    assert set(dropped.index) == set().union(*map(set, legacy_discarded.values()))
+    # Cada descarte secuencial aparece con su regla entre los motivos del RuleEngine
+    for rule, index in legacy_discarded.items():
+        assert rejects.loc[index, 'reject_reason'].str.split('; ').map(lambda reasons: rule in reasons).all()
+        assert counts[rule] >= len(index)
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_detail_rules_match_sequential_filters(seed):
+
+    _, details = random_frames(seed)
+    legacy_discarded, legacy_missing_budget, legacy_clean = legacy_detail_rules(details)
+    clean, rejects, counts = DETAIL_RULES.evaluate(details, {'now': NOW})
+
+    pd.testing.assert_frame_equal(clean, legacy_clean)
+    assert set(rejects.index[rejects['dropped']]) == set(legacy_discarded['duplicated_id'])
+    assert set(legacy_missing_budget) <= set(rejects.index[rejects['reject_reason'].str.contains('missing_budget')])
+    assert counts['duplicated_id'] == len(legacy_discarded['duplicated_id'])
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_clean_and_validate_keeps_the_same_movies(seed):
+
+    movies, details = make_raw_frames(2000, seed=seed, duplicate_fraction=0.05, invalid_fraction=0.1)
+    _, legacy_movies = legacy_movie_rules(
+        movies[MOVIE_COLUMNS].assign(release_date=pd.to_datetime(movies['release_date'], errors='coerce')),
+        datetime.now())
+    _, _, legacy_details = legacy_detail_rules(details[DETAIL_COLUMNS])
+    legacy = pd.merge(legacy_movies, legacy_details, on='id')
+    legacy_genres = legacy['genres'].map(lambda value: ', '.join(g['name'] for g in value) if value else 'Unknown')
+
+    result = CleanerValidator().clean_and_validate(movies, details)
+
+    assert result['id'].tolist() == legacy['id'].tolist()
+    assert result['title'].astype(str).tolist() == legacy['title'].str.title().tolist()
+    assert result['genres'].astype(str).tolist() == legacy_genres.tolist()
+    assert result['budget'].tolist() == legacy['budget'].fillna(0).astype(int).tolist()
@@ -0,0 +1,168 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+from utils.settings import settings
+
+CHECKPOINT_ENABLED = settings.get_bool('CHECKPOINT_ENABLED', True)
+CHECKPOINT_PATH = settings.get('CHECKPOINT_PATH', os.path.join('cache', 'checkpoint.sqlite'))
+
+
+class CheckpointStore:
+    """Progreso de una ejecución en SQLite: páginas de listas, detalles por película y bloques cargados.
+
+    Con resume=True se retoma la última ejecución no completada; si no, se descarta el estado
+    anterior y se empieza una ejecución nueva. La carga es idempotente gracias al upsert por
+    movie_id, por lo que repetir un bloque interrumpido no duplica datos.
+    """
+
+    def __init__(self, path: str = CHECKPOINT_PATH, resume: bool = False):
+
+        self.path = path
+        self._lock = threading.Lock()
+        self._stats = {'pages_reused': 0, 'details_reused': 0, 'chunks_skipped': 0,
+                       'pages_saved': 0, 'details_saved': 0, 'chunks_saved': 0}
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # Con WAL, synchronous=NORMAL mantiene la consistencia ante caídas del proceso sin un fsync por escritura
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS runs (
+                run_id TEXT PRIMARY KEY,
+                status TEXT,
+                started_at REAL,
+                updated_at REAL,
+                error TEXT
+            );
+            CREATE TABLE IF NOT EXISTS pages (
+                run_id TEXT,
+                list_name TEXT,
+                page INTEGER,
+                payload TEXT,
+                PRIMARY KEY (run_id, list_name, page)
+            );
+            CREATE TABLE IF NOT EXISTS details (
+                run_id TEXT,
+                movie_id INTEGER,
+                payload TEXT,
+                PRIMARY KEY (run_id, movie_id)
+            );
+            CREATE TABLE IF NOT EXISTS chunks (
+                run_id TEXT,
+                chunk_key TEXT,
+                loaded_at REAL,
+                PRIMARY KEY (run_id, chunk_key)
+            );
+        """)
+
+        previous = None
+        if resume:
+            previous = self._conn.execute(
+                "SELECT run_id FROM runs WHERE status != 'completed' ORDER BY started_at DESC LIMIT 1"
+            ).fetchone()
+        self.resumed = previous is not None
+        if self.resumed:
+            self.run_id = previous[0]
+            self._conn.execute("UPDATE runs SET status = 'running', updated_at = ? WHERE run_id = ?",
+                               (time.time(), self.run_id))
+        else:
+            self._purge()
+            self.run_id = uuid.uuid4().hex
+            now = time.time()
+            self._conn.execute("INSERT INTO runs VALUES (?, 'running', ?, ?, NULL)", (self.run_id, now, now))
+        self._conn.commit()
+
+    def _purge(self):
+        # Solo se conserva una ejecución: el estado anterior deja de ser útil al empezar de cero
+        for table in ('pages', 'details', 'chunks', 'runs'):
+            self._conn.execute(f"DELETE FROM {table}")
+
+    def _load(self, query: str, params: tuple, counter: str):
+
+        with self._lock:
+            row = self._conn.execute(query, (self.run_id,) + params).fetchone()
+            if row is not None:
+                self._stats[counter] += 1
+        return json.loads(row[0]) if row is not None else None
+
+    def _save(self, query: str, params: tuple, counter: str):
+
+        with self._lock:
+            self._conn.execute(query, (self.run_id,) + params)
+            self._conn.execute("UPDATE runs SET updated_at = ? WHERE run_id = ?", (time.time(), self.run_id))
+            self._conn.commit()
+            self._stats[counter] += 1
+
+    def get_page(self, list_name: str, page: int):
+
+        return self._load("SELECT payload FROM pages WHERE run_id = ? AND list_name = ? AND page = ?",
+                          (list_name, page), 'pages_reused')
+
+    def save_page(self, list_name: str, page: int, payload: dict):
+
+        self._save("INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?)",
+                   (list_name, page, json.dumps(payload)), 'pages_saved')
+
+    def get_detail(self, movie_id: int):
+
+        return self._load("SELECT payload FROM details WHERE run_id = ? AND movie_id = ?",
+                          (int(movie_id),), 'details_reused')
+
+    def save_detail(self, movie_id: int, payload: dict):
+
+        self._save("INSERT OR REPLACE INTO details VALUES (?, ?, ?)",
+                   (int(movie_id), json.dumps(payload)), 'details_saved')
+
+    @staticmethod
+    def chunk_key(movie_ids) -> str:
+        # Identifica un bloque por sus películas, independiente de su posición en la ejecución
+        raw = ','.join(str(int(movie_id)) for movie_id in sorted(movie_ids))
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def is_chunk_loaded(self, chunk_key: str) -> bool:
+
+        with self._lock:
+            row = self._conn.execute("SELECT 1 FROM chunks WHERE run_id = ? AND chunk_key = ?",
+                                     (self.run_id, chunk_key)).fetchone()
+            if row is not None:
+                self._stats['chunks_skipped'] += 1
+        return row is not None
+
+    def mark_chunk_loaded(self, chunk_key: str):
+
+        self._save("INSERT OR REPLACE INTO chunks VALUES (?, ?, ?)", (chunk_key, time.time()), 'chunks_saved')
+
+    def _finish(self, status: str, error: str = None):
+
+        with self._lock:
+            self._conn.execute("UPDATE runs SET status = ?, updated_at = ?, error = ? WHERE run_id = ?",
+                               (status, time.time(), error, self.run_id))
+            if status == 'completed':
+                # Las respuestas guardadas ya no se necesitan para reanudar
+                for table in ('pages', 'details', 'chunks'):
+                    self._conn.execute(f"DELETE FROM {table} WHERE run_id = ?", (self.run_id,))
+            self._conn.commit()
+
+    def complete(self):
+        self._finish('completed')
+
+    def fail(self, error):
+        self._finish('failed', str(error))
+
+    def stats(self) -> dict:
+
+        with self._lock:
+            return dict(self._stats)
+
+    def close(self):
+
+        with self._lock:
+            self._conn.close()
@@ -1,127 +1,237 @@
-import os
+from itertools import chain
+from operator import itemgetter
 
+import numpy as np
 import pandas as pd
 from datetime import datetime
-from dotenv import load_dotenv
 from utils.logger_manager import LoggerManager
+from utils.instrumentation import instrument
 from utils.save_csv_debug import SaveFileDebug
-
-load_dotenv()
-
-output_path = os.getenv('LOG_FOLDER_DATA')
+from utils.schema import (
+    enforce_schema, RAW_MOVIE_SCHEMA, RAW_DETAIL_SCHEMA, CLEAN_SCHEMA, MOVIE_GENRE_SCHEMA, MOVIE_CREDIT_SCHEMA,
+    MOVIE_KEYWORD_SCHEMA, MOVIE_RELEASE_DATE_SCHEMA
+)
+from utils.settings import settings
+from utils.validation_rules import RuleEngine
+
+output_path = settings.get('LOG_FOLDER_DATA')
+MIN_VOTE_COUNT = 50
+UNKNOWN_GENRE = 'Unknown'
+MOVIE_COLUMNS = ['id', 'title', 'release_date', 'vote_average', 'vote_count', 'popularity']
+DETAIL_COLUMNS = ['id', 'genres', 'runtime', 'budget', 'revenue']
+
+MOVIE_RULES = (
+    RuleEngine()
+    .register('duplicated_id', lambda df, ctx: df.duplicated(subset=['id']),
+              "duplicados eliminados en 'movies'")
+    .register('invalid_date', lambda df, ctx: df['release_date'].isna(),
+              "descartados por fechas inválidas")
+    .register('future_date', lambda df, ctx: df['release_date'] > ctx['now'],
+              "descartados por fechas futuras")
+    .register('low_votes', lambda df, ctx: ~(df['vote_count'] >= MIN_VOTE_COUNT),
+              "descartados por votos insuficientes")
+)
+
+DETAIL_RULES = (
+    RuleEngine()
+    .register('duplicated_id', lambda df, ctx: df.duplicated(subset=['id']),
+              "duplicados eliminados en 'details'")
+    # El presupuesto faltante se corrige a 0, por eso solo se reporta
+    .register('missing_budget', lambda df, ctx: df['budget'].isna(),
+              "con presupuesto faltante (corregido a 0)", drop=False)
+)
+
+
+def normalize_genres(ids: pd.Series, genres: pd.Series):
+    """Aplana las listas de géneros de TMDb en filas (movie_id, genre_id, genre_name).
+
+    Devuelve también el texto 'Género1, Género2' por película, calculado una sola vez por
+    combinación distinta de géneros en lugar de una vez por fila.
+    """
+
+    lengths = genres.str.len().fillna(0).to_numpy(dtype=np.int64)
+    flat = list(chain.from_iterable(genres[lengths > 0]))
+
+    movie_ids = np.repeat(ids.to_numpy(dtype=np.int64), lengths)
+    genre_ids = np.fromiter(map(itemgetter('id'), flat), dtype=np.int64, count=len(flat))
+    # Categorías ordenadas, como las de astype('category'): no dependen del orden de las filas
+    codes, names = pd.factorize(np.array(list(map(itemgetter('name'), flat)), dtype=object), sort=True)
+
+    # Clave entera por combinación ordenada de géneros: suma de (código + 1) * base^posición
+    base = len(names) + 1
+    starts = np.cumsum(lengths) - lengths
+    positions = np.arange(len(flat)) - np.repeat(starts, lengths)
+    text = pd.Series(UNKNOWN_GENRE, index=genres.index, dtype=object)
+    has_genres = lengths > 0
+
+    if has_genres.any() and lengths.max() * np.log2(base) < 62:
+        keys = np.add.reduceat((codes + 1) * base ** positions, starts[has_genres])
+        combo_codes, _ = pd.factorize(keys)
+        first_row = np.unique(combo_codes, return_index=True)[1]
+        combo_text = np.array([
+            ', '.join(names[codes[start:start + length]])
+            for start, length in zip(starts[has_genres][first_row], lengths[has_genres][first_row])
+        ], dtype=object)
+        text[has_genres] = combo_text[combo_codes]
+    elif has_genres.any():
+        # Demasiados géneros por película para codificar la combinación en 64 bits
+        text[has_genres] = [', '.join(item['name'] for item in value) for value in genres[has_genres]]
+
+    movie_genres = pd.DataFrame({
+        'movie_id': movie_ids,
+        'genre_id': genre_ids,
+        'genre_name': pd.Categorical.from_codes(codes, categories=names),
+    })
+    return enforce_schema(movie_genres, MOVIE_GENRE_SCHEMA), text
+
+
+def flatten_nested(keys: pd.DataFrame, values: pd.Series, fields: dict) -> pd.DataFrame:
+    # Una fila por elemento de las listas de 'values', repitiendo las columnas de 'keys' de su fila;
+    # fields asigna columna de salida -> clave del diccionario de TMDb
+    lengths = values.str.len().fillna(0).to_numpy(dtype=np.int64)
+    flat = list(chain.from_iterable(values[lengths > 0]))
+    frame = {column: np.repeat(keys[column].to_numpy(), lengths) for column in keys.columns}
+    for column, key in fields.items():
+        frame[column] = [item.get(key) for item in flat]
+    return pd.DataFrame(frame, columns=list(keys.columns) + list(fields))
+
+
+def normalize_credits(keys: pd.DataFrame, credits: pd.Series) -> pd.DataFrame:
+
+    cast = flatten_nested(keys, credits.str.get('cast'), {
+        'credit_id': 'credit_id', 'person_id': 'id', 'name': 'name', 'character': 'character', 'cast_order': 'order',
+    })
+    crew = flatten_nested(keys, credits.str.get('crew'), {
+        'credit_id': 'credit_id', 'person_id': 'id', 'name': 'name', 'department': 'department', 'job': 'job',
+    })
+    movie_credits = pd.concat([cast.assign(credit_type='cast'), crew.assign(credit_type='crew')], ignore_index=True)
+    return enforce_schema(movie_credits.reindex(columns=list(MOVIE_CREDIT_SCHEMA)), MOVIE_CREDIT_SCHEMA)
+
+
+def normalize_keywords(keys: pd.DataFrame, keywords: pd.Series) -> pd.DataFrame:
+
+    movie_keywords = flatten_nested(keys, keywords.str.get('keywords'), {'keyword_id': 'id', 'keyword_name': 'name'})
+    return enforce_schema(movie_keywords, MOVIE_KEYWORD_SCHEMA)
+
+
+def normalize_release_dates(keys: pd.DataFrame, release_dates: pd.Series) -> pd.DataFrame:
+    # Doble anidamiento: país -> fechas de estreno por tipo
+    countries = flatten_nested(keys, release_dates.str.get('results'), {'country': 'iso_3166_1', 'dates': 'release_dates'})
+    movie_release_dates = flatten_nested(countries[list(keys.columns) + ['country']], countries['dates'], {
+        'release_type': 'type', 'release_date': 'release_date', 'certification': 'certification',
+    })
+    movie_release_dates['release_date'] = pd.to_datetime(
+        movie_release_dates['release_date'], errors='coerce', utc=True).dt.tz_localize(None).dt.normalize()
+    return enforce_schema(movie_release_dates, MOVIE_RELEASE_DATE_SCHEMA)
+
+
+# Subrecursos de append_to_response -> (tabla de destino, función de normalización)
+SUBRESOURCE_NORMALIZERS = {
+    'credits': ('movie_credits', normalize_credits),
+    'keywords': ('movie_keywords', normalize_keywords),
+    'release_dates': ('movie_release_dates', normalize_release_dates),
+}
 
 
 class CleanerValidator:
     def __init__(self, script_name: str = __file__):
         self.logger = LoggerManager(script_name=script_name).get_logger()
-
+        # Tablas relacionadas del último clean_and_validate (géneros y subrecursos), por nombre de tabla
+        self.related = {}
+        # Registros con incidencias del último clean_and_validate
+        self.rejects = pd.DataFrame()
+        # Sufijo de los artefactos de depuración; el proceso en streaming fija uno por bloque para no sobrescribirlos
+        self.debug_suffix = ''
+
+    def save_rejects(self, rejects: pd.DataFrame):
+
+        if rejects.empty:
+            return
+        saver = SaveFileDebug(path=output_path, filename=f"discarded_records{self.debug_suffix}.csv")
+        saver.save(rejects)
+        self.logger.info(
+            f"Registros con incidencias: {len(rejects)} ({int(rejects['dropped'].sum())} descartados) "
+            f"guardados en 'output/discarded_records{self.debug_suffix}.csv'.")
+
+    @instrument()
     def clean_and_validate(self, movies: pd.DataFrame, details: pd.DataFrame) -> pd.DataFrame:
         try:
             # Selección de columnas
             self.logger.info("Seleccionando columnas necesarias de los DataFrames.")
-            movies = movies[['id', 'title', 'release_date', 'vote_average', 'vote_count', 'popularity']].copy()
-            details = details[['id', 'genres', 'runtime', 'budget', 'revenue']].copy()
+            subresources = [column for column in SUBRESOURCE_NORMALIZERS if column in details.columns]
+            movies = movies[MOVIE_COLUMNS].copy()
+            # Los subrecursos anidados no pasan por las reglas ni por el registro de descartes
+            details = details.reset_index(drop=True)
+            nested = details[subresources]
+            details = details[DETAIL_COLUMNS].copy()
+            # Tipos compactos desde la entrada: filtros y combinación trabajan sobre columnas más pequeñas
+            movies = enforce_schema(movies, RAW_MOVIE_SCHEMA)
+            details = enforce_schema(details, RAW_DETAIL_SCHEMA)
             self.logger.info("Columnas seleccionadas correctamente.")
         except KeyError as e:
             self.logger.error(f"Error al seleccionar columnas: {e}")
             raise
 
         try:
-            # Limpieza
-            self.logger.info("Iniciando la limpieza de datos.")
-
-            # Eliminar duplicados en movies
-            duplicated_movies = movies[movies.duplicated(subset=['id'])]
-            if not duplicated_movies.empty:
-                saver = SaveFileDebug(path=output_path, filename="discarded_duplicated_movies.csv")
-                saver.save(duplicated_movies)
-                self.logger.info(
-                    f"Registros duplicados eliminados en 'movies': {len(duplicated_movies)} guardados en 'output/discarded_duplicated_movies.csv'.")
-            movies = movies.drop_duplicates(subset=['id'])
-
-            # Eliminar duplicados en details
-            duplicated_details = details[details.duplicated(subset=['id'])]
-            if not duplicated_details.empty:
-                saver = SaveFileDebug(path=output_path, filename="discarded_duplicated_details.csv")
-                saver.save(duplicated_details)
-                self.logger.info(
-                    f"Registros duplicados eliminados en 'details': {len(duplicated_details)} guardados en 'output/discarded_duplicated_details.csv'.")
-            details = details.drop_duplicates(subset=['id'])
-
-            # Fechas inválidas
+            # Limpieza y validación: todas las reglas se evalúan en una sola pasada por DataFrame
+            self.logger.info("Iniciando la limpieza y validación de datos.")
+            context = {'now': datetime.now()}
+
             movies['release_date'] = pd.to_datetime(movies['release_date'], errors='coerce')
-            discarded_invalid_dates = movies[movies['release_date'].isna()]
-            if not discarded_invalid_dates.empty:
-                saver = SaveFileDebug(path=output_path, filename="discarded_invalid_dates.csv")
-                saver.save(discarded_invalid_dates)
-                self.logger.info(
-                    f"Registros descartados por fechas inválidas: {len(discarded_invalid_dates)} guardados en 'output/discarded_invalid_dates.csv'.")
-
-            movies = movies[movies['release_date'].notna()]
-
-            # Fechas futuras
-            discarded_future_dates = movies[movies['release_date'] > datetime.now()]
-            if not discarded_future_dates.empty:
-                saver = SaveFileDebug(path=output_path, filename="discarded_future_dates.csv")
-                saver.save(discarded_future_dates)
-                self.logger.info(
-                    f"Registros descartados por fechas futuras: {len(discarded_future_dates)} guardados en 'output/discarded_future_dates.csv'.")
-
-            movies = movies[movies['release_date'] <= datetime.now()]
-
-            # Presupuesto vacío
-            discarded_missing_budget = details[details['budget'].isna()]
-            if not discarded_missing_budget.empty:
-                saver = SaveFileDebug(path=output_path, filename="discarded_missing_budget.csv")
-                saver.save(discarded_missing_budget)
-                self.logger.info(
-                    f"Registros descartados por presupuesto faltante: {len(discarded_missing_budget)} guardados en 'output/discarded_missing_budget.csv'.")
+            movies, movie_rejects, movie_counts = MOVIE_RULES.evaluate(movies, context)
+            details, detail_rejects, detail_counts = DETAIL_RULES.evaluate(details, context)
+
+            for engine, counts in ((MOVIE_RULES, movie_counts), (DETAIL_RULES, detail_counts)):
+                for rule in engine.rules:
+                    if counts[rule.name]:
+                        self.logger.info(f"Registros {rule.description}: {counts[rule.name]}.")
 
+            self.rejects = pd.concat(
+                [movie_rejects.assign(source='movies'), detail_rejects.assign(source='details')],
+                ignore_index=True
+            )
+            self.save_rejects(self.rejects)
+
+            # Los subrecursos de append_to_response se separan en sus propias tablas
+            keys = details[['id']].rename(columns={'id': 'movie_id'})
+            nested = nested.loc[details.index]
+            related = {}
+            for column in subresources:
+                table, normalize = SUBRESOURCE_NORMALIZERS[column]
+                related[table] = normalize(keys, nested[column])
+                self.logger.info(f"Registros de '{column}' normalizados en '{table}': {len(related[table])}.")
+
+            details = details.copy()
             details['budget'] = details['budget'].fillna(0).astype(int)
             details['revenue'] = details['revenue'].fillna(0).astype(int)
-            details['genres'] = details['genres'].apply(
-                lambda x: ', '.join([g['name'] for g in x]) if x else 'Unknown'
-            )
-            self.logger.info("Limpieza de datos completada.")
+            related['movie_genres'], details['genres'] = normalize_genres(details['id'], details['genres'])
+            self.logger.info("Limpieza y validación de datos completada.")
         except Exception as e:
-            self.logger.error(f"Error durante la limpieza de datos: {e}")
+            self.logger.error(f"Error durante la limpieza y validación de datos: {e}")
             raise
 
         try:
             # Normalización
             self.logger.info("Normalizando el campo 'title'.")
+            movies = movies.copy()
             movies['title'] = movies['title'].str.title()
             self.logger.info("Normalización completada.")
         except Exception as e:
             self.logger.error(f"Error durante la normalización: {e}")
             raise
 
-        try:
-            # Validación
-            self.logger.info("Validando datos con criterios específicos.")
-
-            # Votos insuficientes
-            discarded_low_votes = movies[movies['vote_count'] < 50]
-            if not discarded_low_votes.empty:
-                saver = SaveFileDebug(path=output_path, filename="discarded_low_votes.csv")
-                saver.save(discarded_low_votes)
-                self.logger.info(
-                    f"Registros descartados por votos insuficientes: {len(discarded_low_votes)} guardados en 'output/discarded_low_votes.csv'.")
-
-            movies = movies[movies['vote_count'] >= 50]
-            self.logger.info("Validación completada.")
-        except Exception as e:
-            self.logger.error(f"Error durante la validación de datos: {e}")
-            raise
-
         try:
             # Combinación
             self.logger.info("Combinando los DataFrames de 'movies' y 'details'.")
             combined_df = pd.merge(movies, details, on='id')
+            self.related = {
+                table: frame[frame['movie_id'].isin(combined_df['id'])].reset_index(drop=True)
+                for table, frame in related.items()
+            }
             self.logger.info("Combinación completada correctamente.")
         except Exception as e:
             self.logger.error(f"Error al combinar los DataFrames: {e}")
             raise
 
         self.logger.info("Proceso de limpieza y validación completado.")
-        return combined_df
+        return enforce_schema(combined_df, CLEAN_SCHEMA)
@@ -0,0 +1,172 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from utils.settings import settings
+
+CACHE_ENABLED = settings.get_bool('HTTP_CACHE_ENABLED', True)
+CACHE_PATH = settings.get('HTTP_CACHE_PATH', os.path.join('cache', 'http_cache.sqlite'))
+CACHE_MAX_BYTES = settings.get_int('HTTP_CACHE_MAX_BYTES', 256 * 1024 * 1024)
+TTL_LISTS = settings.get_int('HTTP_CACHE_TTL_LISTS', 3600)
+TTL_DETAILS = settings.get_int('HTTP_CACHE_TTL_DETAILS', 7 * 24 * 3600)
+
+# Primera regla que coincide con el endpoint define su TTL en segundos
+DEFAULT_TTL_RULES = [
+    (r'^/movie/\d+$', TTL_DETAILS),
+    (r'.*', TTL_LISTS),
+]
+
+EXCLUDED_PARAMS = {'api_key'}
+
+
+class CacheEntry:
+    def __init__(self, body: bytes, etag: str, last_modified: str, fetched_at: float, ttl: int):
+
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+        self.fetched_at = fetched_at
+        self.ttl = ttl
+
+    @property
+    def is_fresh(self) -> bool:
+        return time.time() - self.fetched_at < self.ttl
+
+    def conditional_headers(self) -> dict:
+
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+    def json(self):
+        return json.loads(self.body)
+
+
+class ResponseCache:
+    """Caché persistente de respuestas HTTP en SQLite con TTL por endpoint, revalidación y desalojo LRU."""
+
+    def __init__(self, path: str = CACHE_PATH, max_bytes: int = CACHE_MAX_BYTES, ttl_rules=None):
+
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl_rules = [(re.compile(pattern), ttl) for pattern, ttl in (ttl_rules or DEFAULT_TTL_RULES)]
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'revalidated': 0, 'bytes_saved': 0, 'evicted': 0}
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                endpoint TEXT,
+                body BLOB,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL,
+                last_access REAL,
+                size INTEGER
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_last_access ON responses (last_access)")
+        self._conn.commit()
+        self._size = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    @staticmethod
+    def make_key(endpoint: str, params: dict = None) -> str:
+
+        items = sorted((k, str(v)) for k, v in (params or {}).items() if k not in EXCLUDED_PARAMS)
+        raw = json.dumps([endpoint, items])
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def ttl_for(self, endpoint: str) -> int:
+
+        for pattern, ttl in self.ttl_rules:
+            if pattern.match(endpoint):
+                return ttl
+        return 0
+
+    def get(self, key: str, endpoint: str):
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT body, etag, last_modified, fetched_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self._stats['misses'] += 1
+                return None
+            self._conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+
+        entry = CacheEntry(row[0], row[1], row[2], row[3], self.ttl_for(endpoint))
+        with self._lock:
+            if entry.is_fresh:
+                self._stats['hits'] += 1
+                self._stats['bytes_saved'] += len(entry.body)
+            else:
+                self._stats['misses'] += 1
+        return entry
+
+    def revalidated(self, key: str, entry: CacheEntry):
+        # Respuesta 304: el cuerpo guardado sigue vigente y se renueva su TTL
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "UPDATE responses SET fetched_at = ?, last_access = ? WHERE key = ?", (now, now, key)
+            )
+            self._conn.commit()
+            self._stats['revalidated'] += 1
+            self._stats['bytes_saved'] += len(entry.body)
+        entry.fetched_at = now
+
+    def put(self, key: str, endpoint: str, body: bytes, etag: str = None, last_modified: str = None):
+
+        now = time.time()
+        size = len(body)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._conn.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, endpoint, body, etag, last_modified, now, now, size)
+            )
+            self._size += size - (previous[0] if previous else 0)
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        # Elimina las entradas menos usadas recientemente hasta volver al límite
+        while self._size > self.max_bytes:
+            rows = self._conn.execute(
+                "SELECT key, size FROM responses ORDER BY last_access LIMIT 100"
+            ).fetchall()
+            if not rows:
+                break
+            for key, size in rows:
+                if self._size <= self.max_bytes:
+                    break
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._size -= size
+                self._stats['evicted'] += 1
+
+    def stats(self) -> dict:
+
+        with self._lock:
+            stats = dict(self._stats)
+        stats['size_bytes'] = self._size
+        return stats
+
+    def close(self):
+
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,117 @@
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from utils.rate_limiter import AdaptiveRateLimiter
+from utils.settings import settings
+
+POOL_SIZE = settings.get_int('HTTP_POOL_SIZE', 32)
+CONNECT_TIMEOUT = settings.get_float('HTTP_CONNECT_TIMEOUT', 5)
+READ_TIMEOUT = settings.get_float('HTTP_READ_TIMEOUT', 30)
+MAX_RETRIES = settings.get_int('HTTP_MAX_RETRIES', 5)
+BACKOFF_BASE = settings.get_float('HTTP_BACKOFF_BASE', 0.5)
+BACKOFF_MAX = settings.get_float('HTTP_BACKOFF_MAX', 30)
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+class HttpClient:
+    """Sesión HTTP persistente con pool de conexiones, reintentos con backoff y contadores por ejecución."""
+
+    def __init__(self, pool_size: int = POOL_SIZE, connect_timeout: float = CONNECT_TIMEOUT,
+                 read_timeout: float = READ_TIMEOUT, max_retries: int = MAX_RETRIES,
+                 backoff_base: float = BACKOFF_BASE, backoff_max: float = BACKOFF_MAX, logger=None):
+
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.logger = logger
+        self.rate_limiter = AdaptiveRateLimiter()
+
+        # Los reintentos se gestionan aquí para poder contarlos y medir la espera
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session = requests.Session()
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self._adapter = adapter
+
+        self._lock = threading.Lock()
+        self._counters = {'requests': 0, 'retries': 0, 'failures': 0, 'wait_seconds': 0.0}
+
+    def _count(self, key, value=1):
+        with self._lock:
+            self._counters[key] += value
+
+    def _backoff(self, attempt: int) -> float:
+        # Backoff exponencial con jitter completo
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def _sleep(self, seconds: float):
+        if seconds > 0:
+            time.sleep(seconds)
+            self._count('wait_seconds', seconds)
+
+    def get(self, url: str, params: dict = None, headers: dict = None) -> requests.Response:
+
+        for attempt in range(self.max_retries + 1):
+            self._count('wait_seconds', self.rate_limiter.acquire())
+            self._count('requests')
+            try:
+                response = self.session.get(url, params=params, headers=headers, timeout=self.timeout)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                if attempt == self.max_retries:
+                    self._count('failures')
+                    raise
+                delay = self._backoff(attempt)
+                if self.logger:
+                    self.logger.warning("Error de conexión en %s: %s. Reintento %d en %.2fs.", url, e, attempt + 1, delay)
+                self._count('retries')
+                self._sleep(delay)
+                continue
+
+            if response.status_code not in RETRY_STATUS or attempt == self.max_retries:
+                if response.status_code >= 400:
+                    self._count('failures')
+                else:
+                    self.rate_limiter.on_success()
+                return response
+
+            if response.status_code == 429:
+                # La API indica cuánto esperar; se ajusta la tasa para todos los hilos
+                retry_after = AdaptiveRateLimiter.parse_retry_after(response.headers.get('Retry-After'))
+                self.rate_limiter.on_rate_limited(retry_after)
+                delay = 0.0
+            else:
+                delay = self._backoff(attempt)
+            if self.logger:
+                self.logger.warning("Respuesta %d de %s. Reintento %d de %d.",
+                                    response.status_code, url, attempt + 1, self.max_retries)
+            self._count('retries')
+            response.close()
+            self._sleep(delay)
+
+    def stats(self) -> dict:
+
+        opened = 0
+        served = 0
+        pools = self._adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is not None:
+                opened += pool.num_connections
+                served += pool.num_requests
+
+        with self._lock:
+            counters = dict(self._counters)
+        counters['wait_seconds'] = round(counters['wait_seconds'], 3)
+        counters['connections_opened'] = opened
+        counters['connections_reused'] = max(served - opened, 0)
+        return counters
+
+    def close(self):
+
+        self.session.close()
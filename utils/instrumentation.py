@@ -0,0 +1,212 @@
+import cProfile
+import functools
+import importlib
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+
+from utils.settings import settings
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+REPORT_DIR = settings.get('INSTRUMENT_REPORT_DIR', 'reports')
+TRACEMALLOC_ENABLED = settings.get_bool('INSTRUMENT_TRACEMALLOC', False)
+FRAME_MEMORY_ENABLED = settings.get_bool('INSTRUMENT_FRAME_MEMORY', True)
+PROFILE_STAGES = set(settings.get_list('INSTRUMENT_PROFILE_STAGES', ''))
+
+
+def _peak_rss_mb():
+
+    if resource is None:
+        return None
+    # ru_maxrss está en KB en Linux
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 2)
+
+
+def _row_count(value):
+    # Solo cuentan colecciones de filas (DataFrame, Series, listas); no textos ni diccionarios
+    if value is None or isinstance(value, (str, bytes, dict)) or not hasattr(value, '__len__'):
+        return None
+    return len(value)
+
+
+def _frame_memory_mb(value):
+    # Memoria profunda del DataFrame devuelto: mide el efecto de los tipos compactos por etapa
+    if not FRAME_MEMORY_ENABLED or not hasattr(value, 'memory_usage') or not hasattr(value, 'columns'):
+        return None
+    return round(float(value.memory_usage(index=True, deep=True).sum()) / 1024 ** 2, 3)
+
+
+class StageMetrics:
+    """Métricas de una ejecución de etapa; rows_in, rows_out y frame_memory_mb pueden fijarse dentro del bloque."""
+
+    def __init__(self, name: str, rows_in=None):
+
+        self.name = name
+        self.rows_in = rows_in
+        self.rows_out = None
+        self.frame_memory_mb = None
+
+
+class RunInstrumentation:
+    """Acumula tiempos, CPU, memoria y filas por etapa para el informe JSON de la ejecución."""
+
+    def __init__(self, report_dir: str = REPORT_DIR, trace_memory: bool = TRACEMALLOC_ENABLED,
+                 profile_stages=None):
+
+        self.report_dir = report_dir
+        self.trace_memory = trace_memory
+        self.profile_stages = set(PROFILE_STAGES if profile_stages is None else profile_stages)
+        self.started_at = datetime.now()
+        self._start = time.perf_counter()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._stages = {}
+        self._imports = {}
+
+    def _depth(self) -> int:
+        return getattr(self._local, 'depth', 0)
+
+    def _record(self, metrics: StageMetrics, wall: float, cpu: float, cpu_scope: str, memory_peak_mb, peak_rss_delta_mb):
+
+        with self._lock:
+            entry = self._stages.setdefault(metrics.name, {
+                'calls': 0, 'wall_seconds': 0.0, 'cpu_seconds': 0.0, 'cpu_scope': cpu_scope,
+                'rows_in': 0, 'rows_out': 0, 'tracemalloc_peak_mb': None, 'peak_rss_delta_mb': 0.0,
+                'peak_rss_mb': None, 'frame_memory_mb': None, 'frame_bytes_per_row': None,
+            })
+            entry['calls'] += 1
+            entry['wall_seconds'] += wall
+            entry['cpu_seconds'] += cpu
+            entry['rows_in'] += metrics.rows_in or 0
+            entry['rows_out'] += metrics.rows_out or 0
+            if memory_peak_mb is not None:
+                entry['tracemalloc_peak_mb'] = max(entry['tracemalloc_peak_mb'] or 0, memory_peak_mb)
+            if peak_rss_delta_mb is not None:
+                entry['peak_rss_delta_mb'] += peak_rss_delta_mb
+            entry['peak_rss_mb'] = _peak_rss_mb()
+            if metrics.frame_memory_mb is not None and metrics.frame_memory_mb >= (entry['frame_memory_mb'] or 0):
+                entry['frame_memory_mb'] = metrics.frame_memory_mb
+                if metrics.rows_out:
+                    entry['frame_bytes_per_row'] = round(metrics.frame_memory_mb * 1024 ** 2 / metrics.rows_out, 1)
+
+    @contextmanager
+    def stage(self, name: str, rows_in=None, cpu_scope: str = 'process', detailed: bool = True):
+
+        metrics = StageMetrics(name, rows_in)
+        top_level = detailed and self._depth() == 0
+        self._local.depth = self._depth() + 1
+
+        # tracemalloc y cProfile solo en etapas de primer nivel para no alterar las mediciones anidadas
+        trace = self.trace_memory and top_level
+        if trace:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+            traced_before = tracemalloc.get_traced_memory()[0]
+        profiler = None
+        if top_level and (name in self.profile_stages or 'all' in self.profile_stages):
+            profiler = cProfile.Profile()
+            profiler.enable()
+
+        cpu_clock = time.process_time if cpu_scope == 'process' else time.thread_time
+        rss_before = _peak_rss_mb()
+        wall_start = time.perf_counter()
+        cpu_start = cpu_clock()
+        try:
+            yield metrics
+        finally:
+            wall = time.perf_counter() - wall_start
+            cpu = cpu_clock() - cpu_start
+            self._local.depth -= 1
+
+            memory_peak_mb = None
+            if trace:
+                memory_peak_mb = round((tracemalloc.get_traced_memory()[1] - traced_before) / 1024 ** 2, 3)
+            if profiler is not None:
+                profiler.disable()
+                os.makedirs(self.report_dir, exist_ok=True)
+                profiler.dump_stats(os.path.join(self.report_dir, f"profile_{name}.prof"))
+
+            rss_after = _peak_rss_mb()
+            peak_rss_delta_mb = None if rss_before is None else round(rss_after - rss_before, 2)
+            self._record(metrics, wall, cpu, cpu_scope, memory_peak_mb, peak_rss_delta_mb)
+
+    def instrument(self, name: str = None):
+        # Decorador para métodos calientes: filas de entrada de los argumentos tabulares, de salida del resultado
+
+        def decorator(func):
+            stage_name = name or func.__qualname__
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                counts = [_row_count(arg) for arg in list(args) + list(kwargs.values())]
+                counts = [count for count in counts if count is not None]
+                rows_in = sum(counts) if counts else None
+                with self.stage(stage_name, rows_in=rows_in, cpu_scope='thread', detailed=False) as metrics:
+                    result = func(*args, **kwargs)
+                    metrics.rows_out = _row_count(result)
+                    metrics.frame_memory_mb = _frame_memory_mb(result)
+                return result
+
+            return wrapper
+
+        return decorator
+
+    def record_import(self, name: str, seconds: float):
+
+        with self._lock:
+            self._imports.setdefault(name, round(seconds, 4))
+
+    def import_module(self, name: str):
+        # Cada módulo cuenta también las dependencias que carga por primera vez; si una importación anterior
+        # ya las cargó, su tiempo queda en aquella
+        start = time.perf_counter()
+        module = importlib.import_module(name)
+        self.record_import(name, time.perf_counter() - start)
+        return module
+
+    def import_times(self) -> dict:
+
+        with self._lock:
+            return dict(self._imports)
+
+    def report(self) -> dict:
+
+        with self._lock:
+            stages = {name: dict(entry) for name, entry in self._stages.items()}
+        for entry in stages.values():
+            entry['wall_seconds'] = round(entry['wall_seconds'], 4)
+            entry['cpu_seconds'] = round(entry['cpu_seconds'], 4)
+            entry['peak_rss_delta_mb'] = round(entry['peak_rss_delta_mb'], 2)
+            rows = entry['rows_out'] or entry['rows_in']
+            entry['rows_per_second'] = round(rows / entry['wall_seconds'], 1) if entry['wall_seconds'] and rows else None
+        return {
+            'started_at': self.started_at.isoformat(timespec='seconds'),
+            'wall_seconds': round(time.perf_counter() - self._start, 4),
+            'peak_rss_mb': _peak_rss_mb(),
+            'import_seconds': self.import_times(),
+            'stages': stages,
+        }
+
+    def write_report(self, filename: str = None) -> str:
+
+        os.makedirs(self.report_dir, exist_ok=True)
+        filename = filename or f"run_report_{self.started_at.strftime('%Y%m%d_%H%M%S')}.json"
+        path = os.path.join(self.report_dir, filename)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.report(), f, indent=2, ensure_ascii=False)
+        return path
+
+
+# Instancia compartida por todos los módulos del proceso
+run_instrumentation = RunInstrumentation()
+stage = run_instrumentation.stage
+instrument = run_instrumentation.instrument
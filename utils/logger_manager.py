@@ -1,9 +1,114 @@
+import atexit
 import os
+import threading
 import time
 import logging
-from logging.handlers import QueueHandler, QueueListener
+from contextlib import contextmanager
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from queue import Queue
 
+from utils.settings import settings
+
+LOG_LEVEL = settings.get('LOG_LEVEL', 'INFO').upper()
+LOG_MAX_BYTES = settings.get_int('LOG_MAX_BYTES', 0)
+LOG_BACKUP_COUNT = settings.get_int('LOG_BACKUP_COUNT', 5)
+
+
+class _RoutingHandler(logging.Handler):
+    """Envía cada registro al archivo del logger que lo emitió."""
+
+    def __init__(self):
+
+        super().__init__()
+        self._handlers = {}
+        self._lock_routes = threading.Lock()
+
+    def add_route(self, logger_name: str, handler: logging.Handler):
+
+        with self._lock_routes:
+            self._handlers.setdefault(logger_name, handler)
+
+    def has_route(self, logger_name: str) -> bool:
+
+        with self._lock_routes:
+            return logger_name in self._handlers
+
+    def emit(self, record: logging.LogRecord):
+
+        handler = self._handlers.get(record.name)
+        if handler is not None and record.levelno >= handler.level:
+            handler.handle(record)
+
+    def flush(self):
+
+        for handler in list(self._handlers.values()):
+            handler.flush()
+
+    def close(self):
+
+        for handler in list(self._handlers.values()):
+            handler.close()
+        super().close()
+
+
+class _LoggingBackend:
+    """Cola y listener únicos para todo el proceso, detenidos de forma ordenada al salir."""
+
+    def __init__(self):
+
+        self.queue = Queue()
+        self.router = _RoutingHandler()
+        self.listener = QueueListener(self.queue, self.router, respect_handler_level=False)
+        self.listener.start()
+        self._stopped = False
+        atexit.register(self.stop)
+
+    def stop(self):
+        # Vacía la cola pendiente antes de cerrar los archivos
+        if self._stopped:
+            return
+        self._stopped = True
+        self.listener.stop()
+        self.router.flush()
+        self.router.close()
+
+
+_backend = None
+_backend_lock = threading.Lock()
+# En un proceso hijo: cola hacia el proceso principal, que escribe los registros en sus archivos
+_worker_queue = None
+
+
+def _get_backend() -> _LoggingBackend:
+
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            _backend = _LoggingBackend()
+        return _backend
+
+
+@contextmanager
+def worker_log_queue(mp_context):
+    """Cola entre procesos para los logs de los procesos hijos; el proceso principal la vacía mientras dura."""
+    backend = _get_backend()
+    queue = mp_context.Queue()
+    listener = QueueListener(queue, backend.router, respect_handler_level=False)
+    listener.start()
+    try:
+        yield queue
+    finally:
+        # stop() procesa los registros pendientes antes de devolver el control
+        listener.stop()
+        queue.close()
+        queue.join_thread()
+
+
+def install_worker_queue(queue):
+    # Inicializador de procesos hijos: los loggers envían los registros a la cola en lugar de abrir archivos
+    global _worker_queue
+    _worker_queue = queue
+
 
 class LoggerManager:
 
@@ -11,38 +116,47 @@ class LoggerManager:
 
         self.script_name = script_name
         self.log_dir = log_dir
-        self.log_queue = Queue()
         self.logger = self._setup_logger()
 
     def _setup_logger(self) -> logging.Logger:
 
         sub_dir_name = os.path.splitext(os.path.basename(self.script_name))[0]
-        sub_log_dir = os.path.join(self.log_dir, sub_dir_name)
-        os.makedirs(sub_log_dir, exist_ok=True)
+        logger = logging.getLogger(sub_dir_name)
+        if _worker_queue is not None:
+            if not logger.handlers:
+                logger.setLevel(LOG_LEVEL)
+                logger.addHandler(QueueHandler(_worker_queue))
+            return logger
 
-        log_file_name = f"{sub_dir_name}_{time.strftime('%Y%m%d_%H%M%S')}.log"
-        log_file_path = os.path.join(sub_log_dir, log_file_name)
+        backend = _get_backend()
 
-        logger = logging.getLogger(sub_dir_name)
-        logger.setLevel(logging.INFO)
+        with _backend_lock:
+            if backend.router.has_route(sub_dir_name):
+                return logger
+
+            sub_log_dir = os.path.join(self.log_dir, sub_dir_name)
+            os.makedirs(sub_log_dir, exist_ok=True)
 
-        if not logger.handlers:
-            # Configurar el manejador de cola
-            queue_handler = QueueHandler(self.log_queue)
-            logger.addHandler(queue_handler)
+            log_file_name = f"{sub_dir_name}_{time.strftime('%Y%m%d_%H%M%S')}.log"
+            log_file_path = os.path.join(sub_log_dir, log_file_name)
 
-            # Configurar el manejador de archivo
-            file_handler = logging.FileHandler(log_file_path)
+            # Un solo archivo por logger y proceso, opcionalmente rotativo; se abre con el primer mensaje
+            if LOG_MAX_BYTES > 0:
+                file_handler = RotatingFileHandler(log_file_path, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT,
+                                                   delay=True)
+            else:
+                file_handler = logging.FileHandler(log_file_path, delay=True)
 
             # Agregar información de archivo y línea al formato del log
             formatter = logging.Formatter(
                 '%(asctime)s - %(levelname)s - %(pathname)s - Line %(lineno)d - %(message)s'
             )
             file_handler.setFormatter(formatter)
+            backend.router.add_route(sub_dir_name, file_handler)
 
-            # Iniciar el listener de cola
-            listener = QueueListener(self.log_queue, file_handler)
-            listener.start()
+            # El nivel del logger descarta los mensajes antes de formatearlos
+            logger.setLevel(LOG_LEVEL)
+            logger.addHandler(QueueHandler(backend.queue))
 
         return logger
 
@@ -0,0 +1,52 @@
+import threading
+import time
+
+
+class AdaptiveRateLimiter:
+    """Limitador compartido entre hilos que se adapta a las respuestas 429 de la API."""
+
+    def __init__(self, min_interval: float = 0.0, max_interval: float = 5.0, recovery: float = 0.9):
+
+        self.base_interval = min_interval
+        self.interval = min_interval
+        self.max_interval = max_interval
+        self.recovery = recovery
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+        self._paused_until = 0.0
+
+    def acquire(self) -> float:
+        # Reserva el siguiente hueco disponible y devuelve el tiempo esperado
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot, self._paused_until)
+            self._next_slot = slot + self.interval
+        wait = slot - now
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def on_success(self):
+        # Recupera gradualmente la tasa original tras un periodo sin 429
+        with self._lock:
+            self.interval = max(self.base_interval, self.interval * self.recovery)
+
+    def on_rate_limited(self, retry_after: float = None):
+        # Pausa a todos los hilos y reduce la tasa de solicitudes
+        with self._lock:
+            now = time.monotonic()
+            # Varios hilos reciben el mismo 429: solo el primero de cada pausa reduce la tasa
+            if now >= self._paused_until:
+                self.interval = min(self.max_interval, max(self.interval * 2, 0.05))
+            if retry_after:
+                self._paused_until = max(self._paused_until, now + retry_after)
+
+    @staticmethod
+    def parse_retry_after(value, default: float = 1.0) -> float:
+
+        if value is None:
+            return default
+        try:
+            return max(float(value), 0.0)
+        except (TypeError, ValueError):
+            return default
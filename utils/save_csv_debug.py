@@ -1,6 +1,165 @@
+import atexit
+import io
 import os
+import re
+import threading
+from queue import Queue
+
 import pandas as pd
 
+from utils.logger_manager import LoggerManager
+from utils.settings import settings
+
+SINK_ENABLED = settings.get_bool('DEBUG_SINK_ENABLED', True)
+SINK_FORMAT = settings.get('DEBUG_SINK_FORMAT', 'csv').lower()
+SINK_COMPRESSION = settings.get('DEBUG_SINK_COMPRESSION') or None
+SINK_SAMPLE_ROWS = settings.get_int('DEBUG_SINK_SAMPLE_ROWS', 0)
+SINK_SAMPLE_FRACTION = settings.get_float('DEBUG_SINK_SAMPLE_FRACTION', 0)
+SINK_MAX_PENDING = settings.get_int('DEBUG_SINK_MAX_PENDING', 8)
+
+FORMATS = ('csv', 'parquet', 'feather')
+CSV_COMPRESSION_SUFFIX = {'gzip': '.gz', 'bz2': '.bz2', 'xz': '.xz', 'zstd': '.zst', 'zip': '.zip'}
+# Marcas en el nombre de los artefactos parciales: muestras de DEBUG_SINK_SAMPLE_* y bloques del proceso en streaming
+SAMPLE_SUFFIX = '_sample'
+CHUNK_SUFFIX = '_chunk'
+CHUNK_PATTERN = re.compile(rf"{CHUNK_SUFFIX}\d+({SAMPLE_SUFFIX})?$")
+
+
+def chunk_suffix(number: int) -> str:
+
+    return f"{CHUNK_SUFFIX}{number:05d}"
+
+
+def _artifact_stem(path: str) -> str:
+    # Nombre sin extensiones (movies_transformed.csv.gz -> movies_transformed)
+    return os.path.basename(path).split('.')[0]
+
+
+def is_sampled_artifact(path: str) -> bool:
+
+    return _artifact_stem(path).endswith(SAMPLE_SUFFIX)
+
+
+def is_chunk_artifact(path: str) -> bool:
+
+    return CHUNK_PATTERN.search(_artifact_stem(path)) is not None
+
+
+class DebugSink:
+    """Escritor en segundo plano de artefactos de depuración, compartido por todo el proceso."""
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, file_format: str = SINK_FORMAT, compression: str = SINK_COMPRESSION,
+                 sample_rows: int = SINK_SAMPLE_ROWS, sample_fraction: float = SINK_SAMPLE_FRACTION,
+                 max_pending: int = SINK_MAX_PENDING, script_name: str = __file__):
+
+        self.logger = LoggerManager(script_name=script_name).get_logger()
+        self.compression = compression
+        self.sample_rows = sample_rows
+        self.sample_fraction = sample_fraction
+        self.file_format = file_format if file_format in FORMATS else 'csv'
+        if self.file_format != 'csv':
+            try:
+                # Escritura de prueba en memoria para cargar ahora las dependencias perezosas de pandas/pyarrow:
+                # el hilo escritor puede seguir activo durante el cierre del intérprete, cuando ya no se
+                # permiten importaciones que registran funciones atexit
+                self._write_buffer(pd.DataFrame({'warmup': [0]}), io.BytesIO(), self.file_format)
+            except ImportError:
+                self.logger.warning(
+                    f"pyarrow no está instalado; los artefactos se guardarán en CSV en lugar de {file_format}.")
+                self.file_format = 'csv'
+
+        self._created_dirs = set()
+        self._queue = Queue(maxsize=max(1, max_pending))
+        self._thread = threading.Thread(target=self._worker, name='debug-sink', daemon=True)
+        self._thread.start()
+
+    @classmethod
+    def get(cls) -> 'DebugSink':
+
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+                atexit.register(cls._instance.close)
+            return cls._instance
+
+    def _sample(self, df: pd.DataFrame) -> pd.DataFrame:
+
+        if self.sample_fraction and 0 < self.sample_fraction < 1:
+            df = df.sample(frac=self.sample_fraction, random_state=0)
+        if self.sample_rows:
+            df = df.head(self.sample_rows)
+        return df
+
+    def submit(self, df: pd.DataFrame, path: str, filename: str):
+        # La copia se hace en el hilo llamador para que cambios posteriores no afecten al artefacto
+        snapshot = self._sample(df).copy()
+        if len(snapshot) < len(df):
+            # Una muestra no se guarda con el nombre de la salida completa
+            stem, extension = os.path.splitext(filename)
+            filename = f"{stem}{SAMPLE_SUFFIX}{extension}"
+        self._queue.put((snapshot, path, filename))
+
+    def _target_path(self, path: str, filename: str, file_format: str) -> str:
+
+        stem = os.path.splitext(filename)[0]
+        if file_format == 'csv':
+            return os.path.join(path, f"{stem}.csv{CSV_COMPRESSION_SUFFIX.get(self.compression, '')}")
+        return os.path.join(path, f"{stem}.{file_format}")
+
+    def _write(self, df: pd.DataFrame, path: str, filename: str, file_format: str):
+
+        if path not in self._created_dirs:
+            os.makedirs(path, exist_ok=True)
+            self._created_dirs.add(path)
+
+        full_path = self._target_path(path, filename, file_format)
+        self._write_buffer(df, full_path, file_format)
+        return full_path
+
+    def _write_buffer(self, df: pd.DataFrame, target, file_format: str):
+
+        if file_format == 'parquet':
+            df.to_parquet(target, index=False, compression=self.compression or 'snappy')
+        elif file_format == 'feather':
+            df.reset_index(drop=True).to_feather(target, compression=self.compression)
+        else:
+            df.to_csv(target, index=False, compression=self.compression)
+
+    def _worker(self):
+
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                df, path, filename = item
+                try:
+                    full_path = self._write(df, path, filename, self.file_format)
+                except Exception as e:
+                    if self.file_format == 'csv':
+                        raise
+                    # Columnas anidadas que el formato columnar no admite: se recurre a CSV
+                    self.logger.warning(f"No se pudo guardar {filename} en {self.file_format}, se usará CSV: {e}")
+                    full_path = self._write(df, path, filename, 'csv')
+                self.logger.info(f"Artefacto de depuración guardado en {full_path} ({len(df)} filas).")
+            except Exception as e:
+                self.logger.error(f"Error al guardar el artefacto de depuración: {e}", exc_info=True)
+            finally:
+                self._queue.task_done()
+
+    def flush(self):
+
+        self._queue.join()
+
+    def close(self):
+
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+
 
 class SaveFileDebug:
     def __init__(self, path, filename):
@@ -10,14 +169,6 @@ class SaveFileDebug:
 
     def save(self, df):
 
-        try:
-
-            if not os.path.exists(self.path):
-                os.makedirs(self.path)
-                print(f"Directorio creado: {self.path}")
-            full_path = os.path.join(self.path, self.filename)
-            df.to_csv(full_path, index=False)
-            print(f"Data saved to {full_path}")
-        except Exception as e:
-            print(f"Error saving file to {self.path}/{self.filename}: {e}")
-            raise
+        if not SINK_ENABLED or not self.path:
+            return
+        DebugSink.get().submit(df, self.path, self.filename)
@@ -0,0 +1,147 @@
+import importlib.util
+
+import pandas as pd
+
+from utils.settings import settings
+
+COMPACT_DTYPES = settings.get_bool('COMPACT_DTYPES', True)
+
+# Cadenas respaldadas por Arrow si pyarrow está instalado; si no, el tipo string de pandas
+STRING_DTYPE = 'string[pyarrow]' if importlib.util.find_spec('pyarrow') else 'string'
+
+# Respuestas de la API tal como llegan del Extractor
+RAW_MOVIE_SCHEMA = {
+    'id': 'int32',
+    'title': STRING_DTYPE,
+    'release_date': STRING_DTYPE,
+    'vote_average': 'float32',
+    'vote_count': 'Int32',
+    'popularity': 'float64',
+}
+
+RAW_DETAIL_SCHEMA = {
+    'id': 'int32',
+    'runtime': 'Int32',
+    'budget': 'Int64',
+    'revenue': 'Int64',
+}
+
+# Campos de cada respuesta que usa CleanerValidator (columnas y normalizadores de clean_data); el
+# Extractor descarta el resto (overview, production_companies, imágenes...) al recibir cada respuesta.
+# None conserva el valor; un diccionario proyecta el objeto, o cada elemento si el valor es una lista
+RAW_MOVIE_FIELDS = dict.fromkeys(RAW_MOVIE_SCHEMA)
+
+RAW_DETAIL_FIELDS = {
+    **dict.fromkeys(RAW_DETAIL_SCHEMA),
+    'genres': {'id': None, 'name': None},
+    'credits': {
+        'cast': dict.fromkeys(['credit_id', 'id', 'name', 'character', 'order']),
+        'crew': dict.fromkeys(['credit_id', 'id', 'name', 'department', 'job']),
+    },
+    'keywords': {'keywords': {'id': None, 'name': None}},
+    'release_dates': {'results': {
+        'iso_3166_1': None,
+        'release_dates': dict.fromkeys(['type', 'release_date', 'certification']),
+    }},
+}
+
+# Salida de CleanerValidator: géneros ya unidos en texto y presupuestos sin nulos
+CLEAN_SCHEMA = {
+    'id': 'int32',
+    'title': STRING_DTYPE,
+    'release_date': 'datetime64[ns]',
+    'vote_average': 'float32',
+    'vote_count': 'Int32',
+    'popularity': 'float64',
+    'genres': 'category',
+    'runtime': 'Int32',
+    'budget': 'int64',
+    'revenue': 'int64',
+}
+
+# Salida de Transformer, con los nombres de columna de la tabla 'movies'
+TRANSFORMED_SCHEMA = {
+    'movie_id': 'int32',
+    'title': STRING_DTYPE,
+    'release_date': 'datetime64[ns]',
+    'rating': 'float32',
+    'vote_count': 'Int32',
+    'popularity_score': 'float64',
+    'genres': 'category',
+    'duration_minutes': 'Int32',
+    'budget_usd': 'int64',
+    'revenue_usd': 'int64',
+    'profit_margin': 'float64',
+    'rating_category': 'category',
+}
+
+# Tablas relacionadas generadas por CleanerValidator
+MOVIE_GENRE_SCHEMA = {
+    'movie_id': 'int32',
+    'genre_id': 'int32',
+    'genre_name': 'category',
+}
+
+MOVIE_CREDIT_SCHEMA = {
+    'movie_id': 'int32',
+    'credit_id': STRING_DTYPE,
+    'credit_type': 'category',
+    'person_id': 'int32',
+    'name': STRING_DTYPE,
+    'character': STRING_DTYPE,
+    'department': 'category',
+    'job': 'category',
+    'cast_order': 'Int16',
+}
+
+MOVIE_KEYWORD_SCHEMA = {
+    'movie_id': 'int32',
+    'keyword_id': 'int32',
+    'keyword_name': STRING_DTYPE,
+}
+
+MOVIE_RELEASE_DATE_SCHEMA = {
+    'movie_id': 'int32',
+    'country': 'category',
+    'release_type': 'Int8',
+    'release_date': 'datetime64[ns]',
+    'certification': 'category',
+}
+
+
+def enforce_schema(df: pd.DataFrame, schema: dict) -> pd.DataFrame:
+    # Convierte solo las columnas presentes cuyo tipo difiere; las demás columnas se conservan
+    if not COMPACT_DTYPES or df.empty:
+        return df
+    casts = {
+        column: dtype for column, dtype in schema.items()
+        if column in df.columns and df[column].dtype != dtype
+    }
+    return df.astype(casts) if casts else df
+
+
+def project_fields(value, fields: dict):
+    # Copia de value con solo las claves de fields, a cualquier nivel de anidamiento
+    if isinstance(value, list):
+        return [project_fields(item, fields) for item in value]
+    if not isinstance(value, dict):
+        return value
+    return {
+        key: value[key] if nested is None else project_fields(value[key], nested)
+        for key, nested in fields.items() if key in value
+    }
+
+
+def frame_from_records(records: list, fields: dict, schema: dict) -> pd.DataFrame:
+    # Un solo DataFrame construido por columnas; como pd.DataFrame(records), una clave que no trae
+    # ningún registro no genera columna
+    columns = {
+        column: [record.get(column) for record in records]
+        for column in fields if any(column in record for record in records)
+    }
+    return enforce_schema(pd.DataFrame(columns), schema)
+
+
+def memory_usage_mb(df: pd.DataFrame) -> float:
+
+    return round(df.memory_usage(index=True, deep=True).sum() / 1024 ** 2, 3)
@@ -0,0 +1,49 @@
+import os
+
+from dotenv import load_dotenv
+
+TRUE_VALUES = ('1', 'true', 'yes')
+
+
+class Settings:
+    """Configuración del proceso: variables de entorno completadas con el archivo .env.
+
+    El .env se lee una sola vez por proceso, al crear la instancia compartida `settings`; los valores se
+    consultan en el entorno en cada llamada, así las variables fijadas antes de importar un módulo se respetan.
+    """
+
+    def __init__(self, dotenv_path: str = None):
+        # load_dotenv no pisa las variables ya definidas en el entorno
+        self.dotenv_loaded = load_dotenv(dotenv_path)
+
+    def get(self, name: str, default=None):
+
+        return os.environ.get(name, default)
+
+    def _convert(self, name: str, default, convert):
+
+        value = self.get(name, default)
+        try:
+            return convert(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"Valor no válido para {name}: {value!r}.") from None
+
+    def get_int(self, name: str, default: int = None) -> int:
+
+        return self._convert(name, default, int)
+
+    def get_float(self, name: str, default: float = None) -> float:
+
+        return self._convert(name, default, float)
+
+    def get_bool(self, name: str, default: bool = False) -> bool:
+
+        return str(self.get(name, str(default))).lower() in TRUE_VALUES
+
+    def get_list(self, name: str, default: str = '') -> list:
+        # Listas separadas por comas; los elementos vacíos se descartan
+        return [item.strip() for item in self.get(name, default).split(',') if item.strip()]
+
+
+# Instancia compartida por todos los módulos del proceso
+settings = Settings()
@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+
+
+class ValidationRule:
+    def __init__(self, name: str, predicate, description: str, drop: bool = True):
+
+        # predicate(df, context) devuelve una máscara booleana con True en las filas que incumplen la regla
+        self.name = name
+        self.predicate = predicate
+        self.description = description
+        self.drop = drop
+
+
+class RuleEngine:
+    """Evalúa todas las reglas registradas en una sola pasada sobre una matriz booleana de motivos."""
+
+    def __init__(self, rules=None):
+
+        self.rules = list(rules or [])
+
+    def register(self, name: str, predicate, description: str, drop: bool = True):
+
+        self.rules.append(ValidationRule(name, predicate, description, drop))
+        return self
+
+    def evaluate(self, df: pd.DataFrame, context: dict = None):
+
+        context = context or {}
+        if not self.rules or df.empty:
+            return df, df.iloc[0:0].assign(reject_reason='', dropped=False), {rule.name: 0 for rule in self.rules}
+
+        # Una columna por regla; NaN en la máscara se trata como incumplimiento
+        matrix = np.column_stack([
+            np.asarray(pd.Series(rule.predicate(df, context), index=df.index).fillna(True), dtype=bool)
+            for rule in self.rules
+        ])
+        drop_columns = np.array([rule.drop for rule in self.rules])
+        dropped = matrix[:, drop_columns].any(axis=1)
+        flagged = matrix.any(axis=1)
+        counts = dict(zip((rule.name for rule in self.rules), matrix.sum(axis=0).tolist()))
+
+        clean = df[~dropped]
+
+        # Cada combinación de motivos se codifica como un entero y se traduce a texto una sola vez
+        codes = matrix[flagged].astype(np.int64) @ (1 << np.arange(len(self.rules), dtype=np.int64))
+        labels = {
+            code: '; '.join(rule.name for bit, rule in enumerate(self.rules) if code & (1 << bit))
+            for code in np.unique(codes).tolist()
+        }
+        rejects = df[flagged].copy()
+        rejects['reject_reason'] = pd.Series(codes, index=rejects.index).map(labels)
+        rejects['dropped'] = dropped[flagged]
+
+        return clean, rejects, counts